@@ -0,0 +1,71 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import AbstractUser
+from django.core.cache import BaseCache, caches
+
+USER_KEY = "accounts:user:{user_id}"
+
+# never written to the cache: a cached user loads it from the database when it is read, see accounts.models
+UNCACHED_FIELDS = ("password",)
+
+
+def get_user_cache() -> BaseCache:
+    return caches[settings.ACCOUNTS_USER_CACHE_ALIAS]
+
+
+def invalidate_user(user_id: int) -> None:
+    get_user_cache().delete(USER_KEY.format(user_id=user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Authentication backend loading the user of a session from a cache shared by the worker processes,
+    so that an authenticated request does not read the user table. The cached user is dropped when it is
+    saved or deleted, or when its groups or permissions change, see accounts.signals.
+    The cache holds the fields of the user without its password, and the session hash computed from the password.
+    """
+
+    def get_user(self, user_id: int) -> AbstractUser | None:
+        """
+        Method to get the active user of a session, from the cache or else from the database.
+        Args:
+            user_id (int): The ID of the user, stored in the session.
+
+        Returns:
+            The user, or None if it does not exist or cannot log in.
+        """
+        cache = get_user_cache()
+        key = USER_KEY.format(user_id=user_id)
+
+        cached = cache.get(key)
+        if cached is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, self._cached_fields(user=user), timeout=settings.ACCOUNTS_USER_CACHE_TIMEOUT)
+        else:
+            user = self._cached_user(cached=cached)
+        return user if self.user_can_authenticate(user) else None
+
+    @staticmethod
+    def _cached_fields(user: AbstractUser) -> dict:
+        fields = {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields if field.name not in UNCACHED_FIELDS
+        }
+        return {"fields": fields, "session_auth_hash": user.get_session_auth_hash()}
+
+    @staticmethod
+    def _cached_user(cached: dict) -> AbstractUser:
+        user_model = get_user_model()
+        fields = cached["fields"]
+        # built like a user loaded with the uncached fields deferred
+        user = user_model.from_db(user_model._default_manager.db, list(fields), list(fields.values()))
+        user._session_auth_hash = cached["session_auth_hash"]
+        return user
+
+    async def aget_user(self, user_id: int) -> AbstractUser | None:
+        # the cache backends are synchronous
+        return await sync_to_async(self.get_user)(user_id)
@@ -7,3 +7,10 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+    def get_session_auth_hash(self) -> str:
+        # the users cached by accounts.backends carry the hash of their password instead of the password itself,
+        # until the password is loaded or set
+        if "password" not in self.__dict__ and "_session_auth_hash" in self.__dict__:
+            return self._session_auth_hash
+        return super().get_session_auth_hash()
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.backends import invalidate_user
+from accounts.username_index import username_index
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def index_username(sender, instance, **kwargs):
+    user_id, username = instance.pk, instance.username
+    # a rolled back user must not be found
+    transaction.on_commit(lambda: username_index.add(user_id=user_id, username=username))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def unindex_username(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: username_index.remove(user_id=user_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(user_id=instance.pk)
+    # a request may have cached the former user before the transaction is committed
+    transaction.on_commit(lambda: invalidate_user(user_id=instance.pk))
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+@receiver(m2m_changed, sender=get_user_model().user_permissions.through)
+def invalidate_cached_users(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == "pre_clear":
+        # the users of the group or permission, before they are removed from it
+        user_ids = list(instance.user_set.values_list("pk", flat=True))
+    else:
+        user_ids = list(pk_set)
+
+    def invalidate():
+        for user_id in user_ids:
+            invalidate_user(user_id=user_id)
+
+    invalidate()
+    transaction.on_commit(invalidate)
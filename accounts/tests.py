@@ -0,0 +1,272 @@
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user, get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.backends import USER_KEY
+from accounts.username_index import UsernameIndex, username_index
+from feed.tests import TEST_CACHES
+
+User = get_user_model()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class QueryBudgetTests(TestCase):
+    """
+    Maximum number of queries of each accounts page, which must not grow with the number of users.
+    """
+    seed = {"users": 20, "follows": 5, "tickets": 20, "reviews": 20}
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_litreview", seed=1, prefix="seed", password="Litreview-2026", stdout=StringIO(), **cls.seed)
+        cls.user = User.objects.order_by("id").first()
+
+    def assertQueryBudget(self, budget: int, url: str, method: str = "get", data: dict | None = None,
+                          status: int = 200) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data)
+        self.assertEqual(response.status_code, status)
+        self.assertLessEqual(
+            len(queries), budget,
+            f"{method.upper()} {url} ran {len(queries)} queries, over its budget of {budget}:\n"
+            + "\n".join(query["sql"] for query in queries),
+        )
+
+    def test_log_in(self):
+        self.assertQueryBudget(0, reverse("accounts:log-in"))
+        self.assertQueryBudget(9, reverse("accounts:log-in"), method="post",
+                               data={"username": self.user.username, "password": "Litreview-2026"}, status=302)
+
+    def test_sign_up(self):
+        self.assertQueryBudget(0, reverse("accounts:sign-up"))
+        self.assertQueryBudget(11, reverse("accounts:sign-up"), method="post",
+                               data={"username": "newcomer", "password1": "Litreview-2026",
+                                     "password2": "Litreview-2026"}, status=302)
+
+    def test_log_out(self):
+        self.client.force_login(self.user)
+        self.assertQueryBudget(4, reverse("accounts:log-out"), status=302)
+
+
+class LargeQueryBudgetTests(QueryBudgetTests):
+    """
+    Same budgets, with ten times more users.
+    """
+    seed = {"users": 200, "follows": 20, "tickets": 200, "reviews": 200}
+
+
+@override_settings(CACHES=TEST_CACHES, FEED_PAGE_CACHE=False)
+class SessionTests(TestCase):
+    """
+    The sessions and their users are read from the cache, so that reading a page writes nothing to the database.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="Litreview-2026")
+
+    def setUp(self):
+        caches["sessions"].clear()
+        self.client.force_login(self.user)
+
+    def test_cached_session_and_user(self):
+        self.client.get(reverse("feed:feed"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("feed:feed"))
+        self.assertEqual(response.status_code, 200)
+
+        statements = [query["sql"] for query in queries]
+        self.assertFalse([sql for sql in statements if "django_session" in sql or '"accounts_user"' in sql])
+        self.assertFalse([sql for sql in statements if sql.split(" ", 1)[0] in ("INSERT", "UPDATE", "DELETE")])
+
+    def test_changed_user(self):
+        self.client.get(reverse("feed:feed"))
+        self.user.username = "renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get(reverse("feed:feed")).wsgi_request.user.username, "renamed")
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        request = RequestFactory().get(reverse("feed:feed"))
+        request.session = self.client.session
+        self.assertFalse(get_user(request).is_authenticated)
+
+    def test_cached_user_without_password(self):
+        self.client.get(reverse("feed:feed"))
+        cached = caches["sessions"].get(USER_KEY.format(user_id=self.user.pk))
+        self.assertNotIn("password", cached["fields"])
+        self.assertNotIn(self.user.password, repr(cached))
+
+        user = self.client.get(reverse("feed:feed")).wsgi_request.user
+        self.assertEqual(user.get_deferred_fields(), {"password"})
+        # loaded from the database when it is needed
+        self.assertTrue(user.check_password("Litreview-2026"))
+
+    def test_changed_password(self):
+        self.client.get(reverse("feed:feed"))
+        user = self.client.get(reverse("feed:feed")).wsgi_request.user
+        user.set_password("Litreview-2027")
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+        request = RequestFactory().get(reverse("feed:feed"))
+        request.session = self.client.session
+        self.assertFalse(get_user(request).is_authenticated)
+
+    def test_changed_groups_and_permissions(self):
+        key = USER_KEY.format(user_id=self.user.pk)
+        group = Group.objects.create(name="Editors")
+        permission = Permission.objects.get(codename="change_ticket")
+        changes = [
+            lambda: self.user.user_permissions.add(permission),
+            lambda: self.user.user_permissions.remove(permission),
+            lambda: self.user.groups.add(group),
+            lambda: self.user.groups.clear(),
+            lambda: group.user_set.add(self.user),
+            lambda: group.user_set.clear(),
+            lambda: permission.user_set.add(self.user),
+            lambda: permission.user_set.remove(self.user),
+        ]
+        for change in changes:
+            self.client.get(reverse("feed:feed"))
+            self.assertIsNotNone(caches["sessions"].get(key))
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertIsNone(caches["sessions"].get(key))
+
+    def test_sign_up(self):
+        self.client.logout()
+        self.client.post(reverse("accounts:sign-up"), {"username": "newcomer", "password1": "Litreview-2026",
+                                                       "password2": "Litreview-2026"})
+        self.assertEqual(self.client.get(reverse("feed:feed")).status_code, 200)
+
+    def test_messages_in_cookie(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("feed:follows"), {"username": "nobody"})
+        self.assertIn("messages", response.cookies)
+        self.assertFalse([query["sql"] for query in queries if "django_session" in query["sql"]])
+
+
+class UsernameIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {username: User.objects.create_user(username=username, password="Litreview-2026")
+                     for username in ("alice", "Alfred", "albert", "bob", "alice2")}
+
+    def setUp(self):
+        self.index = UsernameIndex(max_age=60)
+        self.index.load()
+
+    def test_search(self):
+        self.assertEqual(self.index.search(prefix="AL", limit=10), ["albert", "Alfred", "alice", "alice2"])
+        self.assertEqual(self.index.search(prefix="al", limit=2), ["albert", "Alfred"])
+        self.assertEqual(self.index.search(prefix="alice", limit=10), ["alice", "alice2"])
+        self.assertEqual(self.index.search(prefix="z", limit=10), [])
+
+    def test_search_exclude(self):
+        exclude_ids = [self.users["albert"].pk, self.users["alice"].pk]
+
+        self.assertEqual(self.index.search(prefix="al", limit=2, exclude_ids=exclude_ids), ["Alfred", "alice2"])
+
+    def test_get_id(self):
+        self.assertEqual(self.index.get_id(username="Alfred"), self.users["Alfred"].pk)
+        self.assertIsNone(self.index.get_id(username="alfred"))
+        self.assertIsNone(self.index.get_id(username="carol"))
+
+    def test_get_id_after_load(self):
+        # created by another process: the index learns about it with its next load
+        carol = User.objects.create_user(username="carol", password="Litreview-2026")
+        self.index.remove(user_id=carol.pk)
+
+        self.assertEqual(self.index.search(prefix="car", limit=10), [])
+        self.assertEqual(self.index.get_id(username="carol"), carol.pk)
+        self.assertIsNone(self.index.get_id(username=""))
+
+    def test_follow_compute_user_after_load(self):
+        username_index.load()
+        User.objects.create_user(username="carol", password="Litreview-2026")
+
+        response = self.client.post(reverse("feed:follow-compute-user"), {"user": "carol"})
+
+        self.assertEqual(response.json(), {"response": True})
+
+    def test_add_and_remove(self):
+        self.index.add(user_id=100, username="Alma")
+        self.assertEqual(self.index.search(prefix="al", limit=10), ["albert", "Alfred", "alice", "alice2", "Alma"])
+        self.assertEqual(self.index.get_id(username="Alma"), 100)
+
+        # renamed
+        self.index.add(user_id=100, username="carol")
+        self.assertEqual(self.index.search(prefix="al", limit=10), ["albert", "Alfred", "alice", "alice2"])
+        self.assertEqual(self.index.get_id(username="carol"), 100)
+
+        self.index.remove(user_id=100)
+        self.assertIsNone(self.index.get_id(username="carol"))
+        self.index.remove(user_id=100)
+
+    def test_add_before_load(self):
+        index = UsernameIndex(max_age=60)
+        index.add(user_id=100, username="Alma")
+
+        # the first lookup loads the users of the database only
+        self.assertEqual(index.search(prefix="alm", limit=10), [])
+
+    def test_reload(self):
+        User.objects.create_user(username="alan", password="Litreview-2026")
+        self.assertEqual(self.index.search(prefix="ala", limit=10), [])
+
+        with mock.patch("accounts.username_index.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertEqual(self.index.search(prefix="ala", limit=10), ["alan"])
+
+    def test_single_reload(self):
+        loads = []
+        loading = threading.Event()
+
+        def load():
+            loads.append(threading.get_ident())
+            loading.set()
+            time.sleep(0.05)
+            self.index._loaded_at = time.monotonic()
+
+        self.index._loaded_at -= 61
+        with mock.patch.object(self.index, "load", side_effect=load):
+            threads = [threading.Thread(target=self.index.search, kwargs={"prefix": "al", "limit": 10})
+                       for _ in range(8)]
+            threads[0].start()
+            loading.wait()
+            for thread in threads[1:]:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(loads), 1)
+
+    def test_signals(self):
+        username_index.load()
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            user = User.objects.create_user(username="Alma", password="Litreview-2026")
+        # not committed yet, or rolled back
+        self.assertEqual(username_index.search(prefix="Alma", limit=10), [])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(username_index.get_id(username="Alma"), user.pk)
+
+        user_id = user.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertIsNone(username_index.get_id(username="Alma"))
+        self.assertNotIn(user_id, username_index._usernames)
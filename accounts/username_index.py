@@ -0,0 +1,146 @@
+import bisect
+import threading
+import time
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+
+class UsernameIndex:
+    """
+    In-process index of the usernames, kept as a sorted array of lowercased usernames to answer
+    prefix and exact lookups with a binary search instead of a database round trip.
+
+    The index is loaded on first use, updated incrementally when users are created, renamed or deleted
+    in this process, and fully reloaded after `max_age` seconds to catch the users created by other processes.
+    A single thread reloads the index, the others keep reading the former one meanwhile.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # held by the thread loading the index from the database
+        self._load_lock = threading.Lock()
+        self._keys: list[str] = []
+        self._entries: list[tuple[str, int]] = []
+        self._usernames: dict[int, str] = {}
+        self._loaded_at: float | None = None
+
+    def load(self) -> None:
+        """
+        Method to (re)load the whole index from the database.
+        """
+        rows = sorted((username.lower(), username, user_id) for user_id, username
+                      in get_user_model().objects.values_list("id", "username").iterator())
+        with self._lock:
+            self._keys = [key for key, _, _ in rows]
+            self._entries = [(username, user_id) for _, username, user_id in rows]
+            self._usernames = {user_id: username for _, username, user_id in rows}
+            self._loaded_at = time.monotonic()
+
+    def add(self, user_id: int, username: str) -> None:
+        """
+        Method to add a user to the index, or to update its username.
+        Args:
+            user_id (int): The ID of the user.
+            username (str): The username of the user.
+        """
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            self._remove(user_id=user_id)
+            position = bisect.bisect_left(self._keys, username.lower())
+            self._keys.insert(position, username.lower())
+            self._entries.insert(position, (username, user_id))
+            self._usernames[user_id] = username
+
+    def remove(self, user_id: int) -> None:
+        """
+        Method to remove a user from the index.
+        Args:
+            user_id (int): The ID of the user.
+        """
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            self._remove(user_id=user_id)
+
+    def get_id(self, username: str) -> int | None:
+        """
+        Method to find a user by its exact username.
+        The users created by other processes since the last load are looked for in the database.
+        Args:
+            username (str): The username to look for.
+
+        Returns:
+            The ID of the user, or None if no user has this username.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            position = bisect.bisect_left(self._keys, username.lower())
+            while position < len(self._keys) and self._keys[position] == username.lower():
+                if self._entries[position][0] == username:
+                    return self._entries[position][1]
+                position += 1
+        if not username:
+            return None
+        return get_user_model().objects.filter(username=username).values_list("id", flat=True).first()
+
+    def search(self, prefix: str, limit: int, exclude_ids: Iterable[int] = ()) -> list[str]:
+        """
+        Method to find the usernames starting with a prefix, case insensitively.
+        Args:
+            prefix (str): The beginning of the usernames.
+            limit (int): The maximum number of usernames returned.
+            exclude_ids (Iterable[int]): The IDs of the users to leave out.
+
+        Returns:
+            A list with the matching usernames, in alphabetical order.
+        """
+        self._ensure_fresh()
+        prefix = prefix.lower()
+        exclude_ids = set(exclude_ids)
+
+        usernames = []
+        with self._lock:
+            position = bisect.bisect_left(self._keys, prefix)
+            while position < len(self._keys) and len(usernames) < limit and self._keys[position].startswith(prefix):
+                username, user_id = self._entries[position]
+                if user_id not in exclude_ids:
+                    usernames.append(username)
+                position += 1
+        return usernames
+
+    def _ensure_fresh(self) -> None:
+        if not self._is_stale():
+            return
+        if self._loaded_at is None:
+            # nothing to read yet, the other threads wait for the first load
+            with self._load_lock:
+                if self._loaded_at is None:
+                    self.load()
+        elif self._load_lock.acquire(blocking=False):
+            try:
+                if self._is_stale():
+                    self.load()
+            finally:
+                self._load_lock.release()
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+
+    def _remove(self, user_id: int) -> None:
+        username = self._usernames.pop(user_id, None)
+        if username is None:
+            return
+        position = bisect.bisect_left(self._keys, username.lower())
+        while position < len(self._keys) and self._keys[position] == username.lower():
+            if self._entries[position][1] == user_id:
+                del self._keys[position]
+                del self._entries[position]
+                return
+            position += 1
+
+
+username_index = UsernameIndex(max_age=settings.USERNAME_INDEX_MAX_AGE)
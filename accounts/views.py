@@ -44,7 +44,7 @@ def sign_up(request: HttpRequest) -> HttpResponse:
         signup_form = SignupForm(data=request.POST)
         if signup_form.is_valid():
             user = signup_form.save()
-            login(request=request, user=user)
+            login(request=request, user=user, backend='accounts.backends.CachedModelBackend')
             messages.success(request, f"✅ {user.get_username()}, inscription réussie. "
                                       f"Vous êtes maintenant connecté.")
             return redirect('feed:feed')
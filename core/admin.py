@@ -0,0 +1,32 @@
+from django.contrib import admin
+from django.utils.html import format_html
+
+from core.models import RequestProfile
+from core.profiling import top_functions
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('time_created', 'method', 'path', 'view_name', 'user', 'status', 'duration_ms', 'db_queries')
+    list_filter = ('view_name', 'status')
+    search_fields = ('path',)
+    readonly_fields = ('user', 'method', 'path', 'view_name', 'status', 'duration_ms', 'db_queries',
+                       'pstats_path', 'collapsed_path', 'time_created', 'top_functions')
+
+    def has_add_permission(self, request):
+        return False
+
+    def top_functions(self, obj):
+        """
+        Method to display the functions with the highest cumulative time of the profile.
+        Args:
+            obj (RequestProfile): The profile.
+
+        Returns:
+            The pstats table in a <pre> block.
+        """
+        return format_html('<pre style="font-size: 11px;">{}</pre>', top_functions(pstats_path=obj.pstats_path))
+
+    top_functions.short_description = "Fonctions les plus coûteuses"
+
+
+admin.site.register(RequestProfile, RequestProfileAdmin)
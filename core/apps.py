@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class HomeConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core import signals  # noqa: F401
@@ -0,0 +1,138 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Iterable
+
+# upper bounds of the histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class Histogram:
+    """
+    Distribution of observed values, counted in buckets of cumulative upper bounds as in Prometheus.
+    """
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        # the last count is for the values above the highest bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list[tuple[str, int]]:
+        """
+        Method to get the number of values lower than or equal to each bucket bound.
+        Returns:
+            A list of (bound, count) tuples, ending with the "+Inf" bound.
+        """
+        bounds = [format_number(bucket) for bucket in self.buckets] + ["+Inf"]
+        total = 0
+        cumulative = []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+
+class MetricsRegistry:
+    """
+    In-process metrics of the requests, for each URL name: request and error counts, latency,
+    database time and query count histograms.
+
+    Each process keeps its own metrics. With several worker processes, each scrape reads the metrics
+    of the worker that answers it, told apart by the `pid` label.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Method to drop all the collected metrics.
+        """
+        with self._lock:
+            self._requests: dict[tuple[str, str, str], int] = defaultdict(int)
+            self._errors: dict[str, int] = defaultdict(int)
+            self._durations: dict[str, Histogram] = defaultdict(lambda: Histogram(buckets=DURATION_BUCKETS))
+            self._db_durations: dict[str, Histogram] = defaultdict(lambda: Histogram(buckets=DURATION_BUCKETS))
+            self._queries: dict[str, Histogram] = defaultdict(lambda: Histogram(buckets=QUERY_BUCKETS))
+
+    def observe_request(self, view: str, method: str, status: int, duration: float, db_duration: float,
+                        db_queries: int) -> None:
+        """
+        Method to record a handled request.
+        Args:
+            view (str): The URL name of the view, like "feed:feed".
+            method (str): The HTTP method.
+            status (int): The status code of the response.
+            duration (float): The total time of the request, in seconds.
+            db_duration (float): The time spent in the database, in seconds.
+            db_queries (int): The number of SQL queries.
+        """
+        with self._lock:
+            self._requests[(view, method, str(status))] += 1
+            if status >= 500:
+                self._errors[view] += 1
+            self._durations[view].observe(duration)
+            self._db_durations[view].observe(db_duration)
+            self._queries[view].observe(db_queries)
+
+    def render(self, pid: int) -> str:
+        """
+        Method to export the metrics in the Prometheus text exposition format.
+        Args:
+            pid (int): The ID of the process, added as a label to tell the workers apart.
+
+        Returns:
+            The metrics, one sample per line.
+        """
+        lines = []
+        with self._lock:
+            lines += ["# HELP litreview_requests_total Requests handled, by view, method and status.",
+                      "# TYPE litreview_requests_total counter"]
+            for (view, method, status), value in sorted(self._requests.items()):
+                lines.append(sample("litreview_requests_total", value,
+                                    pid=pid, view=view, method=method, status=status))
+
+            lines += ["# HELP litreview_request_errors_total Requests answered with a server error, by view.",
+                      "# TYPE litreview_request_errors_total counter"]
+            for view, value in sorted(self._errors.items()):
+                lines.append(sample("litreview_request_errors_total", value, pid=pid, view=view))
+
+            for name, description, histograms in (
+                ("litreview_request_duration_seconds", "Total time of the requests, by view.", self._durations),
+                ("litreview_request_db_duration_seconds", "Database time of the requests, by view.",
+                 self._db_durations),
+                ("litreview_request_db_queries", "SQL queries run by the requests, by view.", self._queries),
+            ):
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+                for view, histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulative_counts():
+                        lines.append(sample(f"{name}_bucket", count, pid=pid, view=view, le=bound))
+                    lines.append(sample(f"{name}_sum", histogram.sum, pid=pid, view=view))
+                    lines.append(sample(f"{name}_count", histogram.count, pid=pid, view=view))
+
+        return "\n".join(lines) + "\n"
+
+
+def sample(name: str, value: float, **labels) -> str:
+    label_text = ",".join(f'{key}="{escape_label(str(label))}"' for key, label in labels.items())
+    return f"{name}{{{label_text}}} {format_number(value)}"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,213 @@
+import json
+import logging
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+
+from core.metrics import metrics
+from core.models import RequestProfile
+from core.profiling import PROFILE_MODES, ProfilerBusy, aprofile_call, profile_call
+from core.timing import RequestTimings, current_timings, time_query
+
+logger = logging.getLogger(__name__)
+
+
+def install_query_timer(connection, **kwargs) -> None:
+    """
+    Method to add the query timer to the execute wrappers of a database connection, once.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class PerformanceMiddleware:
+    """
+    Middleware measuring the database, template and view time of each request.
+    The timings are sent in a Server-Timing header, logged when the request is slower than
+    PERFORMANCE_SLOW_REQUEST_MS and, when PERFORMANCE_METRICS is True, added to the metrics of the view.
+    The middleware removes itself when PERFORMANCE_TIMING is False.
+
+    Put it first in MIDDLEWARE, so that the total time covers the other middleware. The view time runs
+    from the call of the view to the response, including the response phase of the middleware below.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # else Django would run the sync method in a thread
+            self.process_view = self.aprocess_view
+        # connections opened later, in any thread
+        connection_created.connect(install_query_timer, dispatch_uid="core.middleware.install_query_timer")
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.async_mode:
+            return self.__acall__(request)
+
+        for connection in connections.all():
+            install_query_timer(connection=connection)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+            timings.finish()
+        return self.process_timings(request=request, response=response, timings=timings)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        # the queries run in the threads of sync_to_async, which copy the context and so see the timings
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+            timings.finish()
+        return self.process_timings(request=request, response=response, timings=timings)
+
+    def process_timings(self, request: HttpRequest, response: HttpResponse, timings: RequestTimings) -> HttpResponse:
+        """
+        Method to send, log and record the timings of a finished request.
+        Args:
+            request (HttpRequest): The incoming HTTP request.
+            response (HttpResponse): The response of the request.
+            timings (RequestTimings): The finished timings of the request.
+
+        Returns:
+            The response with the Server-Timing header.
+        """
+        response["Server-Timing"] = timings.server_timing()
+        if timings.total * 1000 >= settings.PERFORMANCE_SLOW_REQUEST_MS:
+            record = {"method": request.method, "path": request.get_full_path(), "status": response.status_code,
+                      **timings.as_dict()}
+            logger.warning("Slow request %s", json.dumps(record), extra={"performance": record})
+
+        if settings.PERFORMANCE_METRICS:
+            # the URL name rather than the path, which would make a new series for every post
+            view = request.resolver_match.view_name if request.resolver_match else "<unresolved>"
+            metrics.observe_request(view=view, method=request.method, status=response.status_code,
+                                    duration=timings.total, db_duration=timings.db, db_queries=timings.db_queries)
+        return response
+
+    def process_view(self, request: HttpRequest, view_func, view_args, view_kwargs) -> None:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.view_start = time.perf_counter()
+
+    async def aprocess_view(self, request: HttpRequest, view_func, view_args, view_kwargs) -> None:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.view_start = time.perf_counter()
+
+
+class ProfilingMiddleware:
+    """
+    Middleware profiling the requests of staff users sent with ?profile=1 or the `X-Profile: 1` header.
+    "1" runs both cProfile and the sampling profiler, "cprofile" or "sample" only one of them.
+    The profiles are written to PROFILING_DIR and listed in the admin as RequestProfile objects.
+    One request is profiled at a time in the process, the others asking for a profile meanwhile are served
+    unprofiled with an `X-Profile: busy` header.
+    The middleware removes itself when PROFILING_ENABLED is False.
+
+    Put it last in MIDDLEWARE, so that the user is authenticated and only the view is profiled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.async_mode:
+            return self.__acall__(request)
+
+        mode = request.GET.get("profile") or request.headers.get("X-Profile")
+        if mode not in PROFILE_MODES or not request.user.is_staff:
+            return self.get_response(request)
+
+        # the cached pages would be profiled instead of the view
+        request.profiled = True
+        try:
+            response, *profile = profile_call(func=lambda: self.get_response(request), **self.profile_options(mode))
+        except ProfilerBusy:
+            request.profiled = False
+            response = self.get_response(request)
+            response["X-Profile"] = "busy"
+            return response
+
+        profile = RequestProfile.objects.create(**self.profile_fields(request, request.user, response, *profile))
+        response["X-Profile-Id"] = str(profile.pk)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        mode = request.GET.get("profile") or request.headers.get("X-Profile")
+        if mode not in PROFILE_MODES:
+            return await self.get_response(request)
+        user = await request.auser()
+        if not user.is_staff:
+            return await self.get_response(request)
+
+        request.profiled = True
+        try:
+            response, *profile = await aprofile_call(func=lambda: self.get_response(request),
+                                                     **self.profile_options(mode))
+        except ProfilerBusy:
+            request.profiled = False
+            response = await self.get_response(request)
+            response["X-Profile"] = "busy"
+            return response
+
+        profile = await RequestProfile.objects.acreate(**self.profile_fields(request, user, response, *profile))
+        response["X-Profile-Id"] = str(profile.pk)
+        return response
+
+    @staticmethod
+    def profile_options(mode: str) -> dict:
+        """
+        Method to get the arguments of profile_call for a profiling mode, other than the function.
+        """
+        return {
+            "modes": PROFILE_MODES[mode],
+            "directory": settings.PROFILING_DIR,
+            "name": f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}",
+            "interval": settings.PROFILING_SAMPLE_INTERVAL,
+        }
+
+    @staticmethod
+    def profile_fields(request: HttpRequest, user, response: HttpResponse, duration: float, pstats_path: str,
+                       collapsed_path: str) -> dict:
+        """
+        Method to get the fields of the RequestProfile of a profiled request.
+        """
+        timings = current_timings.get()
+        return {
+            "user": user,
+            "method": request.method,
+            "path": request.get_full_path()[:2048],
+            "view_name": request.resolver_match.view_name if request.resolver_match else "",
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 2),
+            "db_queries": timings.db_queries if timings is not None else None,
+            "pstats_path": pstats_path,
+            "collapsed_path": collapsed_path,
+        }
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 07:19
+# flake8: noqa
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=2048)),
+                ('view_name', models.CharField(blank=True, max_length=255)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('db_queries', models.PositiveIntegerField(blank=True, null=True)),
+                ('pstats_path', models.CharField(blank=True, max_length=1024)),
+                ('collapsed_path', models.CharField(blank=True, max_length=1024)),
+                ('time_created', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-time_created'],
+            },
+        ),
+    ]
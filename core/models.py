@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """
+    Profile of a request run by a staff user with ?profile= or the X-Profile header, see core.middleware.
+    The profiles themselves are files in PROFILING_DIR.
+    """
+    user = models.ForeignKey(to=settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    view_name = models.CharField(max_length=255, blank=True)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    db_queries = models.PositiveIntegerField(null=True, blank=True)
+    # pstats file, readable with `python -m pstats` or snakeviz
+    pstats_path = models.CharField(max_length=1024, blank=True)
+    # collapsed stacks file, readable with flamegraph.pl or speedscope
+    collapsed_path = models.CharField(max_length=1024, blank=True)
+    time_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-time_created']
+
+    def __str__(self):
+        return f"{self.method} {self.path}"
@@ -0,0 +1,196 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from asgiref.sync import sync_to_async
+
+# values of the ?profile= parameter or X-Profile header, and the profilers they run
+PROFILE_MODES = {"1": ("cprofile", "sample"), "cprofile": ("cprofile",), "sample": ("sample",)}
+
+# one profile at a time in the process: cProfile refuses to start while another profiler is active (Python 3.12+),
+# and the switch interval lowered by the sampling profiler is global
+_profiling_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """
+    Raised when a profile is requested while another one is running in the process.
+    """
+
+
+class SamplingProfiler:
+    """
+    Wall-clock profiler sampling the stack of a thread at a fixed interval, from another thread.
+    The samples are counted as collapsed stacks, "outer;inner;innermost count", the input of flamegraph tools.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """
+        Method to start sampling the calling thread, below the frame of the caller.
+        The switch interval is global, the caller must hold the profiling lock until stop().
+        """
+        self._thread_id = threading.get_ident()
+        self._base = sys._getframe(1)
+        # the sampling thread waits for the GIL, released every switch interval (5 ms by default)
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            names = []
+            while frame is not None and frame is not self._base:
+                code = frame.f_code
+                names.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            # without the base frame, the thread is running something else, e.g. another task of the event loop
+            if names and frame is not None:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+def profile_call(func: Callable, modes: tuple[str, ...], directory: Path, name: str, interval: float) -> tuple:
+    """
+    Method to call a function under cProfile and/or the sampling profiler, and to write the profiles to files.
+    Args:
+        func (Callable): The function to call, without arguments.
+        modes (tuple[str, ...]): The profilers to run, "cprofile" and/or "sample".
+        directory (Path): The directory of the profile files.
+        name (str): The name of the profile files, without extension.
+        interval (float): The sampling interval, in seconds.
+
+    Returns:
+        A tuple with the result of the function, the duration of the call in seconds,
+        and the paths of the pstats and collapsed stacks files (empty when their profiler did not run).
+
+    Raises:
+        ProfilerBusy: If another profile is running in the process, the function is not called.
+    """
+    if not _profiling_lock.acquire(blocking=False):
+        raise ProfilerBusy
+    profiler, sampler = _profilers(modes=modes, interval=interval)
+
+    try:
+        if sampler is not None:
+            sampler.start()
+        if profiler is not None:
+            profiler.enable()
+        start = time.perf_counter()
+        result = func()
+        duration = time.perf_counter() - start
+    finally:
+        try:
+            _stop(profiler=profiler, sampler=sampler)
+        finally:
+            _profiling_lock.release()
+
+    return result, duration, *_write(profiler=profiler, sampler=sampler, directory=directory, name=name)
+
+
+async def aprofile_call(func: Callable[[], Awaitable], modes: tuple[str, ...], directory: Path, name: str,
+                        interval: float) -> tuple:
+    """
+    Method to await a coroutine function under cProfile and/or the sampling profiler, see profile_call.
+    Both profilers watch the thread of the event loop: cProfile also counts the other tasks run by the loop
+    during the awaits, the sampler only keeps the stacks of this call, and neither sees the synchronous
+    code run in threads by sync_to_async, such as the queries of the async ORM.
+    Args:
+        func (Callable[[], Awaitable]): The coroutine function to await, without arguments.
+        modes (tuple[str, ...]): The profilers to run, "cprofile" and/or "sample".
+        directory (Path): The directory of the profile files.
+        name (str): The name of the profile files, without extension.
+        interval (float): The sampling interval, in seconds.
+
+    Returns:
+        The same tuple as profile_call.
+
+    Raises:
+        ProfilerBusy: If another profile is running in the process, the coroutine function is not awaited.
+    """
+    if not _profiling_lock.acquire(blocking=False):
+        raise ProfilerBusy
+    profiler, sampler = _profilers(modes=modes, interval=interval)
+
+    try:
+        if sampler is not None:
+            sampler.start()
+        if profiler is not None:
+            profiler.enable()
+        start = time.perf_counter()
+        result = await func()
+        duration = time.perf_counter() - start
+    finally:
+        try:
+            _stop(profiler=profiler, sampler=sampler)
+        finally:
+            _profiling_lock.release()
+
+    paths = await sync_to_async(_write)(profiler=profiler, sampler=sampler, directory=directory, name=name)
+    return result, duration, *paths
+
+
+def _profilers(modes: tuple[str, ...], interval: float) -> tuple:
+    profiler = cProfile.Profile() if "cprofile" in modes else None
+    sampler = SamplingProfiler(interval=interval) if "sample" in modes else None
+    return profiler, sampler
+
+
+def _stop(profiler: cProfile.Profile | None, sampler: SamplingProfiler | None) -> None:
+    if profiler is not None:
+        profiler.disable()
+    if sampler is not None:
+        sampler.stop()
+
+
+def _write(profiler: cProfile.Profile | None, sampler: SamplingProfiler | None, directory: Path,
+           name: str) -> tuple[str, str]:
+    directory.mkdir(parents=True, exist_ok=True)
+    pstats_path = collapsed_path = ""
+    if profiler is not None:
+        pstats_path = str(directory / f"{name}.prof")
+        profiler.dump_stats(pstats_path)
+    if sampler is not None:
+        collapsed_path = str(directory / f"{name}.collapsed.txt")
+        Path(collapsed_path).write_text(sampler.collapsed(), encoding="utf-8")
+    return pstats_path, collapsed_path
+
+
+def top_functions(pstats_path: str, limit: int = 40) -> str:
+    """
+    Method to format the functions of a pstats file with the highest cumulative time.
+    Args:
+        pstats_path (str): The path of the pstats file.
+        limit (int): The number of functions.
+
+    Returns:
+        The table printed by pstats, or an empty string if the file is missing.
+    """
+    if not pstats_path or not os.path.exists(pstats_path):
+        return ""
+    output = io.StringIO()
+    pstats.Stats(pstats_path, stream=output).strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
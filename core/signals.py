@@ -0,0 +1,13 @@
+import os
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from core.models import RequestProfile
+
+
+@receiver(post_delete, sender=RequestProfile)
+def delete_profile_files(sender, instance, **kwargs):
+    for path in (instance.pstats_path, instance.collapsed_path):
+        if path and os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,302 @@
+import sys
+import tempfile
+import threading
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import metrics
+from core.models import RequestProfile
+from core.profiling import ProfilerBusy, profile_call, top_functions
+from feed.tests import TEST_CACHES
+
+User = get_user_model()
+
+
+@override_settings(CACHES=TEST_CACHES, FEED_PAGE_CACHE=False)
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="Litreview-2026")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=60 * 1000)
+    def test_server_timing(self):
+        with self.assertNoLogs("core.middleware"):
+            response = self.client.get(reverse("feed:feed"))
+
+        timing = dict(metric.split(";", 1) for metric in response["Server-Timing"].split(", "))
+        self.assertEqual(set(timing), {"db", "tpl", "view", "total"})
+        self.assertRegex(timing["db"], r'^dur=[\d.]+;desc="[1-9]\d* queries"$')
+        self.assertNotEqual(timing["tpl"], "dur=0.00")
+
+    async def test_server_timing_asgi(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse("feed:feed"))
+
+        timing = dict(metric.split(";", 1) for metric in response["Server-Timing"].split(", "))
+        self.assertRegex(timing["db"], r'^dur=[\d.]+;desc="[1-9]\d* queries"$')
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0)
+    def test_slow_request_log(self):
+        with self.assertLogs("core.middleware", level="WARNING") as logs:
+            self.client.get(reverse("feed:posts"))
+
+        record = logs.records[0].performance
+        self.assertEqual((record["method"], record["path"], record["status"]), ("GET", "/feed/posts/", 200))
+        self.assertGreater(record["db_queries"], 0)
+
+    @override_settings(PERFORMANCE_TIMING=False)
+    def test_disabled(self):
+        response = self.client.get(reverse("feed:feed"))
+
+        self.assertNotIn("Server-Timing", response)
+
+
+@override_settings(CACHES=TEST_CACHES, FEED_PAGE_CACHE=False, PERFORMANCE_METRICS=True)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="Litreview-2026")
+        cls.staff = User.objects.create_user(username="staff", password="Litreview-2026", is_staff=True)
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_staff_only(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_metrics(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("feed:feed"))
+        self.client.get(reverse("feed:feed"))
+        self.client.get("/feed/unknown/")
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        text = response.content.decode()
+        self.assertRegex(text, r'litreview_requests_total\{pid="\d+",view="feed:feed",method="GET",status="200"\} 2\n')
+        self.assertIn('view="<unresolved>",method="GET",status="404"} 1\n', text)
+        self.assertRegex(text,
+                         r'litreview_request_duration_seconds_bucket\{pid="\d+",view="feed:feed",le="\+Inf"\} 2\n')
+        self.assertRegex(text, r'litreview_request_db_queries_count\{pid="\d+",view="feed:feed"\} 2\n')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="Litreview-2026")
+        cls.staff = User.objects.create_user(username="staff", password="Litreview-2026", is_staff=True)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings_override = override_settings(PROFILING_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_profile(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse("feed:feed"))
+
+        response = self.client.get(reverse("feed:feed"), {"profile": "1"})
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response["X-Profile-Id"], str(profile.pk))
+        self.assertNotEqual(response.get("X-Feed-Cache"), "hit")
+        self.assertEqual((profile.view_name, profile.status, profile.user), ("feed:feed", 200, self.staff))
+        self.assertGreater(profile.db_queries, 0)
+        self.assertIn("feed_index", top_functions(pstats_path=profile.pstats_path, limit=200))
+        self.assertTrue(Path(profile.collapsed_path).exists())
+
+        profile.delete()
+
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    async def test_profile_asgi(self):
+        await self.async_client.aforce_login(self.staff)
+
+        response = await self.async_client.get(reverse("feed:posts"), {"profile": "cprofile"})
+
+        profile = await RequestProfile.objects.aget()
+        self.assertEqual(response["X-Profile-Id"], str(profile.pk))
+        self.assertEqual((profile.view_name, profile.status, profile.user_id), ("feed:posts", 200, self.staff.pk))
+        self.assertTrue(Path(profile.pstats_path).exists())
+
+    def test_header_and_mode(self):
+        self.client.force_login(self.staff)
+
+        self.client.get(reverse("feed:posts"), headers={"X-Profile": "cprofile"})
+
+        profile = RequestProfile.objects.get()
+        self.assertTrue(profile.pstats_path)
+        self.assertEqual(profile.collapsed_path, "")
+
+    def test_staff_only(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("feed:feed"), {"profile": "1"})
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_overlapping_profile(self):
+        self.client.force_login(self.staff)
+        switch_interval = sys.getswitchinterval()
+        responses = []
+
+        def request():
+            self.assertNotEqual(sys.getswitchinterval(), switch_interval)
+            responses.append(self.client.get(reverse("feed:feed"), {"profile": "1"}))
+
+        profile_call(func=request, modes=("cprofile", "sample"), directory=self.directory, name="outer",
+                     interval=0.001)
+
+        self.assertEqual(responses[0].status_code, 200)
+        self.assertEqual(responses[0]["X-Profile"], "busy")
+        self.assertNotIn("X-Profile-Id", responses[0])
+        self.assertFalse(RequestProfile.objects.exists())
+        self.assertEqual(sys.getswitchinterval(), switch_interval)
+        self.assertNotIn("sampling-profiler", [thread.name for thread in threading.enumerate()])
+
+    def test_profile_after_error(self):
+        def fail():
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            profile_call(func=fail, modes=("cprofile", "sample"), directory=self.directory, name="error",
+                         interval=0.001)
+
+        result, *_ = profile_call(func=lambda: 1, modes=("cprofile", "sample"), directory=self.directory,
+                                  name="next", interval=0.001)
+        self.assertEqual(result, 1)
+
+    def test_profiler_busy(self):
+        with self.assertRaises(ProfilerBusy):
+            profile_call(func=lambda: profile_call(func=lambda: None, modes=("cprofile",), directory=self.directory,
+                                                   name="inner", interval=0.001),
+                         modes=("cprofile",), directory=self.directory, name="outer", interval=0.001)
+
+        self.assertFalse(list(self.directory.iterdir()))
+
+
+@skipUnless(connection.vendor == "sqlite", "the SQLite settings are checked on SQLite only")
+class SQLiteConcurrencyTests(SimpleTestCase):
+    """
+    Connections opened with the SQLite settings of the project on a database file: the readers and the writer
+    do not block each other, and the transactions reading then writing are serialized instead of failing.
+    """
+    alias = "concurrency"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        with closing(self.connect(name="db.sqlite3")) as database, database.cursor() as cursor:
+            cursor.execute("CREATE TABLE post (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+            cursor.executemany("INSERT INTO post (value) VALUES (%s)", [(0,)] * 10)
+
+    def connect(self, name: str, **options) -> BaseDatabaseWrapper:
+        settings_dict = {**connection.settings_dict, "NAME": str(self.directory / name)}
+        settings_dict["OPTIONS"] = {**settings_dict["OPTIONS"], **options}
+        return connections[DEFAULT_DB_ALIAS].__class__(settings_dict, alias=self.alias)
+
+    @contextmanager
+    def atomic(self, database: BaseDatabaseWrapper):
+        # atomic() begins the transaction with the transaction mode of the settings
+        connections[self.alias] = database
+        try:
+            with transaction.atomic(using=self.alias), database.cursor() as cursor:
+                yield cursor
+        finally:
+            del connections[self.alias]
+
+    def test_pragmas(self):
+        expected = {pragma: str(value).lower() for pragma, value in settings.SQLITE_PRAGMAS.items()}
+        expected.update({"synchronous": "1", "temp_store": "2", "busy_timeout": "20000"})
+        with closing(self.connect(name="db.sqlite3")) as database, database.cursor() as cursor:
+            for pragma, value in expected.items():
+                cursor.execute(f"PRAGMA {pragma}")
+                self.assertEqual(str(cursor.fetchone()[0]).lower(), value, pragma)
+
+    def test_reader_and_writer(self):
+        with closing(self.connect(name="db.sqlite3")) as reader, closing(self.connect(name="db.sqlite3")) as writer:
+            # a read in progress, which keeps its snapshot of the database until its last row is fetched
+            cursor = reader.cursor()
+            cursor.execute("SELECT value FROM post")
+            cursor.fetchone()
+
+            start = time.perf_counter()
+            with self.atomic(database=writer) as writer_cursor:
+                writer_cursor.execute("INSERT INTO post (value) VALUES (1)")
+            self.assertLess(time.perf_counter() - start, 1)
+            self.assertEqual(len(cursor.fetchall()), 9)
+            cursor.close()
+
+    def test_reader_blocks_writer_without_wal(self):
+        # the same read and write with the former rollback journal
+        options = {"init_command": "PRAGMA journal_mode = DELETE", "timeout": 0.2}
+        with closing(self.connect(name="journal.sqlite3", **options)) as reader, \
+                closing(self.connect(name="journal.sqlite3", **options)) as writer:
+            with writer.cursor() as cursor:
+                cursor.execute("CREATE TABLE post (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+                cursor.executemany("INSERT INTO post (value) VALUES (%s)", [(0,)] * 10)
+            cursor = reader.cursor()
+            cursor.execute("SELECT value FROM post")
+            cursor.fetchone()
+
+            with self.assertRaisesMessage(OperationalError, "database is locked"):
+                with self.atomic(database=writer) as writer_cursor:
+                    writer_cursor.execute("INSERT INTO post (value) VALUES (1)")
+            cursor.close()
+
+    def test_concurrent_writers(self):
+        threads, transactions = 8, 10
+        barrier = threading.Barrier(threads)
+        errors = []
+
+        def increment():
+            database = self.connect(name="db.sqlite3")
+            try:
+                barrier.wait()
+                for _ in range(transactions):
+                    # read then write: with deferred transactions, two of them holding the same snapshot
+                    # could not both write, and the second one would fail at once
+                    with self.atomic(database=database) as cursor:
+                        cursor.execute("SELECT max(value) FROM post")
+                        cursor.execute("INSERT INTO post (value) VALUES (%s)", [cursor.fetchone()[0] + 1])
+            except Exception as error:
+                errors.append(error)
+            finally:
+                database.close()
+
+        workers = [threading.Thread(target=increment) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        with closing(self.connect(name="db.sqlite3")) as database, database.cursor() as cursor:
+            cursor.execute("SELECT count(DISTINCT value), max(value) FROM post WHERE value > 0")
+            self.assertEqual(cursor.fetchone(), (threads * transactions, threads * transactions))
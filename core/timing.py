@@ -0,0 +1,124 @@
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.jinja2 import Jinja2
+
+
+class RequestTimings:
+    """
+    Time spent by a request in the database, in the templates and in the view, in seconds.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = 0.0
+        self.view_start: float | None = None
+        self.view = 0.0
+        self.db_queries = 0
+        self.db = 0.0
+        self.templates = 0.0
+
+    def finish(self) -> None:
+        """
+        Method to stop the clocks of the request and of the view, once the response is returned.
+        """
+        end = time.perf_counter()
+        self.total = end - self.start
+        if self.view_start is not None:
+            self.view = end - self.view_start
+
+    def as_dict(self) -> dict:
+        """
+        Method to get the timings in milliseconds.
+        Returns:
+            A dict with the total, view, database and template times and the number of queries.
+        """
+        return {
+            "total_ms": round(self.total * 1000, 2),
+            "view_ms": round(self.view * 1000, 2),
+            "db_ms": round(self.db * 1000, 2),
+            "db_queries": self.db_queries,
+            "template_ms": round(self.templates * 1000, 2),
+        }
+
+    def server_timing(self) -> str:
+        """
+        Method to format the timings as a Server-Timing header, displayed by the browser developer tools.
+        Returns:
+            The value of the header.
+        """
+        return ", ".join([
+            f'db;dur={self.db * 1000:.2f};desc="{self.db_queries} queries"',
+            f"tpl;dur={self.templates * 1000:.2f}",
+            f"view;dur={self.view * 1000:.2f}",
+            f"total;dur={self.total * 1000:.2f}",
+        ])
+
+
+# timings of the request handled in the current thread or task, None outside PerformanceMiddleware
+current_timings: ContextVar[RequestTimings | None] = ContextVar("current_timings", default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding the time of each query to the timings of the current request.
+    """
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.db_queries += 1
+
+
+class TimedTemplate:
+    """
+    Template of TimedDjangoTemplates and TimedJinja2, adding its render time to the timings of the current request.
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timings = current_timings.get()
+        if timings is None:
+            return self.template.render(context=context, request=request)
+
+        start = time.perf_counter()
+        try:
+            return self.template.render(context=context, request=request)
+        finally:
+            timings.templates += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Django template backend measuring the render time of the templates.
+    The templates included by a template are rendered inside it, so they are not counted twice.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class TimedJinja2(Jinja2):
+    """
+    Jinja2 template backend measuring the render time of the templates, like TimedDjangoTemplates.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
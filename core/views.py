@@ -1,5 +1,11 @@
+import os
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
 
+from core.metrics import metrics as metrics_registry
+
 
 def index(request):
     """
@@ -11,3 +17,17 @@ def index(request):
         An HttpResponseRedirect to accounts application login page.
     """
     return redirect(to='../accounts/log_in/')
+
+
+@staff_member_required
+def metrics(request: HttpRequest) -> HttpResponse:
+    """
+    View function exporting the request metrics of this process in the Prometheus text format, for the staff only.
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+
+    Returns:
+        An HttpResponse with the metrics.
+    """
+    return HttpResponse(content=metrics_registry.render(pid=os.getpid()),
+                        content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
-from feed.models import Ticket, Review, UserFollows
+from feed.images import get_srcset
+from feed.models import FollowSuggestion, Ticket, Review, UserFollows
 
 
 class TicketAdmin(admin.ModelAdmin):
-    list_display = ('id', 'title', 'description', 'image_preview', 'user', 'time_created')
+    list_display = ('id', 'title', 'description', 'image_preview', 'user', 'review_count', 'rating_average',
+                    'time_created')
 
     def image_preview(self, obj):
         """
@@ -18,8 +20,9 @@ class TicketAdmin(admin.ModelAdmin):
         """
         if obj.image:
             return format_html(
-                '<img src="{}" style="max-height: 50px;" />',
-                obj.image.url
+                '<img src="{}" srcset="{}" sizes="50px" style="max-height: 50px;" />',
+                obj.image.url,
+                get_srcset(ticket=obj, webp=True),
             )
         return "—"
 
@@ -34,6 +37,12 @@ class UserFollowsAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'followed_user')
 
 
+class FollowSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'suggested_user', 'score', 'mutual_count', 'time_created')
+    list_select_related = ('user', 'suggested_user')
+
+
 admin.site.register(Ticket, TicketAdmin)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(UserFollows, UserFollowsAdmin)
+admin.site.register(FollowSuggestion, FollowSuggestionAdmin)
@@ -0,0 +1,133 @@
+"""
+Async versions of the read-heavy feed views, served instead of the views of feed.views when
+FEED_ASYNC_VIEWS is set, which litreview/asgi.py does. They read the database with the async ORM
+and await the queries that do not depend on each other together, so that an ASGI worker keeps
+serving other requests while they run. The templates are still rendered in a thread, as the
+template engine and the lazy attributes of the request are synchronous.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import AbstractUser
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import render
+
+from feed import views
+from feed.engine import FeedPosts, TimelinePosts, alist
+from feed.follow_graph import get_followed_ids
+from feed.models import Review, Ticket, UserFollows
+from feed.page_cache import cache_feed_page
+from feed.pagination import CursorPage, CursorPaginator
+
+
+@login_required
+@cache_feed_page
+async def feed_index(request: HttpRequest) -> HttpResponse:
+    """
+    View function for displaying the feed page with tickets and reviews from all the followed users.
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+
+    Returns:
+        An HttpResponse with the feed page.
+    """
+    user = await get_user(request=request)
+    if settings.FEED_FANOUT == "write":
+        feed_posts = TimelinePosts(owner=user, viewer=user)
+    else:
+        # kept on the user instance, so the viewable posts below read it without a query
+        await sync_to_async(get_followed_ids)(user=user)
+        feed_posts = FeedPosts(tickets=views.get_users_viewable_tickets(user=user),
+                               reviews=views.get_users_viewable_reviews(user=user),
+                               viewer=user)
+
+    page_obj = await paginate_posts(request=request, posts=feed_posts)
+    context = {'page_obj': page_obj}
+
+    return await sync_to_async(render)(request=request, template_name='feed/index.html', context=context,
+                                       using=settings.FEED_TEMPLATE_ENGINE)
+
+
+@login_required
+@cache_feed_page
+async def posts(request: HttpRequest) -> HttpResponse:
+    """
+    View function for displaying the posts page of the current user with tickets and reviews.
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+
+    Returns:
+        An HttpResponse with the posts page.
+    """
+    user = await get_user(request=request)
+    postspage_posts = FeedPosts(tickets=Ticket.objects.filter(user=user),
+                                reviews=Review.objects.filter(user=user))
+
+    page_obj = await paginate_posts(request=request, posts=postspage_posts)
+    context = {'page_obj': page_obj}
+
+    return await sync_to_async(render)(request=request, template_name='feed/posts.html', context=context,
+                                       using=settings.FEED_TEMPLATE_ENGINE)
+
+
+@login_required
+async def follow_user(request: HttpRequest) -> HttpResponse:
+    """
+    View function for displaying followed people and followers.
+    The form is handled by the sync view.
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+
+    Returns:
+        An HttpResponseRedirect to the subscribers page after adding people to follow or
+        An HttpResponse of the follow page with the form to add people and all the followed people and followers.
+    """
+    user = await get_user(request=request)
+    if request.method == "POST":
+        return await sync_to_async(views.follow_user)(request)
+
+    following, followed_by, suggestions = await asyncio.gather(
+        alist(UserFollows.objects.filter(user=user).select_related("followed_user")),
+        alist(UserFollows.objects.filter(followed_user=user).select_related("user")),
+        alist(views.get_follow_suggestions(user=user)),
+    )
+    follow_form = views.FollowUsersForm(user=user)
+
+    return await sync_to_async(render)(request=request,
+                                       template_name="feed/followers.html",
+                                       context={"follow_form": follow_form, "following": following,
+                                                "followed_by": followed_by, "suggestions": suggestions})
+
+
+async def get_user(request: HttpRequest) -> AbstractUser:
+    """
+    Method to get the logged-in user in an async view.
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+
+    Returns:
+        The user, also set as `request.user` so that the templates do not load it a second time.
+    """
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+async def paginate_posts(request: HttpRequest, posts: FeedPosts) -> CursorPage:
+    """
+    Method for getting the requested page of posts, with the pagination mode set in the settings.
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+        posts (FeedPosts): The posts to paginate.
+
+    Returns:
+        A CursorPage when FEED_PAGINATION is "cursor", else a Page built by the sync paginator.
+    """
+    if settings.FEED_PAGINATION == "cursor":
+        paginator = CursorPaginator(object_list=posts, per_page=5, count_pages=settings.FEED_PAGINATION_COUNT)
+        return await paginator.aget_page(cursor=request.GET.get('cursor'))
+
+    # Django's AsyncPage is not usable by the synchronous templates, the sync paginator loads the page in a thread
+    return await sync_to_async(views.paginate_posts)(request=request, posts=posts)
@@ -0,0 +1,34 @@
+from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.models import AbstractUser
+
+from feed.models import Ticket, Review
+
+OWNER_PERMISSIONS = {
+    "feed.change_ticket": Ticket,
+    "feed.delete_ticket": Ticket,
+    "feed.change_review": Review,
+    "feed.delete_review": Review,
+}
+
+
+class OwnershipBackend(BaseBackend):
+    """
+    Authorization backend granting the change and delete permissions on a ticket or a review to its author.
+    The permission is derived from the object itself, so no permission row is stored or loaded.
+    """
+
+    def has_perm(self, user_obj: AbstractUser, perm: str, obj=None) -> bool:
+        """
+        Method to check if a user owns the object of an owner permission.
+        Args:
+            user_obj (AbstractUser): The user to check.
+            perm (str): The permission, as "app_label.codename".
+            obj (Ticket | Review | None): The object the permission is checked on.
+
+        Returns:
+            A boolean indicating if the user is the author of the object.
+        """
+        model = OWNER_PERMISSIONS.get(perm)
+        if model is None or not isinstance(obj, model) or not user_obj.is_active:
+            return False
+        return obj.user_id == user_obj.pk
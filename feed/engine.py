@@ -0,0 +1,242 @@
+import asyncio
+from datetime import datetime
+
+from django.contrib.auth.models import AbstractUser
+from django.db import models
+from django.db.models import Q, QuerySet
+
+from feed.models import FeedEntry, Ticket, Review
+
+
+class FeedPosts:
+    """
+    Lazy, sliceable list of tickets and reviews ordered from the newest to the oldest post.
+
+    The merge of both tables, the ordering and the LIMIT/OFFSET all run inside the database
+    with a UNION ALL query, then only the tickets and reviews of the requested slice are loaded.
+    Every loaded post carries a `content_type` attribute ("Ticket" or "Review") so the templates
+    can tell them apart. When a viewer is given, every loaded ticket, including the ticket of
+    each review, also carries `user_has_reviewed`, computed in the same queries.
+    An instance can be handed to a Paginator as is.
+    """
+
+    def __init__(self, tickets: QuerySet[Ticket], reviews: QuerySet[Review], viewer: AbstractUser | None = None):
+        self.tickets = tickets
+        self.reviews = reviews
+        self.viewer = viewer
+
+    def rows(self, older_than: tuple | None = None, newer_than: tuple | None = None) -> QuerySet:
+        """
+        Method to build the UNION ALL query of the posts, without loading them.
+        Posts are ordered by their (time_created, content_type, id) position, so that a position
+        can be used as a keyset cursor.
+        Args:
+            older_than (tuple | None): Only keep the posts placed after this position in the feed.
+            newer_than (tuple | None): Only keep the posts placed before this position in the feed,
+                ordered from the oldest to the newest one.
+
+        Returns:
+            A QuerySet of dicts with the `content_type`, `post_id` and `time_created` of each post, newest first.
+        """
+        tickets = self.tickets.annotate(
+            content_type=models.Value(value="Ticket", output_field=models.CharField()),
+            post_id=models.F("id"),
+        ).values("content_type", "post_id", "time_created")
+
+        reviews = self.reviews.annotate(
+            content_type=models.Value(value="Review", output_field=models.CharField()),
+            post_id=models.F("id"),
+        ).values("content_type", "post_id", "time_created")
+
+        ordering = ("-time_created", "-content_type", "-post_id")
+
+        if older_than is not None:
+            tickets = tickets.filter(keyset_filter(content_type="Ticket", position=older_than, older=True))
+            reviews = reviews.filter(keyset_filter(content_type="Review", position=older_than, older=True))
+        elif newer_than is not None:
+            tickets = tickets.filter(keyset_filter(content_type="Ticket", position=newer_than, older=False))
+            reviews = reviews.filter(keyset_filter(content_type="Review", position=newer_than, older=False))
+            ordering = ("time_created", "content_type", "post_id")
+
+        return tickets.union(reviews, all=True).order_by(*ordering)
+
+    def count(self) -> int:
+        """
+        Method to count the posts in the database.
+        Returns:
+            The number of tickets and reviews.
+        """
+        return self.rows().count()
+
+    async def acount(self) -> int:
+        return await self.rows().acount()
+
+    def __getitem__(self, item: slice) -> list:
+        if not isinstance(item, slice):
+            raise TypeError("FeedPosts only supports slicing.")
+        return self.load(rows=self.rows()[item])
+
+    def load(self, rows) -> list:
+        """
+        Method to load the tickets and reviews of the given rows, keeping their order.
+        Args:
+            rows (Iterable[dict]): The `content_type` and `post_id` of the posts to load.
+
+        Returns:
+            A list of Ticket and Review instances annotated with their `content_type`.
+        """
+        rows = list(rows)
+        tickets, reviews = self.post_querysets(rows=rows)
+        return self.merge(rows=rows, tickets=tickets if tickets is not None else [],
+                          reviews=reviews if reviews is not None else [])
+
+    async def aload(self, rows: list[dict]) -> list:
+        """
+        Method to load the tickets and reviews of the given rows, keeping their order, with the async ORM.
+        The ticket and review queries do not depend on each other, so they are awaited together.
+        Args:
+            rows (list[dict]): The `content_type` and `post_id` of the posts to load.
+
+        Returns:
+            A list of Ticket and Review instances annotated with their `content_type`.
+        """
+        tickets, reviews = self.post_querysets(rows=rows)
+        tickets, reviews = await asyncio.gather(alist(tickets), alist(reviews))
+        return self.merge(rows=rows, tickets=tickets, reviews=reviews)
+
+    def post_querysets(self, rows: list[dict]) -> tuple[QuerySet | None, QuerySet | None]:
+        """
+        Method to build the queries of the tickets and of the reviews of the given rows.
+        Args:
+            rows (list[dict]): The `content_type` and `post_id` of the posts to load.
+
+        Returns:
+            A tuple with the tickets and reviews QuerySets, None when the rows have no post of that type.
+        """
+        ticket_ids = [row["post_id"] for row in rows if row["content_type"] == "Ticket"]
+        review_ids = [row["post_id"] for row in rows if row["content_type"] == "Review"]
+
+        tickets = self.tickets.filter(id__in=ticket_ids).select_related("user") if ticket_ids else None
+        reviews = self.reviews.filter(id__in=review_ids).select_related("user", "ticket__user") if review_ids else None
+        if self.viewer is not None:
+            tickets = tickets.with_user_has_reviewed(user=self.viewer) if tickets is not None else None
+            reviews = reviews.with_user_has_reviewed(user=self.viewer) if reviews is not None else None
+        return tickets, reviews
+
+    def merge(self, rows: list[dict], tickets, reviews) -> list:
+        """
+        Method to put the loaded tickets and reviews in the order of the rows.
+        Args:
+            rows (list[dict]): The `content_type` and `post_id` of the posts, in the feed order.
+            tickets (Iterable[Ticket]): The loaded tickets.
+            reviews (Iterable[Review]): The loaded reviews.
+
+        Returns:
+            A list of Ticket and Review instances annotated with their `content_type`.
+        """
+        loaded = {}
+        for ticket in tickets:
+            ticket.content_type = "Ticket"
+            loaded[("Ticket", ticket.id)] = ticket
+        for review in reviews:
+            review.content_type = "Review"
+            if self.viewer is not None:
+                review.ticket.user_has_reviewed = review.ticket_user_has_reviewed
+            loaded[("Review", review.id)] = review
+
+        return [loaded[key] for key in ((row["content_type"], row["post_id"]) for row in rows) if key in loaded]
+
+
+class TimelinePosts(FeedPosts):
+    """
+    Feed posts read from the materialized timeline of a user (FeedEntry rows fanned out on write)
+    instead of the UNION ALL query over the posts of the followed users.
+    """
+
+    def __init__(self, owner: AbstractUser, viewer: AbstractUser | None = None):
+        super().__init__(tickets=Ticket.objects.all(), reviews=Review.objects.all(), viewer=viewer)
+        self.owner = owner
+
+    def rows(self, older_than: tuple | None = None, newer_than: tuple | None = None) -> QuerySet:
+        """
+        Method to build the query of the timeline entries, without loading them.
+        Args:
+            older_than (tuple | None): Only keep the posts placed after this position in the feed.
+            newer_than (tuple | None): Only keep the posts placed before this position in the feed,
+                ordered from the oldest to the newest one.
+
+        Returns:
+            A QuerySet of dicts with the `content_type`, `post_id` and `time_created` of each post, newest first.
+        """
+        entries = FeedEntry.objects.filter(owner=self.owner)
+        ordering = ("-time_created", "-post_type", "-post_id")
+
+        if older_than is not None:
+            entries = entries.filter(timeline_keyset_filter(position=older_than, older=True))
+        elif newer_than is not None:
+            entries = entries.filter(timeline_keyset_filter(position=newer_than, older=False))
+            ordering = ("time_created", "post_type", "post_id")
+
+        return entries.order_by(*ordering).values("post_id", "time_created", content_type=models.F("post_type"))
+
+    def count(self) -> int:
+        return FeedEntry.objects.filter(owner=self.owner).count()
+
+    async def acount(self) -> int:
+        return await FeedEntry.objects.filter(owner=self.owner).acount()
+
+
+def keyset_filter(content_type: str, position: tuple[datetime, str, int], older: bool) -> Q:
+    """
+    Method to build the filter keeping the posts of one type placed after or before a position in the feed.
+    As the content type is the same for every row of a table, the comparison on the
+    (time_created, content_type, id) tuple reduces to a filter on time_created and id.
+    Args:
+        content_type (str): The content type of the filtered table ("Ticket" or "Review").
+        position (tuple[datetime, str, int]): The (time_created, content_type, id) position to compare with.
+        older (bool): True to keep the older posts, False to keep the newer ones.
+
+    Returns:
+        A Q object to filter the table with.
+    """
+    time_created, position_content_type, position_id = position
+    lookup = "lt" if older else "gt"
+
+    strictly = Q(**{f"time_created__{lookup}": time_created})
+    if content_type == position_content_type:
+        return strictly | Q(time_created=time_created, **{f"id__{lookup}": position_id})
+    if (content_type < position_content_type) == older:
+        return strictly | Q(time_created=time_created)
+    return strictly
+
+
+def timeline_keyset_filter(position: tuple[datetime, str, int], older: bool) -> Q:
+    """
+    Method to build the filter keeping the timeline entries placed after or before a position in the feed.
+    Args:
+        position (tuple[datetime, str, int]): The (time_created, content_type, id) position to compare with.
+        older (bool): True to keep the older entries, False to keep the newer ones.
+
+    Returns:
+        A Q object to filter the timeline entries with.
+    """
+    time_created, content_type, post_id = position
+    lookup = "lt" if older else "gt"
+
+    return (Q(**{f"time_created__{lookup}": time_created})
+            | Q(time_created=time_created, **{f"post_type__{lookup}": content_type})
+            | Q(time_created=time_created, post_type=content_type, **{f"post_id__{lookup}": post_id}))
+
+
+async def alist(queryset: QuerySet | None) -> list:
+    """
+    Method to evaluate a QuerySet with the async ORM.
+    Args:
+        queryset (QuerySet | None): The QuerySet, or None for no query.
+
+    Returns:
+        A list with the objects of the QuerySet, empty for None.
+    """
+    if queryset is None:
+        return []
+    return [obj async for obj in queryset]
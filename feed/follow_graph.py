@@ -0,0 +1,101 @@
+from collections import defaultdict
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser
+from django.core.cache import caches, BaseCache
+
+from feed.models import UserFollows
+
+FOLLOWING_KEY = "follows:following:{user_id}"
+FOLLOWERS_KEY = "follows:followers:{user_id}"
+
+
+def get_graph_cache() -> BaseCache:
+    return caches[settings.FOLLOW_GRAPH_CACHE_ALIAS]
+
+
+def get_followed_ids(user: AbstractUser | int) -> frozenset[int]:
+    """
+    Method to get the IDs of the users followed by a user.
+    The set is read from the cache, then kept on the user instance so that it is fetched at most once per request.
+    Args:
+        user (AbstractUser | int): The user or its ID.
+
+    Returns:
+        A frozenset with the IDs of the followed users.
+    """
+    return _get_ids(user=user, key=FOLLOWING_KEY, attribute="_followed_ids",
+                    field="user_id", values="followed_user_id")
+
+
+def get_follower_ids(user: AbstractUser | int) -> frozenset[int]:
+    """
+    Method to get the IDs of the users following a user.
+    The set is read from the cache, then kept on the user instance so that it is fetched at most once per request.
+    Args:
+        user (AbstractUser | int): The user or its ID.
+
+    Returns:
+        A frozenset with the IDs of the followers.
+    """
+    return _get_ids(user=user, key=FOLLOWERS_KEY, attribute="_follower_ids",
+                    field="followed_user_id", values="user_id")
+
+
+def get_many_follower_ids(user_ids: Iterable[int]) -> dict[int, frozenset[int]]:
+    """
+    Method to get the IDs of the followers of several users, with one query for all the sets missing from the cache.
+    Args:
+        user_ids (Iterable[int]): The IDs of the users.
+
+    Returns:
+        A dict with the frozenset of the IDs of the followers of each user.
+    """
+    cache = get_graph_cache()
+    keys = {FOLLOWERS_KEY.format(user_id=user_id): user_id for user_id in user_ids}
+
+    follower_ids = {keys[key]: ids for key, ids in cache.get_many(keys).items()}
+    missing = [user_id for user_id in keys.values() if user_id not in follower_ids]
+    if missing:
+        found = defaultdict(set)
+        for followed_user_id, user_id in (UserFollows.objects.filter(followed_user_id__in=missing)
+                                          .values_list("followed_user_id", "user_id")):
+            found[followed_user_id].add(user_id)
+        fetched = {user_id: frozenset(found[user_id]) for user_id in missing}
+        cache.set_many({FOLLOWERS_KEY.format(user_id=user_id): ids for user_id, ids in fetched.items()},
+                       timeout=settings.FOLLOW_GRAPH_CACHE_TIMEOUT)
+        follower_ids.update(fetched)
+    return follower_ids
+
+
+def invalidate_follow(user_id: int, followed_user_id: int) -> None:
+    """
+    Method to drop the cached sets changed by a follow being created or deleted.
+    Args:
+        user_id (int): The ID of the follower.
+        followed_user_id (int): The ID of the followed user.
+    """
+    get_graph_cache().delete_many([FOLLOWING_KEY.format(user_id=user_id),
+                                   FOLLOWERS_KEY.format(user_id=followed_user_id)])
+
+
+def _get_ids(user: AbstractUser | int, key: str, attribute: str, field: str, values: str) -> frozenset[int]:
+    if isinstance(user, int):
+        user_id, instance = user, None
+    else:
+        user_id, instance = user.pk, user
+        if attribute in instance.__dict__:
+            return instance.__dict__[attribute]
+
+    cache = get_graph_cache()
+    key = key.format(user_id=user_id)
+
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(UserFollows.objects.filter(**{field: user_id}).values_list(values, flat=True))
+        cache.set(key, ids, timeout=settings.FOLLOW_GRAPH_CACHE_TIMEOUT)
+
+    if instance is not None:
+        instance.__dict__[attribute] = ids
+    return ids
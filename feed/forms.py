@@ -2,7 +2,8 @@ from django import forms
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 
-from feed.models import Ticket, Review, UserFollows
+from feed.follow_graph import get_followed_ids
+from feed.models import Ticket, Review
 
 
 User = get_user_model()
@@ -41,6 +42,8 @@ class FollowUsersForm(forms.Form):
                                    "class": "form-input",
                                    "id": "form-input",
                                    "onkeyup": "processChange()",
+                                   "list": "username-suggestions",
+                                   "autocomplete": "off",
                                }),
                                required=True,)
 
@@ -64,7 +67,7 @@ class FollowUsersForm(forms.Form):
         if followed_user == self.user:
             raise ValidationError(message="❌ Vous ne pouvez pas vous suivre vous-même.")
 
-        if UserFollows.objects.filter(user=self.user, followed_user=followed_user).exists():
+        if followed_user.pk in get_followed_ids(user=self.user):
             raise ValidationError(message="❌ Vous suivez déjà cet utilisateur.")
 
         self.followed_user = followed_user
@@ -0,0 +1,191 @@
+import io
+import posixpath
+from typing import Collection
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from feed.models import Review, Ticket
+from feed.page_cache import invalidate_pages
+from jobs.queue import task
+
+# formats the renditions keep, any other format is converted to JPEG
+KEPT_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+
+
+def rendition_name(name: str, width: int, extension: str) -> str:
+    """
+    Method to build the name of a rendition, stored next to its original image.
+    Args:
+        name (str): The name of the original image in the storage.
+        width (int): The width of the rendition.
+        extension (str): The extension of the rendition format.
+
+    Returns:
+        The name of the rendition, like "cover.320w.webp" for "cover.jpg".
+    """
+    stem = posixpath.splitext(name)[0]
+    return f"{stem}.{width}w.{extension}"
+
+
+def rendition_names(renditions: dict) -> list[str]:
+    """
+    Method to list the files of the renditions of an image, the original image excluded.
+    Args:
+        renditions (dict): The description of the renditions, as saved in `Ticket.image_renditions`.
+
+    Returns:
+        A list with the names of the renditions in the storage.
+    """
+    if not renditions.get("name"):
+        return []
+    name, extension = renditions["name"], renditions["extension"]
+    names = [rendition_name(name, width, rendition_extension)
+             for width in renditions["widths"] for rendition_extension in dict.fromkeys([extension, "webp"])]
+    if extension != "webp":
+        names.append(rendition_name(name, renditions["width"], "webp"))
+    return names
+
+
+def delete_renditions(renditions: dict, keep: Collection[str] = ()) -> None:
+    """
+    Method to delete the files of the renditions of an image, when the image is replaced or its ticket deleted.
+    Args:
+        renditions (dict): The description of the renditions, as saved in `Ticket.image_renditions`.
+        keep (Collection[str]): Names of files not to delete, the renditions of the new image.
+    """
+    storage = Ticket._meta.get_field("image").storage
+    for name in rendition_names(renditions=renditions):
+        if name not in keep:
+            storage.delete(name)
+
+
+def get_srcset(ticket: Ticket, webp: bool = False) -> str:
+    """
+    Method to build the srcset attribute of the image of a ticket from its renditions.
+    Args:
+        ticket (Ticket): The ticket.
+        webp (bool): True for the WebP renditions, False for the renditions in the original format.
+
+    Returns:
+        The srcset attribute, or an empty string if the renditions are not generated.
+    """
+    renditions = ticket.image_renditions
+    if not ticket.image or renditions.get("name") != ticket.image.name or not renditions.get("widths"):
+        return ""
+
+    storage = ticket.image.storage
+    extension = "webp" if webp else renditions["extension"]
+    candidates = [(rendition_name(ticket.image.name, width, extension), width) for width in renditions["widths"]]
+
+    if extension == renditions["extension"]:
+        candidates.append((ticket.image.name, renditions["width"]))
+    else:
+        # WebP copy of the original size
+        candidates.append((rendition_name(ticket.image.name, renditions["width"], "webp"), renditions["width"]))
+
+    return ", ".join(f"{storage.url(name)} {width}w" for name, width in candidates)
+
+
+def generate_renditions(ticket: Ticket) -> dict:
+    """
+    Method to generate the resized renditions of the image of a ticket, in the original format and in WebP.
+    Only the widths smaller than the original image are generated, plus a WebP copy of the original size.
+    The description of the renditions is saved in `Ticket.image_renditions`, and the files of the former
+    renditions that are not overwritten, those of a replaced or removed image, are deleted.
+    Args:
+        ticket (Ticket): The ticket whose image is resized.
+
+    Returns:
+        The description of the renditions: name, width and extension of the original image and generated widths.
+    """
+    previous = ticket.image_renditions
+    if not ticket.image:
+        renditions = {}
+        _save_renditions(ticket=ticket, renditions=renditions)
+        delete_renditions(renditions=previous)
+        return renditions
+
+    storage = ticket.image.storage
+    with storage.open(ticket.image.name, "rb") as file:
+        original = Image.open(file)
+        original_format = original.format
+        original = ImageOps.exif_transpose(original)
+        original.load()
+    if original.mode not in ("RGB", "RGBA", "L", "LA"):
+        original = original.convert("RGBA")
+
+    extension = KEPT_FORMATS.get(original_format, "jpg")
+    formats = {extension: _pil_format(extension), "webp": "WEBP"}
+
+    widths = [width for width in sorted(settings.TICKET_IMAGE_WIDTHS) if width < original.width]
+    for width in widths:
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.Resampling.LANCZOS)
+        for rendition_extension, pil_format in formats.items():
+            _save(storage=storage, name=rendition_name(ticket.image.name, width, rendition_extension),
+                  image=resized, pil_format=pil_format)
+
+    if extension != "webp":
+        _save(storage=storage, name=rendition_name(ticket.image.name, original.width, "webp"),
+              image=original, pil_format="WEBP")
+
+    renditions = {"name": ticket.image.name, "width": original.width, "extension": extension, "widths": widths}
+    _save_renditions(ticket=ticket, renditions=renditions)
+    delete_renditions(renditions=previous, keep=rendition_names(renditions=renditions))
+    return renditions
+
+
+@task
+def generate_ticket_renditions(ticket_id: int, force: bool = False) -> bool:
+    """
+    Method to generate the renditions of a ticket image from its ID, usable in a worker process or a background job.
+    The renditions of a removed image are deleted.
+    Args:
+        ticket_id (int): The ID of the ticket.
+        force (bool): Generate the renditions even if they are up to date.
+
+    Returns:
+        A boolean indicating if renditions were generated.
+    """
+    ticket = Ticket.objects.filter(pk=ticket_id).first()
+    if ticket is None:
+        return False
+    if not ticket.image:
+        if ticket.image_renditions:
+            generate_renditions(ticket=ticket)
+        return False
+    if not force and ticket.image_renditions.get("name") == ticket.image.name:
+        return False
+    generate_renditions(ticket=ticket)
+    return True
+
+
+def _save_renditions(ticket: Ticket, renditions: dict) -> None:
+    # the srcset of the ticket changes, its cached template fragments are keyed on `time_updated`
+    ticket.image_renditions = renditions
+    ticket.time_updated = timezone.now()
+    Ticket.objects.filter(pk=ticket.pk).update(image_renditions=renditions, time_updated=ticket.time_updated)
+
+    # the update sends no signal: the pages showing the ticket are invalidated like in feed.signals,
+    # the ones of its author and of the authors of the reviews answering it
+    invalidate_pages(author_ids={ticket.user_id, *Review.objects.filter(ticket_id=ticket.pk)
+                                 .values_list("user_id", flat=True)})
+
+
+def _pil_format(extension: str) -> str:
+    return {value: key for key, value in KEPT_FORMATS.items()}[extension]
+
+
+def _save(storage, name: str, image: Image.Image, pil_format: str) -> None:
+    if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=pil_format, quality=settings.TICKET_IMAGE_QUALITY, optimize=True)
+
+    # keep the exact name, which the srcset is built from
+    storage.delete(name)
+    storage.save(name, ContentFile(buffer.getvalue()))
@@ -0,0 +1,165 @@
+import json
+import platform
+import random
+import statistics
+import time
+import uuid
+from contextlib import nullcontext
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from feed.management.commands.seed_litreview import WORDS
+from feed.models import Review, Ticket, UserFollows
+
+User = get_user_model()
+
+ENDPOINTS = ("feed", "posts", "follows", "search", "create-ticket", "create-review")
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks the feed, posts, follows and post creation pages through the Django test client, "
+            "and reports their latency percentiles, throughput and query counts as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS),
+                            help="Endpoints to benchmark (all by default).")
+        parser.add_argument("--requests", type=int, default=100, help="Number of measured requests per endpoint.")
+        parser.add_argument("--warmup", type=int, default=5,
+                            help="Number of unmeasured requests per endpoint run first.")
+        parser.add_argument("--users", type=int, default=20,
+                            help="Number of random users the requests are spread over.")
+        parser.add_argument("--no-page-cache", action="store_true", help="Disable the feed page cache during the run.")
+        parser.add_argument("--host", default="localhost", help="Host header of the requests.")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of the standard output.")
+        parser.add_argument("--seed", type=int, default=None, help="Seed of the random generator, for repeatable runs.")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["users"] < 1 or options["warmup"] < 0:
+            raise CommandError("--requests and --users must be positive numbers, --warmup must not be negative.")
+
+        rng = random.Random(options["seed"])
+        user_ids = list(User.objects.values_list("id", flat=True))
+        if not user_ids:
+            raise CommandError("The database has no user, run `manage.py seed_litreview` first.")
+        users = list(User.objects.filter(id__in=rng.sample(user_ids, min(options["users"], len(user_ids)))))
+
+        # the settings are restored once the run is over
+        page_cache = override_settings(FEED_PAGE_CACHE=False) if options["no_page_cache"] else nullcontext()
+        with page_cache:
+            clients = []
+            for user in users:
+                client = Client(HTTP_HOST=options["host"])
+                client.force_login(user)
+                clients.append(client)
+
+            # the posts created by the benchmark are deleted at the end, they are found by this marker
+            self.marker = f"benchmark-{uuid.uuid4().hex[:12]}"
+            # the searched words are the ones of the seeded posts
+            self.random = rng
+            results = {}
+            try:
+                for endpoint in options["endpoints"]:
+                    for _ in range(options["warmup"]):
+                        self.request(client=rng.choice(clients), endpoint=endpoint)
+                    samples = [self.request(client=rng.choice(clients), endpoint=endpoint)
+                               for _ in range(options["requests"])]
+                    results[endpoint] = summarize(samples=samples)
+            finally:
+                Ticket.objects.filter(title=self.marker).delete()
+
+            report = {
+                "time": timezone.now().isoformat(),
+                "environment": {
+                    "python": platform.python_version(),
+                    "django": django.get_version(),
+                    "database": connection.vendor,
+                    "feed_fanout": settings.FEED_FANOUT,
+                    "feed_pagination": settings.FEED_PAGINATION,
+                    "feed_page_cache": settings.FEED_PAGE_CACHE,
+                },
+                "dataset": {
+                    "users": len(user_ids),
+                    "follows": UserFollows.objects.count(),
+                    "tickets": Ticket.objects.count(),
+                    "reviews": Review.objects.count(),
+                },
+                "options": {key: options[key] for key in ("requests", "warmup", "users", "seed")},
+                "endpoints": results,
+            }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}."))
+        else:
+            self.stdout.write(output)
+
+    def request(self, client: Client, endpoint: str) -> tuple[float, int, int]:
+        """
+        Method to send one request to an endpoint and measure it.
+        Args:
+            client (Client): The test client of a logged-in user.
+            endpoint (str): The name of the endpoint.
+
+        Returns:
+            A tuple with the duration in seconds, the number of SQL queries and the status code.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            if endpoint == "create-ticket":
+                response = client.post(reverse("feed:create-ticket"),
+                                       {"title": self.marker, "description": "Benchmark"})
+            elif endpoint == "create-review":
+                response = client.post(reverse("feed:create-review"),
+                                       {"title": self.marker, "description": "Benchmark",
+                                        "headline": "Benchmark", "rating": 3, "body": "Benchmark"})
+            elif endpoint == "search":
+                response = client.get(reverse("feed:search"), {"q": self.random.choice(WORDS)})
+            else:
+                response = client.get(reverse(f"feed:{endpoint}"))
+            duration = time.perf_counter() - start
+        return duration, len(queries), response.status_code
+
+
+def summarize(samples: list[tuple[float, int, int]]) -> dict:
+    """
+    Method to compute the statistics of the measured requests of an endpoint.
+    Args:
+        samples (list[tuple[float, int, int]]): The duration, number of queries and status code of each request.
+
+    Returns:
+        A dict with the latency percentiles and mean in milliseconds, the throughput in requests per second,
+        the query counts and the number of errors.
+    """
+    durations = [duration * 1000 for duration, _, _ in samples]
+    query_counts = [queries for _, queries, _ in samples]
+    # with a single sample, every percentile is that sample
+    percentiles = statistics.quantiles(durations, n=100, method="inclusive") if len(durations) > 1 else durations * 99
+
+    return {
+        "requests": len(samples),
+        "errors": sum(status >= 400 for _, _, status in samples),
+        "latency_ms": {
+            "p50": round(percentiles[49], 3),
+            "p95": round(percentiles[94], 3),
+            "p99": round(percentiles[98], 3),
+            "mean": round(statistics.fmean(durations), 3),
+            "min": round(min(durations), 3),
+            "max": round(max(durations), 3),
+        },
+        "throughput_rps": round(len(durations) / (sum(durations) / 1000), 2),
+        "queries": {
+            "mean": round(statistics.fmean(query_counts), 2),
+            "min": min(query_counts),
+            "max": max(query_counts),
+        },
+    }
@@ -0,0 +1,116 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.template import engines
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from feed import views
+from feed.engine import FeedPosts
+from feed.management.commands.benchmark_litreview import summarize
+from feed.models import Review, Ticket
+from feed.pagination import CursorPaginator
+from litreview.jinja2 import get_fragment_cache
+
+User = get_user_model()
+
+ENGINES = ("django", "jinja2")
+# template of each benchmarked page
+PAGES = {"feed": "feed/index.html", "posts": "feed/posts.html"}
+
+
+class Command(BaseCommand):
+    help = ("Renders the feed and posts templates of a user with the Django and the Jinja2 engines, "
+            "on the same loaded page of posts, and reports their render time percentiles as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", help="User whose pages are rendered, the user following the most users "
+                                               "by default.")
+        parser.add_argument("--per-page", type=int, default=5, help="Number of posts of the rendered pages.")
+        parser.add_argument("--renders", type=int, default=200, help="Number of measured renders per template.")
+        parser.add_argument("--warmup", type=int, default=10, help="Number of unmeasured renders run first.")
+        parser.add_argument("--warm-fragments", action="store_true",
+                            help="Keep the cached post fragments between the renders, instead of rendering "
+                                 "every post each time.")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of the standard output.")
+
+    def handle(self, *args, **options):
+        if options["renders"] < 1 or options["per_page"] < 1 or options["warmup"] < 0:
+            raise CommandError("--renders and --per-page must be positive numbers, --warmup must not be negative.")
+
+        users = User.objects.all()
+        if options["username"]:
+            user = users.filter(username=options["username"]).first()
+        else:
+            user = users.annotate(followings=Count("following")).order_by("-followings", "pk").first()
+        if user is None:
+            raise CommandError("No user to render the pages of, run `manage.py seed_litreview` first.")
+
+        request = RequestFactory().get(reverse("feed:feed"))
+        request.user = user
+        # the same loaded page of posts is rendered by both engines, the renders run no query
+        pages = {
+            "feed": FeedPosts(tickets=views.get_users_viewable_tickets(user=user),
+                              reviews=views.get_users_viewable_reviews(user=user), viewer=user),
+            "posts": FeedPosts(tickets=Ticket.objects.filter(user=user), reviews=Review.objects.filter(user=user)),
+        }
+        contexts = {
+            page: {"page_obj": CursorPaginator(object_list=posts, per_page=options["per_page"]).get_page(cursor=None)}
+            for page, posts in pages.items()
+        }
+
+        results = {}
+        for page, template_name in PAGES.items():
+            results[page] = {}
+            for engine in ENGINES:
+                template = engines[engine].get_template(template_name)
+                for _ in range(options["warmup"]):
+                    self.render(template=template, context=contexts[page], request=request, options=options)
+                samples = [self.render(template=template, context=contexts[page], request=request, options=options)
+                           for _ in range(options["renders"])]
+                results[page][engine] = summarize(samples=samples)
+            results[page]["speedup"] = round(
+                results[page]["django"]["latency_ms"]["p50"] / results[page]["jinja2"]["latency_ms"]["p50"], 2)
+
+        report = {
+            "time": timezone.now().isoformat(),
+            "user": user.username,
+            "posts": {page: len(context["page_obj"]) for page, context in contexts.items()},
+            "options": {key: options[key] for key in ("per_page", "renders", "warmup", "warm_fragments")},
+            "pages": results,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}."))
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def render(template, context: dict, request, options: dict) -> tuple[float, int, int]:
+        """
+        Method to render a template once and measure it.
+        Args:
+            template: The template of the Django or the Jinja2 backend.
+            context (dict): The context of the template.
+            request (HttpRequest): The request of the logged-in user.
+            options (dict): The options of the command.
+
+        Returns:
+            A tuple with the duration in seconds, the number of SQL queries and a 200 status, as summarize() expects.
+        """
+        if not options["warm_fragments"]:
+            get_fragment_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            template.render(context=context, request=request)
+            duration = time.perf_counter() - start
+        return duration, len(queries), 200
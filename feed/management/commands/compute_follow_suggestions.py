@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feed.recommendations import compute_follow_suggestions
+from jobs.queue import enqueue
+
+
+class Command(BaseCommand):
+    help = "Computes the follow suggestions of every user from the follows and reviews, with NumPy and SciPy."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000,
+                            help="Number of users scored at once, which bounds the memory used.")
+        parser.add_argument("--enqueue", action="store_true",
+                            help="Queue the computation as a background job instead of running it now.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive number.")
+
+        if options["enqueue"]:
+            enqueue(compute_follow_suggestions, batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS("Follow suggestions queued."))
+            return
+
+        start = time.perf_counter()
+        try:
+            saved = compute_follow_suggestions(batch_size=options["batch_size"])
+        except ImportError as error:
+            raise CommandError(f"{error}: install the recommendations extra, with numpy and scipy.") from error
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{saved} follow suggestions saved in {time.perf_counter() - start:.2f} s."
+        ))
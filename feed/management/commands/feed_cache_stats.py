@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from feed.page_cache import get_cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Reports the hit and miss counts of the feed page cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counts after reporting them.")
+
+    def handle(self, *args, **options):
+        stats = get_cache_stats()
+        total = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / total if total else 0
+
+        self.stdout.write(f"hits: {stats['hits']}")
+        self.stdout.write(f"misses: {stats['misses']}")
+        self.stdout.write(f"hit ratio: {ratio:.1%}")
+
+        if options["reset"]:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Counts reset."))
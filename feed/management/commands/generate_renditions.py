@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from feed.images import generate_ticket_renditions
+from feed.models import Ticket
+
+
+def setup_worker():
+    """
+    Initializes Django in a worker process, which has no database connection of its own yet.
+    """
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Generates the resized renditions of the existing ticket images, in parallel across a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                            help="Number of worker processes (the number of CPUs by default), "
+                                 "1 to generate the renditions in this process.")
+        parser.add_argument("--force", action="store_true",
+                            help="Regenerate the renditions that are already up to date.")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers must be a positive number.")
+
+        ticket_ids = list(Ticket.objects.exclude(image="").exclude(image__isnull=True)
+                          .order_by("id").values_list("id", flat=True))
+
+        generated = failed = 0
+        if options["workers"] == 1:
+            for ticket_id in ticket_ids:
+                try:
+                    generated += generate_ticket_renditions(ticket_id, options["force"])
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f"Ticket {ticket_id}: {error}")
+        else:
+            # the workers must not inherit the connection of this process
+            connections.close_all()
+
+            with ProcessPoolExecutor(max_workers=options["workers"], initializer=setup_worker) as executor:
+                futures = {executor.submit(generate_ticket_renditions, ticket_id, options["force"]): ticket_id
+                           for ticket_id in ticket_ids}
+                for future in as_completed(futures):
+                    try:
+                        generated += future.result()
+                    except Exception as error:
+                        failed += 1
+                        self.stderr.write(f"Ticket {futures[future]}: {error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Renditions generated for {generated} of {len(ticket_ids)} ticket images ({failed} failed)."
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from feed.search import optimize_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index of the tickets and reviews (feed_post_search) from their tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--optimize", action="store_true",
+                            help="Only merge the segments of the index, without rebuilding it.")
+
+    def handle(self, *args, **options):
+        if options["optimize"]:
+            optimize_search_index()
+            self.stdout.write(self.style.SUCCESS("Search index optimized."))
+            return
+
+        indexed = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"{indexed} posts indexed."))
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from feed.timeline import rebuild_timelines
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the materialized feed timelines (FeedEntry) from the tickets, reviews and follows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("usernames", nargs="*",
+                            help="Only rebuild the timelines of these users (all users by default).")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Number of timelines rebuilt in each transaction.")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by("id")
+        if options["usernames"]:
+            users = users.filter(username__in=options["usernames"])
+            missing = set(options["usernames"]) - set(users.values_list("username", flat=True))
+            if missing:
+                raise CommandError(f"Unknown users: {', '.join(sorted(missing))}")
+
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive number.")
+
+        user_ids = list(users.values_list("id", flat=True))
+        created = 0
+        for start in range(0, len(user_ids), batch_size):
+            created += rebuild_timelines(owner_ids=user_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{created} timeline entries rebuilt for {len(user_ids)} users."
+        ))
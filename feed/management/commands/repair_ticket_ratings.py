@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from feed.ratings import repair_ticket_ratings
+
+
+class Command(BaseCommand):
+    help = ("Computes the review count, rating sum, average and distribution of the tickets again from their reviews, "
+            "and fixes the ones that differ.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("ticket_ids", nargs="*", type=int,
+                            help="Only check these tickets (all tickets by default).")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Number of tickets checked with each query.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only count the wrong tickets, without fixing them.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive number.")
+
+        repaired = repair_ticket_ratings(ticket_ids=options["ticket_ids"] or None, batch_size=options["batch_size"],
+                                         dry_run=options["dry_run"])
+
+        if options["dry_run"]:
+            self.stdout.write(f"{repaired} tickets have a wrong rating rollup.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{repaired} tickets repaired."))
@@ -0,0 +1,199 @@
+import itertools
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from feed.models import Review, Ticket, UserFollows
+from feed.ratings import repair_ticket_ratings
+from feed.timeline import rebuild_timelines
+
+User = get_user_model()
+
+WORDS = ("livre", "roman", "essai", "article", "histoire", "poésie", "science", "voyage", "guerre", "paix",
+         "amour", "mémoire", "nuit", "mer", "ville", "temps", "monde", "siècle", "secret", "jardin")
+
+
+class Command(BaseCommand):
+    help = ("Generates synthetic users, follows, tickets and reviews to reproduce a production-scale database. "
+            "The number of followers of the users follows a power law.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Number of users created.")
+        parser.add_argument("--follows", type=int, default=20,
+                            help="Average number of users followed by each created user.")
+        parser.add_argument("--tickets", type=int, default=5000, help="Number of tickets created.")
+        parser.add_argument("--reviews", type=int, default=5000,
+                            help="Number of reviews created, answering random tickets.")
+        parser.add_argument("--alpha", type=float, default=1.2,
+                            help="Exponent of the power law of the followers (higher is more skewed).")
+        parser.add_argument("--days", type=int, default=365,
+                            help="The posts are spread over this number of days before now.")
+        parser.add_argument("--prefix", default="seed", help="Prefix of the created usernames.")
+        parser.add_argument("--password", default="password", help="Password of the created users.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Number of rows inserted per query.")
+        parser.add_argument("--seed", type=int, default=None, help="Seed of the random generator, for repeatable runs.")
+
+    def handle(self, *args, **options):
+        for option in ("users", "batch_size", "days"):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be a positive number.")
+        for option in ("follows", "tickets", "reviews"):
+            if options[option] < 0:
+                raise CommandError(f"--{option} must not be negative.")
+
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.days = options["days"]
+
+        with transaction.atomic():
+            user_ids = self.create_users(count=options["users"], prefix=options["prefix"],
+                                         password=options["password"])
+            follows = self.create_follows(user_ids=user_ids, average=options["follows"], alpha=options["alpha"])
+            ticket_ids = self.create_tickets(user_ids=user_ids, count=options["tickets"])
+            reviews = self.create_reviews(user_ids=user_ids, ticket_ids=ticket_ids, count=options["reviews"])
+            # bulk_create sends no signal, so the rating rollups of the tickets are computed in one go
+            repair_ticket_ratings(batch_size=self.batch_size)
+
+        if settings.FEED_FANOUT == "write":
+            # bulk_create sends no signal, so the timelines are filled in one go
+            for start in range(0, len(user_ids), self.batch_size):
+                rebuild_timelines(owner_ids=user_ids[start:start + self.batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(user_ids)} users, {follows} follows, {len(ticket_ids)} tickets and {reviews} reviews created."
+        ))
+
+    def create_users(self, count: int, prefix: str, password: str) -> list[int]:
+        """
+        Method to create the users, all with the same password, hashed once.
+        Args:
+            count (int): The number of users.
+            prefix (str): The prefix of the usernames, followed by a number.
+            password (str): The password of the users.
+
+        Returns:
+            A list with the IDs of the created users.
+        """
+        max_length = User._meta.get_field("username").max_length
+        # after the highest number taken, the former seeds may have been partly deleted or renamed
+        suffixes = (username[len(prefix):] for username
+                    in User.objects.filter(username__startswith=prefix).values_list("username", flat=True).iterator())
+        start = max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0)
+        if len(f"{prefix}{start + count}") > max_length:
+            raise CommandError(f"The usernames would be longer than {max_length} characters, use a shorter --prefix.")
+
+        hashed_password = make_password(password)
+        usernames = [f"{prefix}{number}" for number in range(start + 1, start + count + 1)]
+        return self.bulk_create(User, (User(username=username, password=hashed_password) for username in usernames),
+                                returning_ids=True)
+
+    def create_follows(self, user_ids: list[int], average: int, alpha: float) -> int:
+        """
+        Method to make each user follow a random number of users, chosen with a probability following a power law
+        of their popularity rank: a few users have many followers, most users have a few.
+        Args:
+            user_ids (list[int]): The IDs of the users.
+            average (int): The average number of users followed by each user.
+            alpha (float): The exponent of the power law.
+
+        Returns:
+            The number of follows created.
+        """
+        if average == 0 or len(user_ids) < 2:
+            return 0
+
+        ranked_ids = self.random.sample(user_ids, len(user_ids))
+        cum_weights = list(itertools.accumulate(1 / rank ** alpha for rank in range(1, len(ranked_ids) + 1)))
+
+        def follows():
+            for user_id in user_ids:
+                wanted = min(self.random.randint(0, 2 * average), len(user_ids) - 1)
+                followed_ids = set()
+                # the most popular users are drawn again and again, so the draws are capped
+                for _ in range(4):
+                    draws = self.random.choices(ranked_ids, cum_weights=cum_weights, k=wanted - len(followed_ids))
+                    followed_ids.update(draw for draw in draws if draw != user_id)
+                    if len(followed_ids) >= wanted:
+                        break
+                for followed_user_id in followed_ids:
+                    yield UserFollows(user_id=user_id, followed_user_id=followed_user_id)
+
+        return self.bulk_create(UserFollows, follows())
+
+    def create_tickets(self, user_ids: list[int], count: int) -> list[int]:
+        """
+        Method to create tickets of random users.
+        Args:
+            user_ids (list[int]): The IDs of the users.
+            count (int): The number of tickets.
+
+        Returns:
+            A list with the IDs of the created tickets.
+        """
+        tickets = (Ticket(title=self.sentence(words=4), description=self.sentence(words=30),
+                          user_id=self.random.choice(user_ids)) for _ in range(count))
+        return self.bulk_create(Ticket, tickets, returning_ids=True)
+
+    def create_reviews(self, user_ids: list[int], ticket_ids: list[int], count: int) -> int:
+        """
+        Method to create reviews of random users answering random tickets, one review per user and ticket at most.
+        Args:
+            user_ids (list[int]): The IDs of the users.
+            ticket_ids (list[int]): The IDs of the tickets.
+            count (int): The number of reviews.
+
+        Returns:
+            The number of reviews created.
+        """
+        if not ticket_ids:
+            return 0
+        count = min(count, len(user_ids) * len(ticket_ids))
+
+        def reviews():
+            reviewed = set()
+            while len(reviewed) < count:
+                pair = (self.random.choice(ticket_ids), self.random.choice(user_ids))
+                if pair in reviewed:
+                    continue
+                reviewed.add(pair)
+                yield Review(ticket_id=pair[0], user_id=pair[1], rating=self.random.randint(0, 5),
+                             headline=self.sentence(words=5), body=self.sentence(words=60))
+
+        return self.bulk_create(Review, reviews())
+
+    def bulk_create(self, model, objects, returning_ids: bool = False) -> int | list[int]:
+        """
+        Method to insert objects in batches, with creation dates spread over the configured number of days.
+        Args:
+            model: The model of the objects.
+            objects: An iterable of unsaved objects.
+            returning_ids (bool): Return the IDs of the created objects instead of their number.
+
+        Returns:
+            The number of created objects, or a list with their IDs.
+        """
+        created = []
+        total = 0
+        has_date = any(field.name == "time_created" for field in model._meta.concrete_fields)
+        objects = iter(objects)
+        while batch := list(itertools.islice(objects, self.batch_size)):
+            batch = model.objects.bulk_create(batch)
+            if has_date:
+                # auto_now_add sets the current date on insert, the spread dates are set afterwards
+                for instance in batch:
+                    instance.time_created = self.now - timedelta(seconds=self.random.uniform(0, self.days * 86400))
+                model.objects.bulk_update(batch, ["time_created"])
+            total += len(batch)
+            if returning_ids:
+                created.extend(instance.pk for instance in batch)
+        return created if returning_ids else total
+
+    def sentence(self, words: int) -> str:
+        return " ".join(self.random.choices(WORDS, k=words)).capitalize()
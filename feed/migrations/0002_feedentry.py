@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 07:00
+# flake8: noqa
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_type', models.CharField(choices=[('Ticket', 'Ticket'), ('Review', 'Review')], max_length=6)),
+                ('post_id', models.PositiveBigIntegerField()),
+                ('time_created', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', '-time_created', '-post_type', '-post_id'], name='feed_entry_timeline_idx'), models.Index(fields=['owner', 'author'], name='feed_entry_owner_author_idx'), models.Index(fields=['post_type', 'post_id'], name='feed_entry_post_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'post_type', 'post_id'), name='feed_entry_unique_post')],
+            },
+        ),
+    ]
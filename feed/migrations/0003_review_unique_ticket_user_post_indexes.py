@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 07:04
+# flake8: noqa
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def delete_duplicate_reviews(apps, schema_editor):
+    """
+    Keeps the first review of each user on each ticket, so that the unique constraint can be created.
+    """
+    Review = apps.get_model('feed', 'Review')
+    duplicates = (Review.objects.values('ticket', 'user')
+                  .annotate(first_id=models.Min('id'), count=models.Count('id'))
+                  .filter(count__gt=1))
+    for duplicate in duplicates:
+        (Review.objects.filter(ticket=duplicate['ticket'], user=duplicate['user'])
+         .exclude(id=duplicate['first_id']).delete())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0002_feedentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', '-time_created'], name='review_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['user', '-time_created'], name='ticket_user_time_idx'),
+        ),
+        migrations.RunPython(delete_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('ticket', 'user'), name='review_unique_ticket_user'),
+        ),
+    ]
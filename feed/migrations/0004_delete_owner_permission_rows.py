@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 07:06
+# flake8: noqa
+from django.conf import settings
+from django.db import migrations
+
+OWNER_CODENAMES = ['change_ticket', 'delete_ticket', 'change_review', 'delete_review']
+
+
+def delete_owner_permission_rows(apps, schema_editor):
+    """
+    Deletes the permission rows the views used to grant to every author: ownership now grants them.
+    Rows of staff members are kept, as they may have been granted through the admin.
+    """
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    User.user_permissions.through.objects.filter(
+        permission__content_type__app_label='feed',
+        permission__codename__in=OWNER_CODENAMES,
+        user__is_staff=False,
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('feed', '0003_review_unique_ticket_user_post_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_owner_permission_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 07:07
+# flake8: noqa
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0004_delete_owner_permission_rows'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
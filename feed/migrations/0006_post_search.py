@@ -0,0 +1,86 @@
+# Generated by Django 6.0 on 2026-10-18 08:12
+# flake8: noqa
+
+from django.db import migrations
+
+# one row per post, see feed.search: the rowid is twice the ID of a ticket, twice the ID of a review plus one.
+# unicode61 with remove_diacritics matches "critique" with "critiqué", the prefix indexes speed up the last word.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE feed_post_search USING fts5(
+        title, headline, body, user_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    "INSERT INTO feed_post_search (feed_post_search, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')",
+    """
+    CREATE TRIGGER feed_post_search_ticket_insert AFTER INSERT ON feed_ticket BEGIN
+        INSERT INTO feed_post_search (rowid, title, headline, body, user_id)
+        VALUES (new.id * 2, new.title, '', new.description, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER feed_post_search_ticket_update AFTER UPDATE ON feed_ticket
+    WHEN old.title IS NOT new.title OR old.description IS NOT new.description OR old.user_id IS NOT new.user_id
+    BEGIN
+        UPDATE feed_post_search SET title = new.title, body = new.description, user_id = new.user_id
+        WHERE rowid = new.id * 2;
+        UPDATE feed_post_search SET title = new.title
+        WHERE rowid IN (SELECT id * 2 + 1 FROM feed_review WHERE ticket_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER feed_post_search_ticket_delete AFTER DELETE ON feed_ticket BEGIN
+        DELETE FROM feed_post_search WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER feed_post_search_review_insert AFTER INSERT ON feed_review BEGIN
+        INSERT INTO feed_post_search (rowid, title, headline, body, user_id)
+        VALUES (new.id * 2 + 1, (SELECT title FROM feed_ticket WHERE id = new.ticket_id),
+                new.headline, new.body, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER feed_post_search_review_update AFTER UPDATE ON feed_review
+    WHEN old.headline IS NOT new.headline OR old.body IS NOT new.body OR old.user_id IS NOT new.user_id
+        OR old.ticket_id IS NOT new.ticket_id
+    BEGIN
+        UPDATE feed_post_search SET title = (SELECT title FROM feed_ticket WHERE id = new.ticket_id),
+            headline = new.headline, body = new.body, user_id = new.user_id
+        WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER feed_post_search_review_delete AFTER DELETE ON feed_review BEGIN
+        DELETE FROM feed_post_search WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    # the posts published before the migration
+    "INSERT INTO feed_post_search (rowid, title, headline, body, user_id) "
+    "SELECT id * 2, title, '', description, user_id FROM feed_ticket",
+    "INSERT INTO feed_post_search (rowid, title, headline, body, user_id) "
+    "SELECT review.id * 2 + 1, ticket.title, review.headline, review.body, review.user_id "
+    "FROM feed_review AS review INNER JOIN feed_ticket AS ticket ON ticket.id = review.ticket_id",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER feed_post_search_review_delete",
+    "DROP TRIGGER feed_post_search_review_update",
+    "DROP TRIGGER feed_post_search_review_insert",
+    "DROP TRIGGER feed_post_search_ticket_delete",
+    "DROP TRIGGER feed_post_search_ticket_update",
+    "DROP TRIGGER feed_post_search_ticket_insert",
+    "DROP TABLE feed_post_search",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0005_ticket_image_renditions'),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=CREATE_SQL, reverse_sql=DROP_SQL),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 6.0 on 2026-10-18 07:59
+# flake8: noqa
+
+from django.conf import settings
+from django.db import migrations, models
+
+from feed.search_schema import CREATE_TRIGGERS_SQL, DROP_TRIGGERS_SQL
+
+# the rollup of the reviews published before the migration, see feed.ratings
+FILL_ROLLUP_SQL = """
+    UPDATE feed_ticket SET
+        review_count = (SELECT count(*) FROM feed_review WHERE ticket_id = feed_ticket.id),
+        rating_sum = (SELECT coalesce(sum(rating), 0) FROM feed_review WHERE ticket_id = feed_ticket.id),
+        rating_average = (SELECT avg(rating) FROM feed_review WHERE ticket_id = feed_ticket.id),
+        {}
+""".format(",\n        ".join(
+    f"rating_{rating}_count = (SELECT count(*) FROM feed_review WHERE ticket_id = feed_ticket.id AND rating = {rating})"
+    for rating in range(6)
+))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0006_post_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # SQLite copies the ticket table to add the columns, which the search triggers would prevent
+        migrations.RunSQL(sql=DROP_TRIGGERS_SQL, reverse_sql=CREATE_TRIGGERS_SQL),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_0_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_average',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['-rating_average', '-review_count'], name='ticket_top_rated_idx'),
+        ),
+        migrations.RunSQL(sql=CREATE_TRIGGERS_SQL, reverse_sql=DROP_TRIGGERS_SQL),
+        migrations.RunSQL(sql=FILL_ROLLUP_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 08:03
+# flake8: noqa
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0007_ticket_rating_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('mutual_count', models.PositiveIntegerField(default=0)),
+                ('time_created', models.DateTimeField(auto_now_add=True)),
+                ('suggested_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-score'], name='follow_suggestion_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'suggested_user'), name='follow_suggestion_unique_user')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 08:10
+# flake8: noqa
+
+from django.db import migrations, models
+
+from feed.search_schema import CREATE_TRIGGERS_SQL, DROP_TRIGGERS_SQL
+
+# the posts published before the migration were not changed since
+FILL_SQL = [
+    "UPDATE feed_ticket SET time_updated = time_created",
+    "UPDATE feed_review SET time_updated = time_created",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0008_followsuggestion'),
+    ]
+
+    operations = [
+        # SQLite copies the ticket and review tables to add the columns, which the search triggers would prevent
+        migrations.RunSQL(sql=DROP_TRIGGERS_SQL, reverse_sql=CREATE_TRIGGERS_SQL),
+        migrations.AddField(
+            model_name='review',
+            name='time_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='time_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunSQL(sql=CREATE_TRIGGERS_SQL, reverse_sql=DROP_TRIGGERS_SQL),
+        migrations.RunSQL(sql=FILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
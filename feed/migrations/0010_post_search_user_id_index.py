@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-18 09:40
+# flake8: noqa
+
+from django.db import migrations
+
+from feed.search_schema import CREATE_TRIGGERS_SQL, DROP_TRIGGERS_SQL, FILL_SQL
+
+# the user_id column is indexed, so that a search matches the authors viewable by the user before ranking the posts,
+# instead of ranking the posts of every author; its weight in the rank is 0
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE feed_post_search USING fts5(
+        title, headline, body, user_id,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    "INSERT INTO feed_post_search (feed_post_search, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0, 0.0)')",
+]
+
+# the table of the 0006 migration
+CREATE_UNINDEXED_SQL = [
+    """
+    CREATE VIRTUAL TABLE feed_post_search USING fts5(
+        title, headline, body, user_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    "INSERT INTO feed_post_search (feed_post_search, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')",
+]
+
+DROP_SQL = [*DROP_TRIGGERS_SQL, "DROP TABLE feed_post_search"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0009_ticket_review_time_updated'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[*DROP_SQL, *CREATE_SQL, *CREATE_TRIGGERS_SQL, *FILL_SQL],
+            reverse_sql=[*DROP_SQL, *CREATE_UNINDEXED_SQL, *CREATE_TRIGGERS_SQL, *FILL_SQL],
+        ),
+    ]
@@ -4,26 +4,95 @@ from django.conf import settings
 from django.db import models
 
 
+class TicketQuerySet(models.QuerySet):
+    def with_user_has_reviewed(self, user: AbstractUser) -> "TicketQuerySet":
+        """
+        Method to annotate each ticket with `user_has_reviewed`, computed in the same query with an EXISTS subquery.
+        Args:
+            user (AbstractUser): The user to check.
+
+        Returns:
+            The annotated QuerySet.
+        """
+        return self.annotate(user_has_reviewed=models.Exists(
+            Review.objects.filter(ticket=models.OuterRef("pk"), user=user)
+        ))
+
+
+class ReviewQuerySet(models.QuerySet):
+    def with_user_has_reviewed(self, user: AbstractUser) -> "ReviewQuerySet":
+        """
+        Method to annotate each review with `ticket_user_has_reviewed`, telling whether the user
+        has a review for the ticket of the review, computed in the same query with an EXISTS subquery.
+        Args:
+            user (AbstractUser): The user to check.
+
+        Returns:
+            The annotated QuerySet.
+        """
+        return self.annotate(ticket_user_has_reviewed=models.Exists(
+            Review.objects.filter(ticket=models.OuterRef("ticket"), user=user)
+        ))
+
+
 class Ticket(models.Model):
     title = models.CharField(max_length=128)
     description = models.TextField(max_length=2048, blank=True)
     user = models.ForeignKey(to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     image = models.ImageField(null=True, blank=True)
+    # resized renditions of the image, see feed.images
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     time_created = models.DateTimeField(auto_now_add=True)
+    # last change of the displayed ticket, which also keys its cached template fragments
+    time_updated = models.DateTimeField(auto_now=True)
+    # rollup of the ratings of the reviews, updated with each review, see feed.ratings
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_average = models.FloatField(null=True, blank=True, editable=False)
+    rating_0_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # the rollup fields, written by the UPDATE queries of feed.ratings only
+    ROLLUP_FIELDS = ("review_count", "rating_sum", "rating_average", *(f"rating_{rating}_count" for rating in range(6)))
+
+    objects = TicketQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # posts of the followed users, newest first
+            models.Index(fields=['user', '-time_created'], name='ticket_user_time_idx'),
+            # top rated books, see feed.views.top_rated
+            models.Index(fields=['-rating_average', '-review_count'], name='ticket_top_rated_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
-    def has_user_review(self, user: AbstractUser) -> bool:
+    def save(self, **kwargs):
         """
-        Method to determine if a user has a review for this ticket.
-        Args:
-            user (User): The user to check.
+        Method to save the ticket, without the rollup fields when it exists, unless they are in `update_fields`:
+        the reviews may have changed them since the ticket was loaded, by the form of a view or the admin.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.name not in self.ROLLUP_FIELDS
+            ]
+        super().save(**kwargs)
 
+    @property
+    def rating_distribution(self) -> list[tuple[int, int]]:
+        """
+        Method to get the number of reviews of the ticket for each rating, from the best to the worst one.
         Returns:
-            A boolean indicating if the user has a review for this ticket.
+            A list of (rating, number of reviews) tuples.
         """
-        return self.review_set.filter(user=user).exists()
+        return [(rating, getattr(self, f"rating_{rating}_count")) for rating in range(5, -1, -1)]
 
 
 class Review(models.Model):
@@ -34,6 +103,27 @@ class Review(models.Model):
     body = models.CharField(max_length=8192, blank=True)
     user = models.ForeignKey(to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     time_created = models.DateTimeField(auto_now_add=True)
+    # last change of the review, which also keys its cached template fragment
+    time_updated = models.DateTimeField(auto_now=True)
+
+    objects = ReviewQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        review = super().from_db(db, field_names, values)
+        # the rating and ticket as loaded, to update the rollup of the tickets when they change
+        review._loaded_rating = (review.__dict__.get("ticket_id"), review.__dict__.get("rating"))
+        return review
+
+    class Meta:
+        constraints = [
+            # a user reviews a ticket once at most
+            models.UniqueConstraint(fields=['ticket', 'user'], name='review_unique_ticket_user'),
+        ]
+        indexes = [
+            # posts of the followed users, newest first
+            models.Index(fields=['user', '-time_created'], name='review_user_time_idx'),
+        ]
 
     def __str__(self):
         return self.headline
@@ -49,3 +139,61 @@ class UserFollows(models.Model):
         # ensures we don't get multiple UserFollows instances
         # for unique user-user_followed pairs
         unique_together = ('user', 'followed_user', )
+
+
+class FeedEntry(models.Model):
+    """
+    Materialized timeline row: the post `post_type`/`post_id` of `author` is shown in the feed of `owner`.
+    Rows are fanned out on write when FEED_FANOUT is "write".
+    """
+    POST_TYPES = [("Ticket", "Ticket"), ("Review", "Review")]
+
+    owner = models.ForeignKey(to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                              related_name='feed_entries')
+    author = models.ForeignKey(to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                               related_name='+')
+    post_type = models.CharField(max_length=6, choices=POST_TYPES)
+    post_id = models.PositiveBigIntegerField()
+    time_created = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'post_type', 'post_id'], name='feed_entry_unique_post'),
+        ]
+        indexes = [
+            # reads the timeline of an owner in the (time_created, post_type, post_id) keyset order
+            models.Index(fields=['owner', '-time_created', '-post_type', '-post_id'], name='feed_entry_timeline_idx'),
+            # prunes the posts of an author on unfollow
+            models.Index(fields=['owner', 'author'], name='feed_entry_owner_author_idx'),
+            # removes a post from every timeline on delete
+            models.Index(fields=['post_type', 'post_id'], name='feed_entry_post_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_type} {self.post_id} → {self.owner_id}"
+
+
+class FollowSuggestion(models.Model):
+    """
+    User suggested to `user` on the follows page, computed in batch by feed.recommendations.
+    """
+    user = models.ForeignKey(to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                             related_name='follow_suggestions')
+    suggested_user = models.ForeignKey(to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                       related_name='+')
+    score = models.FloatField()
+    # followed users of `user` who follow the suggested user
+    mutual_count = models.PositiveIntegerField(default=0)
+    time_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'suggested_user'], name='follow_suggestion_unique_user'),
+        ]
+        indexes = [
+            # suggestions of the follows page, best first
+            models.Index(fields=['user', '-score'], name='follow_suggestion_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.suggested_user_id} → {self.user_id}"
@@ -0,0 +1,211 @@
+import hashlib
+import time
+import uuid
+from functools import wraps
+from typing import Callable, Iterable
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches, BaseCache
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from feed.follow_graph import get_many_follower_ids
+
+VERSION_KEY = "feed:version:{user_id}"
+PAGE_KEY = "feed:page:{user_id}:{version}:{path}"
+HITS_KEY = "feed:stats:hits"
+MISSES_KEY = "feed:stats:misses"
+
+
+def get_feed_cache() -> BaseCache:
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def get_feed_version(user_id: int) -> str:
+    """
+    Method to get the current version of the pages of a user.
+    A new version is created when the user has none yet.
+    Args:
+        user_id (int): The ID of the user.
+
+    Returns:
+        The version, as an opaque string.
+    """
+    cache = get_feed_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def new_version() -> str:
+    # the time of the version, in seconds, is the Last-Modified date of the pages
+    return f"{int(time.time())}.{uuid.uuid4().hex}"
+
+
+def get_version_time(version: str) -> int | None:
+    """
+    Method to get the time a version of the pages of a user was created at.
+    Args:
+        version (str): The version.
+
+    Returns:
+        The time as a timestamp in seconds, None for a version without time.
+    """
+    timestamp, _, _ = version.partition(".")
+    return int(timestamp) if timestamp.isdigit() else None
+
+
+def bump_feed_versions(user_ids: Iterable[int]) -> None:
+    """
+    Method to give a new version to the pages of some users, so that their cached pages are no longer used.
+    Args:
+        user_ids (Iterable[int]): The IDs of the users.
+    """
+    version = new_version()
+    get_feed_cache().set_many({VERSION_KEY.format(user_id=user_id): version for user_id in set(user_ids)},
+                              timeout=None)
+
+
+def invalidate_pages(author_ids: set[int]) -> None:
+    """
+    Method to invalidate, once the transaction is committed, the cached pages of some authors and of their followers.
+    Args:
+        author_ids (set[int]): The IDs of the authors.
+    """
+    user_ids = set(author_ids)
+    for follower_ids in get_many_follower_ids(user_ids=author_ids).values():
+        user_ids.update(follower_ids)
+    transaction.on_commit(lambda: bump_feed_versions(user_ids=user_ids))
+
+
+def get_cache_stats() -> dict[str, int]:
+    """
+    Method to get the hit and miss counts of the feed page cache, shared by all the worker processes.
+    Returns:
+        A dict with the `hits` and `misses` counts.
+    """
+    counts = get_feed_cache().get_many([HITS_KEY, MISSES_KEY])
+    return {"hits": counts.get(HITS_KEY, 0), "misses": counts.get(MISSES_KEY, 0)}
+
+
+def reset_cache_stats() -> None:
+    get_feed_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+def count(key: str) -> None:
+    cache = get_feed_cache()
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def cache_feed_page(view_func: Callable) -> Callable:
+    """
+    Decorator caching the rendered page of a view for each user and each version of the user's pages.
+    The page is rendered again only once a post or a follow relevant to the user has changed.
+    The version also validates the page for the conditional requests of the browsers: when the version and
+    the path match the ETag they send back, a 304 response is returned before the view runs any query.
+    Pages displaying flash messages and profiled requests are neither read from nor written to the cache.
+    Both sync and async views can be decorated.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _wrapped_async_view(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            user = await request.auser()
+            # the session, the messages and the file cache are read in a single thread switch
+            lookup = await sync_to_async(_lookup)(request=request, user_id=user.pk)
+            if lookup.response is not None:
+                return lookup.response
+
+            response = await view_func(request, *args, **kwargs)
+            await sync_to_async(_store)(lookup=lookup, response=response)
+            return response
+
+        return _wrapped_async_view
+
+    @wraps(view_func)
+    def _wrapped_view(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        lookup = _lookup(request=request, user_id=request.user.pk)
+        if lookup.response is not None:
+            return lookup.response
+
+        response = view_func(request, *args, **kwargs)
+        _store(lookup=lookup, response=response)
+        return response
+
+    return _wrapped_view
+
+
+class PageLookup:
+    """
+    Result of the lookup of a page before its view runs.
+    """
+
+    def __init__(self, key: str | None = None, etag: str | None = None, last_modified: int | None = None,
+                 response: HttpResponse | None = None):
+        # cache key of the page, None when the page must not be cached
+        self.key = key
+        # validators of the page, None when the page must not be validated
+        self.etag = etag
+        self.last_modified = last_modified
+        # the 304 or cached response, None when the view must run
+        self.response = response
+
+
+def _lookup(request: HttpRequest, user_id: int) -> PageLookup:
+    if (request.method not in ("GET", "HEAD") or len(get_messages(request))
+            or getattr(request, "profiled", False)):
+        return PageLookup()
+
+    version = get_feed_version(user_id=user_id)
+    path = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False).hexdigest()
+    lookup = PageLookup()
+
+    if settings.FEED_CONDITIONAL_GET:
+        # weak, as the page is the same for the user but not byte for byte, with the whitespace of each engine
+        lookup.etag = f'W/"{hashlib.md5(f"{version}:{path}".encode(), usedforsecurity=False).hexdigest()}"'
+        lookup.last_modified = get_version_time(version=version)
+        lookup.response = get_conditional_response(request, etag=lookup.etag, last_modified=lookup.last_modified)
+        if lookup.response is not None:
+            _set_validators(lookup=lookup, response=lookup.response)
+            return lookup
+
+    if settings.FEED_PAGE_CACHE and request.method == "GET":
+        lookup.key = PAGE_KEY.format(user_id=user_id, version=version, path=path)
+        content = get_feed_cache().get(lookup.key)
+        count(key=HITS_KEY if content is not None else MISSES_KEY)
+        if content is not None:
+            lookup.response = HttpResponse(content=content)
+            lookup.response["X-Feed-Cache"] = "hit"
+            _set_validators(lookup=lookup, response=lookup.response)
+    return lookup
+
+
+def _store(lookup: PageLookup, response: HttpResponse) -> None:
+    complete = response.status_code == 200 and not response.streaming
+    if lookup.key is not None:
+        if complete:
+            get_feed_cache().set(lookup.key, response.content, timeout=settings.FEED_PAGE_CACHE_TIMEOUT)
+        response["X-Feed-Cache"] = "miss"
+    if complete:
+        _set_validators(lookup=lookup, response=response)
+
+
+def _set_validators(lookup: PageLookup, response: HttpResponse) -> None:
+    if lookup.etag is None:
+        return
+    response["ETag"] = lookup.etag
+    if lookup.last_modified is not None:
+        response["Last-Modified"] = http_date(lookup.last_modified)
+    # the page of a user, which the browser checks again with the server before each use
+    patch_cache_control(response, private=True, no_cache=True)
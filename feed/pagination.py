@@ -0,0 +1,207 @@
+import asyncio
+import base64
+import binascii
+import json
+import math
+from datetime import datetime, timezone
+
+from feed.engine import FeedPosts, alist
+
+
+class CursorPage:
+    """
+    Page of posts reached through a keyset cursor.
+    It exposes the same navigation attributes as a Django Page, with cursors instead of page numbers.
+    """
+
+    cursor_based = True
+
+    def __init__(self, object_list: list, number: int, paginator: "CursorPaginator",
+                 has_previous: bool, has_next: bool):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_other_pages(self) -> bool:
+        return self._has_previous or self._has_next
+
+    @property
+    def previous_cursor(self) -> str | None:
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(post=self.object_list[0], direction="previous", number=self.number - 1)
+
+    @property
+    def next_cursor(self) -> str | None:
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(post=self.object_list[-1], direction="next", number=self.number + 1)
+
+
+class CursorPaginator:
+    """
+    Keyset paginator over FeedPosts.
+    Every page is read with a single indexed range query, whatever its depth, because the next and
+    previous links carry the (time_created, content_type, id) position of the last or first post shown.
+    Counting the posts is optional: the page number is carried by the cursor itself.
+    """
+
+    def __init__(self, object_list: FeedPosts, per_page: int, count_pages: bool = False):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.count_pages = count_pages
+
+    @property
+    def count(self) -> int | None:
+        if not self.count_pages:
+            return None
+        if not hasattr(self, "_count"):
+            self._count = self.object_list.count()
+        return self._count
+
+    @property
+    def num_pages(self) -> int | None:
+        if not self.count_pages:
+            return None
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def get_page(self, cursor: str | None) -> CursorPage:
+        """
+        Method to get the page pointed by a cursor.
+        An invalid or missing cursor leads to the first page.
+        Args:
+            cursor (str | None): The opaque cursor taken from the query string.
+
+        Returns:
+            A CursorPage with the posts of the page.
+        """
+        decoded = decode_cursor(cursor=cursor)
+        rows, has_more = self._trim(decoded=decoded, rows=list(self._rows(decoded=decoded)))
+        return self._page(decoded=decoded, posts=self.object_list.load(rows=rows), has_more=has_more)
+
+    async def aget_page(self, cursor: str | None) -> CursorPage:
+        """
+        Method to get the page pointed by a cursor with the async ORM.
+        The rows of the page and the count of the posts do not depend on each other, so they are awaited together.
+        Args:
+            cursor (str | None): The opaque cursor taken from the query string.
+
+        Returns:
+            A CursorPage with the posts of the page.
+        """
+        decoded = decode_cursor(cursor=cursor)
+        queries = [alist(self._rows(decoded=decoded))]
+        if self.count_pages and not hasattr(self, "_count"):
+            queries.append(self.object_list.acount())
+
+        rows, *count = await asyncio.gather(*queries)
+        if count:
+            self._count = count[0]
+
+        rows, has_more = self._trim(decoded=decoded, rows=rows)
+        return self._page(decoded=decoded, posts=await self.object_list.aload(rows=rows), has_more=has_more)
+
+    def _rows(self, decoded: tuple | None):
+        limit = self.per_page + 1
+        if decoded is None:
+            return self.object_list.rows()[:limit]
+        position, direction, _ = decoded
+        if direction == "next":
+            return self.object_list.rows(older_than=position)[:limit]
+        return self.object_list.rows(newer_than=position)[:limit]
+
+    def _trim(self, decoded: tuple | None, rows: list) -> tuple[list, bool]:
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if decoded is not None and decoded[1] == "previous":
+            # read from the oldest to the newest post
+            rows = rows[::-1]
+        return rows, has_more
+
+    def _page(self, decoded: tuple | None, posts: list, has_more: bool) -> CursorPage:
+        if decoded is None:
+            return CursorPage(object_list=posts, number=1, paginator=self, has_previous=False, has_next=has_more)
+
+        _, direction, number = decoded
+        if direction == "next":
+            return CursorPage(object_list=posts, number=number, paginator=self, has_previous=True, has_next=has_more)
+        return CursorPage(object_list=posts, number=number if has_more else 1, paginator=self,
+                          has_previous=has_more, has_next=True)
+
+
+def encode_cursor(post, direction: str, number: int) -> str:
+    """
+    Method to encode the position of a post into an opaque cursor.
+    Args:
+        post (Ticket | Review): The post the cursor starts from.
+        direction (str): "next" to read older posts, "previous" to read newer posts.
+        number (int): The number of the page the cursor leads to.
+
+    Returns:
+        The cursor as a URL safe string.
+    """
+    payload = json.dumps([post.time_created.isoformat(), post.content_type, post.id, direction, max(1, number)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _cursor_integer(value) -> int:
+    """
+    Method to read an integer of a cursor, which only holds the JSON integers written by encode_cursor.
+    Raises:
+        ValueError: If the value is not an integer that fits in a database integer column.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{value!r} is not an integer.")
+    # is_integer() is False for the infinite and NaN floats
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{value!r} is not an integer.")
+    if not -2 ** 63 <= value < 2 ** 63:
+        raise ValueError(f"{value!r} is out of range.")
+    return int(value)
+
+
+def decode_cursor(cursor: str | None) -> tuple | None:
+    """
+    Method to decode a cursor built by encode_cursor.
+    Args:
+        cursor (str | None): The cursor to decode.
+
+    Returns:
+        A ((time_created, content_type, id), direction, number) tuple or None if the cursor is missing or invalid.
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        time_created, content_type, post_id, direction, number = json.loads(base64.urlsafe_b64decode(padded))
+        time_created = datetime.fromisoformat(time_created)
+        if time_created.tzinfo is not None:
+            # the database stores UTC times, which are out of the datetime range for the first and last days
+            time_created = time_created.astimezone(timezone.utc)
+        position = (time_created, str(content_type), _cursor_integer(post_id))
+        number = max(1, _cursor_integer(number))
+    except (binascii.Error, UnicodeDecodeError, OverflowError, TypeError, ValueError):
+        return None
+
+    if direction not in ("next", "previous"):
+        return None
+
+    return position, direction, number
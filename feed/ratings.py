@@ -0,0 +1,93 @@
+"""
+Rollup of the ratings of the reviews on their ticket: `review_count`, `rating_sum`, `rating_average` and
+one `rating_<n>_count` column per rating.
+
+The columns are updated by the signals of feed.signals, in the transaction of each review, with an UPDATE
+computing the new values from the current ones in the database, so that concurrent reviews of a ticket do
+not overwrite each other. The bulk and raw writes, which send no signal, are fixed by `repair_ticket_ratings`.
+"""
+from django.db.models import Case, Count, F, FloatField, Q, Sum, When
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThan
+
+from feed.models import Review, Ticket
+
+RATINGS = range(6)
+
+
+def rating_count_field(rating: int) -> str:
+    return f"rating_{rating}_count"
+
+
+def update_ticket_ratings(ticket_id: int, added: int | None = None, removed: int | None = None) -> None:
+    """
+    Method to add and/or remove a rating from the rollup of a ticket, in one UPDATE query.
+    Args:
+        ticket_id (int): The ID of the ticket.
+        added (int | None): The rating of a review added to the ticket, or whose rating became this one.
+        removed (int | None): The rating of a review removed from the ticket, or whose rating was this one.
+    """
+    if added == removed:
+        return
+
+    count = F("review_count") + ((added is not None) - (removed is not None))
+    total = F("rating_sum") + ((added or 0) - (removed or 0))
+    changes = {
+        "review_count": count,
+        "rating_sum": total,
+        # the right-hand sides all read the values from before the UPDATE
+        "rating_average": Case(When(GreaterThan(count, 0), then=Cast(total, output_field=FloatField()) / count),
+                               default=None, output_field=FloatField()),
+    }
+    if added is not None:
+        changes[rating_count_field(added)] = F(rating_count_field(added)) + 1
+    if removed is not None:
+        changes[rating_count_field(removed)] = F(rating_count_field(removed)) - 1
+
+    Ticket.objects.filter(pk=ticket_id).update(**changes)
+
+
+def repair_ticket_ratings(ticket_ids: list[int] | None = None, batch_size: int = 1000, dry_run: bool = False) -> int:
+    """
+    Method to compute the rollup of tickets again from their reviews and to save the ones that differ.
+    Args:
+        ticket_ids (list[int] | None): The IDs of the tickets to check, all the tickets by default.
+        batch_size (int): The number of tickets checked with each query.
+        dry_run (bool): True to count the wrong tickets without saving them.
+
+    Returns:
+        The number of tickets whose rollup was wrong.
+    """
+    fields = list(Ticket.ROLLUP_FIELDS)
+    tickets = Ticket.objects.order_by("pk").only(*fields)
+    if ticket_ids is not None:
+        tickets = tickets.filter(pk__in=ticket_ids)
+
+    repaired = 0
+    last_pk = 0
+    while batch := list(tickets.filter(pk__gt=last_pk)[:batch_size]):
+        last_pk = batch[-1].pk
+        rollups = {
+            rollup.pop("ticket_id"): rollup
+            for rollup in Review.objects.filter(ticket__in=batch).order_by().values("ticket_id").annotate(
+                review_count=Count("pk"),
+                rating_sum=Sum("rating"),
+                **{rating_count_field(rating): Count("pk", filter=Q(rating=rating)) for rating in RATINGS},
+            )
+        }
+
+        wrong = []
+        for ticket in batch:
+            rollup = rollups.get(ticket.pk, {"review_count": 0, "rating_sum": 0})
+            expected = {field: rollup.get(field, 0) for field in fields if field != "rating_average"}
+            expected["rating_average"] = (rollup["rating_sum"] / rollup["review_count"]
+                                          if rollup["review_count"] else None)
+            if any(getattr(ticket, field) != value for field, value in expected.items()):
+                for field, value in expected.items():
+                    setattr(ticket, field, value)
+                wrong.append(ticket)
+
+        if wrong and not dry_run:
+            Ticket.objects.bulk_update(wrong, fields=fields)
+        repaired += len(wrong)
+    return repaired
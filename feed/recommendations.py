@@ -0,0 +1,111 @@
+"""
+Friends-of-friends follow suggestions, computed in batch with NumPy and SciPy sparse matrices.
+
+The score of a suggested user w for a user u adds up:
+- the co-follows: every user v followed by u who follows w, weighted by 1 / log(2 + number of users followed by v),
+  so that a user following everyone weighs less than a user following a few people (Adamic-Adar);
+- the review overlap: every ticket reviewed by both u and w, weighted by 1 / log(1 + number of reviews of the ticket),
+  times REVIEW_OVERLAP_WEIGHT.
+The users followed by u and u itself are left out, and the FOLLOW_SUGGESTIONS_COUNT best ones are saved
+as FollowSuggestion rows, read by the follows page.
+
+NumPy and SciPy are optional dependencies, only needed to compute the suggestions
+(`uv sync --extra recommendations` or `pip install numpy scipy`).
+"""
+import itertools
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from feed.models import FollowSuggestion, Review, UserFollows
+from jobs.queue import task
+
+REVIEW_OVERLAP_WEIGHT = 0.5
+
+INSERT_SQL = (
+    f"INSERT INTO {FollowSuggestion._meta.db_table} (user_id, suggested_user_id, score, mutual_count, time_created) "
+    f"VALUES (%s, %s, %s, %s, %s)"
+)
+
+
+@task
+def compute_follow_suggestions(batch_size: int = 10000) -> int:
+    """
+    Method to compute the follow suggestions of every user and to replace the saved ones.
+    The users are scored by batches of rows, to bound the size of the intermediate matrices,
+    and the suggestions of each batch are saved in their own transaction.
+    Args:
+        batch_size (int): The number of users scored at once.
+
+    Returns:
+        The number of saved suggestions.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    started = timezone.now()
+    time_created = connection.ops.adapt_datetimefield_value(started)
+    follows = _load_pairs(UserFollows.objects.values_list("user_id", "followed_user_id"))
+    reviews = _load_pairs(Review.objects.values_list("user_id", "ticket_id"))
+
+    # rows and columns of the matrices: the users with a follow or a review
+    user_ids, user_index = np.unique(np.concatenate([follows.ravel(), reviews[:, 0]]), return_inverse=True)
+    user_count = len(user_ids)
+    follow_index = user_index[:follows.size].reshape(-1, 2)
+    follows_matrix = sparse.csr_array((np.ones(len(follow_index)), (follow_index[:, 0], follow_index[:, 1])),
+                                      shape=(user_count, user_count))
+
+    ticket_ids, ticket_index = np.unique(reviews[:, 1], return_inverse=True)
+    ticket_weights = 1 / np.log1p(np.bincount(ticket_index))
+    reviews_matrix = sparse.csr_array((ticket_weights[ticket_index], (user_index[follows.size:], ticket_index)),
+                                      shape=(user_count, len(ticket_ids)))
+
+    followed_counts = np.diff(follows_matrix.indptr)
+    weighted_follows = follows_matrix @ sparse.diags_array(1 / np.log(2 + followed_counts))
+
+    saved = 0
+    for start in range(0, user_count, batch_size):
+        rows = slice(start, min(start + batch_size, user_count))
+        scores = (weighted_follows[rows] @ follows_matrix
+                  + REVIEW_OVERLAP_WEIGHT * (reviews_matrix[rows] @ reviews_matrix.T)).tocoo()
+        mutual_counts = (follows_matrix[rows] @ follows_matrix).tocsr()
+
+        row, column, score = scores.row.astype(np.int64), scores.col.astype(np.int64), scores.data
+        # neither the user nor the followed users
+        followed = follows_matrix[rows].tocoo()
+        followed_keys = followed.row.astype(np.int64) * user_count + followed.col
+        keep = (row + start != column) & ~np.isin(row * user_count + column, followed_keys) & (score > 0)
+        row, column, score = row[keep], column[keep], score[keep]
+
+        # the best suggestions of each user: sorted by user then score, ranked within each user
+        order = np.lexsort((-score, row))
+        row, column, score = row[order], column[order], score[order]
+        first_of_row = np.searchsorted(row, row, side="left")
+        best = np.arange(len(row)) - first_of_row < settings.FOLLOW_SUGGESTIONS_COUNT
+        row, column, score = row[best], column[best], score[best]
+        mutual = np.asarray(mutual_counts[row, column]).ravel()
+
+        # inserted without model instances, which would take most of the time
+        suggestions = zip(user_ids[row + start].tolist(), user_ids[column].tolist(), score.tolist(),
+                          mutual.astype(np.int64).tolist(), itertools.repeat(time_created))
+        with transaction.atomic(), connection.cursor() as cursor:
+            # the IDs are sorted, the range also holds the users without follow nor review
+            FollowSuggestion.objects.filter(user_id__gte=int(user_ids[rows.start]),
+                                            user_id__lte=int(user_ids[rows.stop - 1])).delete()
+            cursor.executemany(INSERT_SQL, suggestions)
+        saved += len(row)
+
+    # the users who no longer follow or review anyone, the saved suggestions were created at `started`
+    FollowSuggestion.objects.filter(time_created__lt=started).delete()
+    return saved
+
+
+def _load_pairs(queryset):
+    """
+    Method to load the pairs of IDs of a values_list() query into an (n, 2) NumPy array, without a list of tuples.
+    """
+    import numpy as np
+
+    return np.fromiter(itertools.chain.from_iterable(queryset.iterator(chunk_size=10000)),
+                       dtype=np.int64).reshape(-1, 2)
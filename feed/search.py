@@ -0,0 +1,123 @@
+"""
+Full-text search over the tickets and reviews, with an SQLite FTS5 table.
+
+Each post is a row of the `feed_post_search` table, whose rowid is twice the ID of a ticket or twice the ID
+of a review plus one. The table is created by the 0006 migration with triggers on the ticket and review tables,
+and recreated by the 0010 migration with an indexed user_id column, matched like a word.
+The triggers find the row of a post by its rowid, so that it follows every write, the ones of the ORM as well as
+bulk and raw SQL writes. Their SQL is in feed.search_schema.
+A review row also holds the title of its ticket, so that the reviews of a book are found by its title.
+"""
+import json
+import re
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser
+from django.db import connection, transaction
+
+from feed.engine import FeedPosts
+from feed.follow_graph import get_followed_ids
+from feed.models import Review, Ticket
+from feed.search_schema import FILL_SQL, SEARCH_TABLE
+
+# the words of a search, the quotes and operators of the FTS5 syntax are dropped
+WORD = re.compile(r"\w+")
+MAX_WORDS = 10
+# words found in most posts: ranking their matches would read a large part of the index
+STOP_WORDS = frozenset((
+    "au", "aux", "avec", "ce", "ces", "cette", "dans", "de", "des", "du", "en", "est", "et", "il", "la", "le", "les",
+    "ne", "ou", "par", "pas", "pour", "qu", "que", "qui", "se", "son", "sa", "ses", "sur", "un", "une",
+))
+
+REBUILD_SQL = [f"DELETE FROM {SEARCH_TABLE}", *FILL_SQL]
+OPTIMIZE_SQL = f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"
+
+# the words are searched in these columns, the user_id column holds the ID of the author
+TEXT_COLUMNS = "{title headline body}"
+
+# the rank of the table is set to bm25() with the weights of the title, headline, body and user_id columns.
+# The authors are matched in the index along with the words, so that only the posts of the viewable authors are ranked
+SEARCH_SQL = f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY rank LIMIT %s OFFSET %s"
+# the authors are filtered after the ranking of the posts of every author
+FILTERED_SEARCH_SQL = (
+    f"SELECT rowid FROM {SEARCH_TABLE} "
+    f"WHERE {SEARCH_TABLE} MATCH %s AND user_id IN (SELECT value FROM json_each(%s)) "
+    f"ORDER BY rank LIMIT %s OFFSET %s"
+)
+
+
+def match_expression(text: str) -> str:
+    """
+    Method to turn the text typed by a user into an FTS5 query matching the posts with all its words.
+    The single letters and the stop words are left out, the last word is matched as a prefix, as it may still be typed.
+    Args:
+        text (str): The text typed by the user.
+
+    Returns:
+        The FTS5 query, or an empty string if the text has no word.
+    """
+    words = [word for word in WORD.findall(text) if len(word) > 1 and word.lower() not in STOP_WORDS][:MAX_WORDS]
+    if not words:
+        return ""
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+def search_posts(user: AbstractUser, text: str, limit: int, offset: int = 0) -> tuple[list, bool]:
+    """
+    Method to search the posts viewable by a user, from the most to the least relevant one.
+    The posts are matched and ranked by the FTS5 index in one query, then loaded like the posts of the feed.
+    Up to FEED_SEARCH_MAX_INDEXED_AUTHORS viewable authors, the index matches the authors along with the words
+    and only ranks their posts. Beyond, OR-ing the authors costs more than it saves: the posts of every author
+    matching the words are ranked, then filtered on the viewable authors, in a time growing with their number.
+    Args:
+        user (AbstractUser): The user searching, who sees the posts of the followed users and their own posts.
+        text (str): The text typed by the user.
+        limit (int): The maximum number of posts.
+        offset (int): The number of posts to skip.
+
+    Returns:
+        A tuple with the list of Ticket and Review instances annotated with their `content_type`,
+        and whether more posts match.
+    """
+    expression = match_expression(text=text)
+    if not expression:
+        return [], False
+
+    # the words typed by the user must not match the IDs of the user_id column
+    expression = f"{TEXT_COLUMNS} : ({expression})"
+    author_ids = sorted(get_followed_ids(user=user) | {user.pk})
+    if len(author_ids) <= settings.FEED_SEARCH_MAX_INDEXED_AUTHORS:
+        authors = " OR ".join(f'"{author_id}"' for author_id in author_ids)
+        sql, params = SEARCH_SQL, [f"{expression} AND user_id : ({authors})", limit + 1, offset]
+    else:
+        sql, params = FILTERED_SEARCH_SQL, [expression, json.dumps(author_ids), limit + 1, offset]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rowids = [row[0] for row in cursor.fetchall()]
+
+    rows = [{"content_type": "Review" if rowid % 2 else "Ticket", "post_id": rowid // 2} for rowid in rowids[:limit]]
+    posts = FeedPosts(tickets=Ticket.objects.all(), reviews=Review.objects.all(), viewer=user)
+    return posts.load(rows=rows), len(rowids) > limit
+
+
+def rebuild_search_index() -> int:
+    """
+    Method to fill the search table again from the ticket and review tables, then to merge its index.
+    Returns:
+        The number of indexed posts.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+        cursor.execute(OPTIMIZE_SQL)
+        cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def optimize_search_index() -> None:
+    """
+    Method to merge the b-trees of the search index into one, which speeds up the searches after many writes.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(OPTIMIZE_SQL)
@@ -0,0 +1,73 @@
+"""
+SQL of the full-text search table of feed.search and of the triggers keeping it in sync with the posts.
+
+On SQLite, the migrations adding a NOT NULL column to, or altering a column of, the ticket or review table
+copy it to a new table and rename that one. The rename fails while the triggers refer to the former table,
+so these migrations drop the triggers first and create them again afterwards, see the 0007 migration.
+This module only holds SQL, so that the migrations can import it.
+"""
+SEARCH_TABLE = "feed_post_search"
+
+CREATE_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER feed_post_search_ticket_insert AFTER INSERT ON feed_ticket BEGIN
+        INSERT INTO feed_post_search (rowid, title, headline, body, user_id)
+        VALUES (new.id * 2, new.title, '', new.description, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER feed_post_search_ticket_update AFTER UPDATE ON feed_ticket
+    WHEN old.title IS NOT new.title OR old.description IS NOT new.description OR old.user_id IS NOT new.user_id
+    BEGIN
+        UPDATE feed_post_search SET title = new.title, body = new.description, user_id = new.user_id
+        WHERE rowid = new.id * 2;
+        UPDATE feed_post_search SET title = new.title
+        WHERE rowid IN (SELECT id * 2 + 1 FROM feed_review WHERE ticket_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER feed_post_search_ticket_delete AFTER DELETE ON feed_ticket BEGIN
+        DELETE FROM feed_post_search WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER feed_post_search_review_insert AFTER INSERT ON feed_review BEGIN
+        INSERT INTO feed_post_search (rowid, title, headline, body, user_id)
+        VALUES (new.id * 2 + 1, (SELECT title FROM feed_ticket WHERE id = new.ticket_id),
+                new.headline, new.body, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER feed_post_search_review_update AFTER UPDATE ON feed_review
+    WHEN old.headline IS NOT new.headline OR old.body IS NOT new.body OR old.user_id IS NOT new.user_id
+        OR old.ticket_id IS NOT new.ticket_id
+    BEGIN
+        UPDATE feed_post_search SET title = (SELECT title FROM feed_ticket WHERE id = new.ticket_id),
+            headline = new.headline, body = new.body, user_id = new.user_id
+        WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER feed_post_search_review_delete AFTER DELETE ON feed_review BEGIN
+        DELETE FROM feed_post_search WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+]
+
+DROP_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS feed_post_search_review_delete",
+    "DROP TRIGGER IF EXISTS feed_post_search_review_update",
+    "DROP TRIGGER IF EXISTS feed_post_search_review_insert",
+    "DROP TRIGGER IF EXISTS feed_post_search_ticket_delete",
+    "DROP TRIGGER IF EXISTS feed_post_search_ticket_update",
+    "DROP TRIGGER IF EXISTS feed_post_search_ticket_insert",
+]
+
+# fills the table from the posts, once emptied
+FILL_SQL = [
+    f"INSERT INTO {SEARCH_TABLE} (rowid, title, headline, body, user_id) "
+    f"SELECT id * 2, title, '', description, user_id FROM feed_ticket",
+    f"INSERT INTO {SEARCH_TABLE} (rowid, title, headline, body, user_id) "
+    f"SELECT review.id * 2 + 1, ticket.title, review.headline, review.body, review.user_id "
+    f"FROM feed_review AS review INNER JOIN feed_ticket AS ticket ON ticket.id = review.ticket_id",
+]
@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from feed import images, ratings, timeline
+from feed.follow_graph import invalidate_follow
+from feed.models import FollowSuggestion, Review, Ticket, UserFollows
+from feed.page_cache import bump_feed_versions, invalidate_pages
+from jobs.queue import enqueue
+
+
+def fan_out_on_write() -> bool:
+    return settings.FEED_FANOUT == "write"
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_save, sender=Review)
+def fan_out_created_post(sender, instance, created, **kwargs):
+    if created and fan_out_on_write():
+        timeline.fan_out_post(post=instance)
+
+
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=Review)
+def remove_deleted_post(sender, instance, **kwargs):
+    if fan_out_on_write():
+        timeline.remove_post(post=instance)
+
+
+@receiver(post_save, sender=Review)
+def update_saved_review_ratings(sender, instance, created, **kwargs):
+    loaded_ticket_id, loaded_rating = (None, None) if created else getattr(instance, "_loaded_rating", (None, None))
+    if created:
+        ratings.update_ticket_ratings(ticket_id=instance.ticket_id, added=instance.rating)
+    elif loaded_ticket_id is None or loaded_rating is None:
+        # saved without being loaded, or loaded without its rating: the former values are unknown
+        ratings.repair_ticket_ratings(ticket_ids=[instance.ticket_id])
+    elif loaded_ticket_id == instance.ticket_id:
+        ratings.update_ticket_ratings(ticket_id=instance.ticket_id, added=instance.rating, removed=loaded_rating)
+    else:
+        ratings.update_ticket_ratings(ticket_id=loaded_ticket_id, removed=loaded_rating)
+        ratings.update_ticket_ratings(ticket_id=instance.ticket_id, added=instance.rating)
+    instance._loaded_rating = (instance.ticket_id, instance.rating)
+
+
+@receiver(post_delete, sender=Review)
+def update_deleted_review_ratings(sender, instance, origin=None, **kwargs):
+    # the reviews deleted along with their ticket
+    if isinstance(origin, Ticket) and origin.pk == instance.ticket_id:
+        return
+    ratings.update_ticket_ratings(ticket_id=instance.ticket_id, removed=instance.rating)
+
+
+@receiver(post_save, sender=UserFollows)
+@receiver(post_delete, sender=UserFollows)
+def invalidate_follow_graph(sender, instance, **kwargs):
+    invalidate_follow(user_id=instance.user_id, followed_user_id=instance.followed_user_id)
+    # a request may have cached the former sets before the transaction is committed
+    transaction.on_commit(lambda: invalidate_follow(user_id=instance.user_id,
+                                                    followed_user_id=instance.followed_user_id))
+
+
+@receiver(post_save, sender=UserFollows)
+def backfill_followed_posts(sender, instance, created, **kwargs):
+    if created and fan_out_on_write():
+        timeline.backfill_follow(owner_id=instance.user_id, author_id=instance.followed_user_id)
+
+
+@receiver(post_save, sender=UserFollows)
+def remove_follow_suggestion(sender, instance, created, **kwargs):
+    if created:
+        FollowSuggestion.objects.filter(user_id=instance.user_id, suggested_user_id=instance.followed_user_id).delete()
+
+
+@receiver(post_delete, sender=UserFollows)
+def prune_unfollowed_posts(sender, instance, **kwargs):
+    if fan_out_on_write():
+        timeline.prune_follow(owner_id=instance.user_id, author_id=instance.followed_user_id)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def invalidate_ticket_pages(sender, instance, created=False, **kwargs):
+    author_ids = {instance.user_id}
+    if not created:
+        # the ticket is also displayed inside the reviews answering it
+        author_ids.update(Review.objects.filter(ticket_id=instance.pk).values_list("user_id", flat=True))
+    invalidate_pages(author_ids=author_ids)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_pages(sender, instance, **kwargs):
+    author_ids = {instance.user_id}
+    # the ticket, displayed with its rating in the posts of its author, is loaded by the views saving a review;
+    # it is not when the review is deleted along with its ticket, whose own signal invalidates those posts
+    if Review.ticket.is_cached(instance):
+        author_ids.add(instance.ticket.user_id)
+    invalidate_pages(author_ids=author_ids)
+
+
+@receiver(post_save, sender=UserFollows)
+@receiver(post_delete, sender=UserFollows)
+def invalidate_follower_pages(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_feed_versions(user_ids=[instance.user_id]))
+
+
+@receiver(post_save, sender=Ticket)
+def generate_image_renditions(sender, instance, **kwargs):
+    if instance.image_renditions.get("name") != (instance.image.name if instance.image else None):
+        # the job is saved in the transaction of the ticket, so it only runs once the ticket is committed
+        enqueue(images.generate_ticket_renditions, instance.pk)
+
+
+@receiver(post_delete, sender=Ticket)
+def delete_image_renditions(sender, instance, **kwargs):
+    renditions = instance.image_renditions
+    if renditions:
+        # the files are kept if the deletion is rolled back
+        transaction.on_commit(lambda: images.delete_renditions(renditions=renditions))
@@ -1,4 +1,7 @@
 from django import template
+from django.conf import settings
+
+from feed.images import get_srcset
 
 register = template.Library()
 
@@ -15,3 +18,19 @@ def get_poster_display_subject(context, user):
     if user == context['user']:
         return "Vous"
     return f"{user.username.capitalize()}"
+
+
+@register.simple_tag
+def get_image_srcset(ticket, webp=False):
+    return get_srcset(ticket=ticket, webp=webp)
+
+
+@register.simple_tag
+def get_fragment_cache_timeout():
+    return settings.FEED_FRAGMENT_CACHE_TIMEOUT
+
+
+@register.filter
+def is_viewer(user_id, viewer):
+    # the flag a cached post fragment varies on, instead of the ID of each viewer
+    return user_id == viewer.pk
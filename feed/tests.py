@@ -0,0 +1,1047 @@
+import base64
+import json
+import re
+import tempfile
+from importlib.util import find_spec
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.username_index import username_index
+from feed import async_views, views
+from feed.forms import TicketForm
+from feed.images import generate_ticket_renditions, get_srcset, rendition_names
+from feed.pagination import decode_cursor
+from feed.models import FeedEntry, FollowSuggestion, Review, Ticket, UserFollows
+from feed.page_cache import get_cache_stats, get_feed_version, reset_cache_stats
+from feed.ratings import repair_ticket_ratings
+from feed.search import match_expression, search_posts
+from feed.timeline import rebuild_timelines
+from jobs.queue import claim_jobs, run_job
+from PIL import Image
+
+User = get_user_model()
+
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-default"},
+    "feed": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-feed"},
+    "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-sessions"},
+    "template_fragments": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-fragments"},
+}
+
+# NumPy and SciPy, needed to compute the follow suggestions, are optional
+HAS_RECOMMENDATIONS = find_spec("numpy") is not None and find_spec("scipy") is not None
+
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="\w+"')
+
+# a table read from start to end, as opposed to "SEARCH ... USING INDEX" or "SCAN ... USING INDEX"
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(?P<table>\w+)(?: AS \w+)?$")
+
+
+@override_settings(CACHES=TEST_CACHES, FEED_PAGE_CACHE=False, JOBS_IMMEDIATE=True)
+class FeedTestCase(TestCase):
+    """
+    Test case seeding a dataset with `seed_litreview` and logging in the user following the most users.
+    The page cache is disabled, so that every request renders its page.
+    """
+    seed = {"users": 20, "follows": 5, "tickets": 60, "reviews": 60}
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_litreview", seed=1, stdout=StringIO(), **cls.seed)
+
+        cls.viewer = User.objects.annotate(followings=Count("following")).latest("followings")
+        followed_ids = set(UserFollows.objects.filter(user=cls.viewer).values_list("followed_user_id", flat=True))
+        cls.followed_user = User.objects.get(pk=min(followed_ids))
+        cls.other_user = User.objects.exclude(pk__in=followed_ids | {cls.viewer.pk}).first()
+
+        # posts of the viewer, with one review answering the ticket of a followed user
+        cls.own_ticket = Ticket.objects.create(title="Own ticket", user=cls.viewer)
+        cls.own_review = Review.objects.create(ticket=cls.own_ticket, rating=4, headline="Own review", user=cls.viewer)
+        cls.followed_ticket = Ticket.objects.create(title="Followed ticket", user=cls.followed_user)
+        cls.answered_ticket = Ticket.objects.create(title="Answered ticket", user=cls.followed_user)
+        cls.answer = Review.objects.create(ticket=cls.answered_ticket, rating=3, headline="Answer", user=cls.viewer)
+        Review.objects.create(ticket=cls.own_ticket, rating=2, headline="Reply", user=cls.followed_user)
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        # the index is kept in the process, it is reloaded with the users of this test
+        username_index.load()
+        self.client.force_login(self.viewer)
+
+    def request(self, method: str, url: str, data: dict | None = None) -> tuple:
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data)
+        return response, queries
+
+
+class CommandTests(FeedTestCase):
+    """
+    The seeder and the benchmark must not leave the models or the settings of the process changed.
+    """
+
+    def test_seed_dates(self):
+        seeded = Ticket.objects.filter(user__username__startswith="seed")
+        self.assertLess(seeded.earliest("time_created").time_created, timezone.now() - timedelta(days=30))
+        self.assertGreater(seeded.earliest("time_created").time_created, timezone.now() - timedelta(days=366))
+
+        # the posts created after the seeding get the current date
+        self.assertTrue(Ticket._meta.get_field("time_created").auto_now_add)
+        self.assertAlmostEqual(self.own_ticket.time_created, timezone.now(), delta=timedelta(minutes=1))
+
+    def test_seed_usernames(self):
+        # a deleted seed user, and usernames with the prefix not followed by a number
+        for username in ("gap1", "gap3", "gapper", "gap2b"):
+            get_user_model().objects.create_user(username=username, password="Litreview-2026")
+
+        call_command("seed_litreview", users=2, follows=0, tickets=0, reviews=0, prefix="gap", stdout=StringIO())
+
+        self.assertEqual(set(get_user_model().objects.filter(username__startswith="gap")
+                             .values_list("username", flat=True)),
+                         {"gap1", "gap3", "gapper", "gap2b", "gap4", "gap5"})
+
+    @override_settings(FEED_PAGE_CACHE=True)
+    def test_benchmark_without_page_cache(self):
+        stdout = StringIO()
+
+        call_command("benchmark_litreview", endpoints=["feed"], requests=2, warmup=0, users=2, seed=1,
+                     no_page_cache=True, stdout=stdout)
+
+        report = json.loads(stdout.getvalue())
+        self.assertFalse(report["environment"]["feed_page_cache"])
+        self.assertEqual(report["endpoints"]["feed"]["requests"], 2)
+        self.assertTrue(settings.FEED_PAGE_CACHE)
+
+
+@override_settings(FEED_FANOUT="write")
+class TimelineTests(FeedTestCase):
+    """
+    With the fan-out on write, the signals must keep the FeedEntry timelines equal to rebuilt ones.
+    """
+
+    def setUp(self):
+        super().setUp()
+        rebuild_timelines(owner_ids=list(User.objects.values_list("pk", flat=True)))
+
+    @staticmethod
+    def timeline(user) -> set[tuple[str, int]]:
+        return set(FeedEntry.objects.filter(owner=user).values_list("post_type", "post_id"))
+
+    def assertTimelinesRebuilt(self) -> None:
+        entries = set(FeedEntry.objects.values_list("owner_id", "author_id", "post_type", "post_id", "time_created"))
+        rebuild_timelines(owner_ids=list(User.objects.values_list("pk", flat=True)))
+        self.assertEqual(
+            entries,
+            set(FeedEntry.objects.values_list("owner_id", "author_id", "post_type", "post_id", "time_created")),
+        )
+
+    def test_new_ticket(self):
+        ticket = Ticket.objects.create(title="New ticket", user=self.followed_user)
+
+        self.assertIn(("Ticket", ticket.pk), self.timeline(self.followed_user))
+        self.assertIn(("Ticket", ticket.pk), self.timeline(self.viewer))
+        self.assertNotIn(("Ticket", ticket.pk), self.timeline(self.other_user))
+        self.assertTimelinesRebuilt()
+
+    def test_new_review(self):
+        review = Review.objects.create(ticket=self.followed_ticket, rating=5, headline="New", user=self.followed_user)
+
+        self.assertIn(("Review", review.pk), self.timeline(self.followed_user))
+        self.assertIn(("Review", review.pk), self.timeline(self.viewer))
+        self.assertNotIn(("Review", review.pk), self.timeline(self.other_user))
+        self.assertTimelinesRebuilt()
+
+    @override_settings(JOBS_IMMEDIATE=False)
+    def test_new_post_job(self):
+        ticket = Ticket.objects.create(title="New ticket", user=self.followed_user)
+
+        # the author sees the post right away, the followers once the job has run
+        self.assertIn(("Ticket", ticket.pk), self.timeline(self.followed_user))
+        self.assertNotIn(("Ticket", ticket.pk), self.timeline(self.viewer))
+
+        # as the run_jobs worker, in this thread, which sees the uncommitted test data
+        for job in claim_jobs(limit=10):
+            self.assertTrue(run_job(job_id=job.pk))
+
+        self.assertIn(("Ticket", ticket.pk), self.timeline(self.viewer))
+
+    def test_follow(self):
+        posts = ({("Ticket", pk) for pk in Ticket.objects.filter(user=self.other_user).values_list("pk", flat=True)}
+                 | {("Review", pk) for pk in Review.objects.filter(user=self.other_user).values_list("pk", flat=True)})
+        self.assertTrue(posts)
+        self.assertFalse(posts & self.timeline(self.viewer))
+
+        UserFollows.objects.create(user=self.viewer, followed_user=self.other_user)
+
+        self.assertLessEqual(posts, self.timeline(self.viewer))
+        self.assertTimelinesRebuilt()
+
+    def test_unfollow(self):
+        self.assertTrue(FeedEntry.objects.filter(owner=self.viewer, author=self.followed_user).exists())
+
+        UserFollows.objects.get(user=self.viewer, followed_user=self.followed_user).delete()
+
+        self.assertFalse(FeedEntry.objects.filter(owner=self.viewer, author=self.followed_user).exists())
+        self.assertTimelinesRebuilt()
+
+    def test_delete_ticket(self):
+        review_ids = list(Review.objects.filter(ticket=self.own_ticket).values_list("pk", flat=True))
+        self.assertEqual(len(review_ids), 2)
+
+        self.own_ticket.delete()
+
+        # the reviews answering the ticket are deleted with it
+        deleted = {("Ticket", self.own_ticket.pk)} | {("Review", pk) for pk in review_ids}
+        for user in (self.viewer, self.followed_user):
+            self.assertFalse(deleted & self.timeline(user))
+        self.assertTimelinesRebuilt()
+
+    def test_delete_review(self):
+        self.answer.delete()
+
+        self.assertFalse(FeedEntry.objects.filter(post_type="Review", post_id=self.answer.pk).exists())
+        self.assertTimelinesRebuilt()
+
+
+@override_settings(TICKET_IMAGE_WIDTHS=[300, 500, 1000])
+class ImageRenditionTests(FeedTestCase):
+    """
+    The renditions of the ticket images, generated in the storage of a temporary MEDIA_ROOT.
+    """
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = Path(directory.name)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    @staticmethod
+    def image(name: str, size: tuple[int, int] = (800, 400), pil_format: str = "JPEG") -> SimpleUploadedFile:
+        buffer = BytesIO()
+        Image.new("RGB", size, color=(120, 60, 30)).save(buffer, format=pil_format)
+        return SimpleUploadedFile(name=name, content=buffer.getvalue())
+
+    def files(self) -> set[str]:
+        return {path.relative_to(self.media_root).as_posix() for path in self.media_root.rglob("*") if path.is_file()}
+
+    def test_generate(self):
+        ticket = Ticket.objects.create(title="Cover", user=self.viewer, image=self.image("cover.jpg"))
+        ticket.refresh_from_db()
+
+        name = ticket.image.name
+        self.assertEqual(ticket.image_renditions,
+                         {"name": name, "width": 800, "extension": "jpg", "widths": [300, 500]})
+        self.assertEqual(self.files(), {name, "cover.300w.jpg", "cover.300w.webp", "cover.500w.jpg",
+                                        "cover.500w.webp", "cover.800w.webp"})
+        self.assertEqual(set(rendition_names(ticket.image_renditions)), self.files() - {name})
+        with Image.open(self.media_root / "cover.300w.webp") as rendition:
+            self.assertEqual((rendition.format, rendition.size), ("WEBP", (300, 150)))
+
+    def test_webp_original(self):
+        ticket = Ticket.objects.create(title="Cover", user=self.viewer,
+                                       image=self.image("cover.webp", size=(400, 400), pil_format="WEBP"))
+        ticket.refresh_from_db()
+
+        # no separate WebP copy of a WebP original
+        self.assertEqual(self.files(), {"cover.webp", "cover.300w.webp"})
+        self.assertEqual(get_srcset(ticket, webp=True), "/media/cover.300w.webp 300w, /media/cover.webp 400w")
+
+    def test_srcset(self):
+        ticket = Ticket.objects.create(title="Cover", user=self.viewer, image=self.image("cover.jpg"))
+        ticket.refresh_from_db()
+
+        self.assertEqual(get_srcset(ticket),
+                         "/media/cover.300w.jpg 300w, /media/cover.500w.jpg 500w, /media/cover.jpg 800w")
+        self.assertEqual(get_srcset(ticket, webp=True),
+                         "/media/cover.300w.webp 300w, /media/cover.500w.webp 500w, /media/cover.800w.webp 800w")
+        response = self.client.get(reverse("feed:posts"))
+        self.assertContains(response, f'<source type="image/webp" srcset="{get_srcset(ticket, webp=True)}"')
+        self.assertContains(response, f'srcset="{get_srcset(ticket)}"')
+
+    def test_srcset_not_generated(self):
+        with override_settings(JOBS_IMMEDIATE=False):
+            ticket = Ticket.objects.create(title="Cover", user=self.viewer, image=self.image("cover.jpg"))
+
+        self.assertEqual(get_srcset(ticket), "")
+
+    def test_generate_invalidates_pages(self):
+        with override_settings(JOBS_IMMEDIATE=False):
+            ticket = Ticket.objects.create(title="Cover", user=self.followed_user, image=self.image("cover.jpg"))
+        versions = {user.pk: get_feed_version(user_id=user.pk)
+                    for user in (self.viewer, self.followed_user, self.other_user)}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(generate_ticket_renditions(ticket_id=ticket.pk))
+
+        # the srcset is shown by the pages of the author and of its followers
+        self.assertNotEqual(get_feed_version(user_id=self.followed_user.pk), versions[self.followed_user.pk])
+        self.assertNotEqual(get_feed_version(user_id=self.viewer.pk), versions[self.viewer.pk])
+        self.assertEqual(get_feed_version(user_id=self.other_user.pk), versions[self.other_user.pk])
+
+    def test_replace_image(self):
+        ticket = Ticket.objects.create(title="Cover", user=self.viewer, image=self.image("cover.jpg"))
+        # as loaded by the update view, with the renditions generated after its creation
+        ticket.refresh_from_db()
+
+        ticket.image = self.image("new.png", size=(600, 300), pil_format="PNG")
+        ticket.save()
+
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.image_renditions["widths"], [300, 500])
+        # the former original image is left as it was by Django
+        self.assertEqual(self.files(), {"cover.jpg", "new.png", "new.300w.png", "new.300w.webp", "new.500w.png",
+                                        "new.500w.webp", "new.600w.webp"})
+
+    def test_remove_image(self):
+        ticket = Ticket.objects.create(title="Cover", user=self.viewer, image=self.image("cover.jpg"))
+        # as loaded by the update view, with the renditions generated after its creation
+        ticket.refresh_from_db()
+
+        ticket.image = None
+        ticket.save()
+
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.image_renditions, {})
+        self.assertEqual(self.files(), {"cover.jpg"})
+
+    def test_delete_ticket(self):
+        ticket = Ticket.objects.create(title="Cover", user=self.viewer, image=self.image("cover.jpg"))
+        ticket.refresh_from_db()
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            ticket.delete()
+        # until the deletion is committed
+        self.assertIn("cover.300w.jpg", self.files())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.files(), {"cover.jpg"})
+
+    def test_command(self):
+        with override_settings(JOBS_IMMEDIATE=False):
+            ticket = Ticket.objects.create(title="Cover", user=self.viewer, image=self.image("cover.jpg"))
+        stdout = StringIO()
+
+        call_command("generate_renditions", workers=1, stdout=stdout)
+
+        self.assertIn("Renditions generated for 1 of 1 ticket images (0 failed).", stdout.getvalue())
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.image_renditions["widths"], [300, 500])
+
+        call_command("generate_renditions", workers=1, stdout=stdout)
+        self.assertIn("Renditions generated for 0 of 1 ticket images (0 failed).", stdout.getvalue())
+
+        with override_settings(TICKET_IMAGE_WIDTHS=[600]):
+            call_command("generate_renditions", workers=1, force=True, stdout=stdout)
+        # the renditions of the former widths are deleted
+        self.assertEqual(self.files(), {"cover.jpg", "cover.600w.jpg", "cover.600w.webp", "cover.800w.webp"})
+
+
+class QueryBudgetTests(FeedTestCase):
+    """
+    Maximum number of queries of each page, which must not grow with the number of posts, follows and users.
+    """
+
+    def assertQueryBudget(self, budget: int, url: str, method: str = "get", data: dict | None = None,
+                          status: int = 200) -> None:
+        response, queries = self.request(method=method, url=url, data=data)
+        self.assertEqual(response.status_code, status)
+        self.assertLessEqual(
+            len(queries), budget,
+            f"{method.upper()} {url} ran {len(queries)} queries, over its budget of {budget}:\n"
+            + "\n".join(query["sql"] for query in queries),
+        )
+
+    def test_feed(self):
+        self.assertQueryBudget(6, reverse("feed:feed"))
+
+    def test_feed_next_page(self):
+        next_cursor = self.client.get(reverse("feed:feed")).context["page_obj"].next_cursor
+        self.assertQueryBudget(5, f"{reverse('feed:feed')}?cursor={next_cursor}")
+
+    @override_settings(FEED_PAGINATION="page")
+    def test_feed_numbered_page(self):
+        self.assertQueryBudget(7, f"{reverse('feed:feed')}?page=2")
+
+    @override_settings(FEED_FANOUT="write")
+    def test_feed_timeline(self):
+        rebuild_timelines(owner_ids=[self.viewer.pk])
+        self.assertQueryBudget(5, reverse("feed:feed"))
+
+    def test_posts(self):
+        self.assertQueryBudget(5, reverse("feed:posts"))
+
+    def test_search(self):
+        self.assertQueryBudget(6, f"{reverse('feed:search')}?q=own")
+
+    def test_top_rated(self):
+        self.assertQueryBudget(5, reverse("feed:top-rated"))
+
+    def test_create_ticket(self):
+        self.assertQueryBudget(2, reverse("feed:create-ticket"))
+        self.assertQueryBudget(4, reverse("feed:create-ticket"), method="post",
+                               data={"title": "Ticket", "description": "Description"}, status=302)
+
+    def test_update_ticket(self):
+        url = reverse("feed:update-ticket", args=[self.own_ticket.pk])
+        self.assertQueryBudget(3, url)
+        self.assertQueryBudget(6, url, method="post", data={"title": "Title", "description": ""}, status=302)
+
+    def test_delete_ticket(self):
+        url = reverse("feed:delete-ticket", args=[self.own_ticket.pk])
+        self.assertQueryBudget(3, url)
+        self.assertQueryBudget(9, url, method="post", status=302)
+
+    def test_create_review(self):
+        self.assertQueryBudget(2, reverse("feed:create-review"))
+        self.assertQueryBudget(6, reverse("feed:create-review"), method="post",
+                               data={"title": "Ticket", "description": "", "headline": "Review", "rating": 3,
+                                     "body": ""}, status=302)
+
+    def test_create_review_by_answer(self):
+        url = reverse("feed:create-review-by-answer", args=[self.followed_ticket.pk])
+        self.assertQueryBudget(4, url)
+        self.assertQueryBudget(8, url, method="post", data={"headline": "Review", "rating": 3, "body": ""},
+                               status=302)
+
+    def test_update_review(self):
+        url = reverse("feed:update-review", args=[self.answer.pk])
+        self.assertQueryBudget(3, url)
+        self.assertQueryBudget(6, url, method="post", data={"headline": "Headline", "rating": 1, "body": ""},
+                               status=302)
+
+    def test_delete_review(self):
+        url = reverse("feed:delete-review", args=[self.answer.pk])
+        self.assertQueryBudget(3, url)
+        self.assertQueryBudget(6, url, method="post", status=302)
+
+    def test_follows(self):
+        self.assertQueryBudget(5, reverse("feed:follows"))
+        self.assertQueryBudget(6, reverse("feed:follows"), method="post", data={"username": self.other_user.username},
+                               status=302)
+
+    def test_delete_follow(self):
+        url = reverse("feed:delete-follow", args=[self.followed_user.pk])
+        self.assertQueryBudget(3, url)
+        self.assertQueryBudget(5, url, method="post", status=302)
+
+    def test_follow_compute_user(self):
+        self.assertQueryBudget(3, reverse("feed:follow-compute-user"), method="post",
+                               data={"user": self.other_user.username})
+
+    def test_follow_suggest_user(self):
+        self.assertQueryBudget(3, f"{reverse('feed:follow-suggest-user')}?q={self.other_user.username[:3]}")
+
+
+class LargeQueryBudgetTests(QueryBudgetTests):
+    """
+    Same budgets, with ten times more data.
+    """
+    seed = {"users": 200, "follows": 20, "tickets": 600, "reviews": 600}
+
+
+@skipUnlessDBFeature("supports_explaining_query_execution")
+class QueryPlanTests(FeedTestCase):
+    """
+    The queries of the feed pages must read the posts, follows and timelines through an index, never with a full scan.
+    """
+    seed = {"users": 200, "follows": 20, "tickets": 600, "reviews": 600}
+
+    def assertNoFullScan(self, url: str) -> None:
+        response, queries = self.request(method="get", url=url)
+        self.assertEqual(response.status_code, 200)
+
+        for query in queries:
+            if not query["sql"].lstrip().upper().startswith("SELECT"):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                plan = [row[-1] for row in cursor.fetchall()]
+            for step in plan:
+                self.assertIsNone(FULL_SCAN.match(step),
+                                  f"GET {url} scans a whole table:\n{query['sql']}\n" + "\n".join(plan))
+
+    def test_feed(self):
+        self.assertNoFullScan(reverse("feed:feed"))
+
+    def test_feed_next_page(self):
+        next_cursor = self.client.get(reverse("feed:feed")).context["page_obj"].next_cursor
+        self.assertNoFullScan(f"{reverse('feed:feed')}?cursor={next_cursor}")
+
+    @override_settings(FEED_FANOUT="write")
+    def test_feed_timeline(self):
+        rebuild_timelines(owner_ids=[self.viewer.pk])
+        self.assertNoFullScan(reverse("feed:feed"))
+
+    def test_posts(self):
+        self.assertNoFullScan(reverse("feed:posts"))
+
+    def test_follows(self):
+        self.assertNoFullScan(reverse("feed:follows"))
+
+    def test_search(self):
+        self.assertNoFullScan(f"{reverse('feed:search')}?q=own")
+
+    def test_top_rated(self):
+        self.assertNoFullScan(reverse("feed:top-rated"))
+
+
+class PaginationTests(FeedTestCase):
+    """
+    The cursors come from the query string: the ones not built by the paginator lead to the first page.
+    """
+
+    @staticmethod
+    def cursor(payload: str) -> str:
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def test_next_page(self):
+        next_cursor = self.client.get(reverse("feed:feed")).context["page_obj"].next_cursor
+        position, direction, number = decode_cursor(cursor=next_cursor)
+
+        self.assertEqual((direction, number), ("next", 2))
+        self.assertEqual(self.client.get(reverse("feed:feed"), {"cursor": next_cursor}).context["page_obj"].number, 2)
+
+    def test_crafted_cursors(self):
+        payloads = [
+            "not json",
+            '["2020-01-01T00:00:00+00:00","Ticket",1,"next",Infinity]',
+            '["2020-01-01T00:00:00+00:00","Ticket",1e400,"next",1]',
+            '["2020-01-01T00:00:00+00:00","Ticket",NaN,"next",1]',
+            '["2020-01-01T00:00:00+00:00","Ticket",1.5,"next",1]',
+            '["2020-01-01T00:00:00+00:00","Ticket",1e30,"next",1]',
+            '["2020-01-01T00:00:00+00:00","Ticket",true,"next",1]',
+            '["0001-01-01T00:00:00+01:00","Ticket",1,"next",1]',
+            '["9999-12-31T23:59:59-05:00","Ticket",1,"next",1]',
+            '["2020-01-01T00:00:00+00:00","Ticket",1,"sideways",1]',
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                self.assertIsNone(decode_cursor(cursor=self.cursor(payload)))
+
+                response = self.client.get(reverse("feed:feed"), {"cursor": self.cursor(payload)})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context["page_obj"].number, 1)
+
+
+class SearchTests(FeedTestCase):
+    """
+    The search table follows the writes on the tickets and reviews through its triggers.
+    """
+
+    def search(self, text: str) -> list[tuple[str, int]]:
+        results, _ = search_posts(user=self.viewer, text=text, limit=20)
+        return [(post.content_type, post.pk) for post in results]
+
+    def test_match_expression(self):
+        self.assertEqual(match_expression('Le "comte" de Monte-Cri'), '"comte" "Monte" "Cri"*')
+        self.assertEqual(match_expression(' " * - l\'a '), "")
+
+    def test_viewable_posts(self):
+        hidden = Ticket.objects.create(title="Answered ticket", user=self.other_user)
+
+        self.assertEqual(self.search("answered"),
+                         [("Ticket", self.answered_ticket.pk), ("Review", self.answer.pk)])
+        self.assertNotIn(("Ticket", hidden.pk), self.search("answered"))
+
+    def test_prefix_and_diacritics(self):
+        ticket = Ticket.objects.create(title="Critiqué", description="Les Misérables", user=self.followed_user)
+
+        self.assertEqual(self.search("critique"), [("Ticket", ticket.pk)])
+        self.assertEqual(self.search("miser"), [("Ticket", ticket.pk)])
+
+    def test_title_ranked_first(self):
+        body = Ticket.objects.create(title="Other", description="Dune", user=self.followed_user)
+        title = Ticket.objects.create(title="Dune", description="", user=self.followed_user)
+
+        self.assertEqual(self.search("dune"), [("Ticket", title.pk), ("Ticket", body.pk)])
+
+    def test_update_and_delete(self):
+        self.answered_ticket.title = "Fondation"
+        self.answered_ticket.save()
+        self.answer.headline = "Asimov"
+        self.answer.save()
+
+        self.assertEqual(self.search("answered"), [])
+        self.assertEqual(self.search("fondation asimov"), [("Review", self.answer.pk)])
+
+        self.answered_ticket.delete()
+
+        self.assertEqual(self.search("fondation"), [])
+
+    def test_numbers(self):
+        author = User.objects.create_user(pk=4242, username="author4242", password="Litreview-2026")
+        UserFollows.objects.create(user=self.viewer, followed_user=author)
+        Ticket.objects.create(title="Sans numéro", user=author)
+        ticket = Ticket.objects.create(title="Tome 4242", user=self.followed_user)
+
+        # the words are not matched with the IDs of the authors
+        self.assertEqual(self.search("4242"), [("Ticket", ticket.pk)])
+
+    @override_settings(FEED_SEARCH_MAX_INDEXED_AUTHORS=0)
+    def test_filtered_authors(self):
+        self.test_viewable_posts()
+        self.test_numbers()
+
+    def assertAuthorsIndexed(self, indexed: bool) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            self.search("answered")
+
+        search_sql = next(query["sql"] for query in queries if "feed_post_search" in query["sql"])
+        self.assertEqual("json_each" not in search_sql, indexed)
+
+    def test_indexed_authors(self):
+        # the posts of the other authors are not ranked
+        self.assertAuthorsIndexed(True)
+        with self.settings(FEED_SEARCH_MAX_INDEXED_AUTHORS=0):
+            self.assertAuthorsIndexed(False)
+
+    def test_search_page(self):
+        response = self.client.get(reverse("feed:search"), {"q": "own"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Own ticket")
+        self.assertContains(response, "Own review")
+        self.assertFalse(response.context["has_next"])
+
+    @override_settings(FEED_SEARCH_MAX_PAGES=2)
+    def test_max_pages(self):
+        for number in range(15):
+            Ticket.objects.create(title=f"Saga {number}", user=self.followed_user)
+
+        self.assertTrue(self.client.get(reverse("feed:search"), {"q": "saga"}).context["has_next"])
+        response = self.client.get(reverse("feed:search"), {"q": "saga", "page": 9})
+        self.assertEqual(response.context["page_number"], 2)
+        self.assertEqual(len(response.context["results"]), 5)
+        self.assertFalse(response.context["has_next"])
+
+    def test_rebuild_command(self):
+        Ticket.objects.filter(pk=self.own_ticket.pk).update(title="Renamed")
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM feed_post_search")
+        out = StringIO()
+
+        call_command("rebuild_search_index", stdout=out)
+
+        self.assertIn(f"{Ticket.objects.count() + Review.objects.count()} posts indexed.", out.getvalue())
+        self.assertEqual(self.search("renamed")[0], ("Ticket", self.own_ticket.pk))
+
+
+class RatingTests(FeedTestCase):
+    """
+    The rating rollup of the tickets follows the reviews written through the ORM, and is repaired after bulk writes.
+    """
+
+    def assertRollup(self, ticket: Ticket, ratings: list[int]) -> None:
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.review_count, ticket.rating_sum), (len(ratings), sum(ratings)))
+        self.assertEqual(ticket.rating_average, sum(ratings) / len(ratings) if ratings else None)
+        self.assertEqual(ticket.rating_distribution, [(rating, ratings.count(rating)) for rating in range(5, -1, -1)])
+
+    def test_seeded_rollups(self):
+        self.assertEqual(repair_ticket_ratings(dry_run=True), 0)
+
+    def test_create_update_delete(self):
+        self.assertRollup(self.own_ticket, [4, 2])
+
+        review = Review.objects.get(ticket=self.own_ticket, user=self.followed_user)
+        review.rating = 5
+        review.save()
+        self.assertRollup(self.own_ticket, [4, 5])
+
+        review.headline = "Headline"
+        review.save()
+        self.assertRollup(self.own_ticket, [4, 5])
+
+        review.ticket = self.followed_ticket
+        review.save()
+        self.assertRollup(self.own_ticket, [4])
+        self.assertRollup(self.followed_ticket, [5])
+
+        review.delete()
+        self.assertRollup(self.followed_ticket, [])
+
+    def test_deferred_rating(self):
+        review = Review.objects.only("id", "ticket_id", "headline").get(ticket=self.own_ticket, user=self.viewer)
+        Review.objects.filter(pk=review.pk).update(rating=0)
+        review.headline = "Headline"
+        review.save()
+
+        self.assertRollup(self.own_ticket, [0, 2])
+
+    def test_stale_ticket(self):
+        # the ticket is loaded by the update view, then a review changes its rating before the ticket is saved
+        ticket = Ticket.objects.get(pk=self.own_ticket.pk)
+        form = TicketForm({"title": "Title", "description": ""}, instance=ticket)
+        Review.objects.get(ticket=self.own_ticket, user=self.followed_user).delete()
+        review = Review.objects.get(ticket=self.own_ticket, user=self.viewer)
+        review.rating = 1
+        review.save()
+
+        self.assertTrue(form.is_valid())
+        form.save()
+
+        self.assertRollup(self.own_ticket, [1])
+        self.assertEqual(Ticket.objects.get(pk=self.own_ticket.pk).title, "Title")
+
+        ticket.title = "Other title"
+        ticket.save()
+        self.assertRollup(self.own_ticket, [1])
+
+    def test_repair_command(self):
+        Review.objects.filter(ticket=self.own_ticket).update(rating=1)
+        Ticket.objects.filter(pk=self.followed_ticket.pk).update(review_count=3)
+        out = StringIO()
+
+        call_command("repair_ticket_ratings", stdout=out)
+
+        self.assertIn("2 tickets repaired.", out.getvalue())
+        self.assertRollup(self.own_ticket, [1, 1])
+        self.assertRollup(self.followed_ticket, [])
+
+    def test_top_rated(self):
+        Review.objects.create(ticket=self.answered_ticket, rating=5, headline="Top", user=self.followed_user)
+
+        response = self.client.get(reverse("feed:top-rated"))
+
+        tickets = list(response.context["page_obj"])
+        self.assertIn(self.answered_ticket, tickets)
+        self.assertTrue(all(ticket.review_count >= 2 for ticket in tickets))
+        ratings = [(ticket.rating_average, ticket.review_count) for ticket in tickets]
+        self.assertEqual(ratings, sorted(ratings, reverse=True))
+
+
+class FollowSuggestionTests(FeedTestCase):
+    """
+    The suggestions computed from the follows and reviews, shown on the follows page.
+    """
+
+    @skipUnless(HAS_RECOMMENDATIONS, "numpy and scipy are not installed")
+    def test_compute(self):
+        UserFollows.objects.create(user=self.followed_user, followed_user=self.other_user)
+        out = StringIO()
+
+        call_command("compute_follow_suggestions", batch_size=7, stdout=out)
+
+        self.assertIn(f"{FollowSuggestion.objects.count()} follow suggestions saved", out.getvalue())
+        suggestion = FollowSuggestion.objects.get(user=self.viewer, suggested_user=self.other_user)
+        self.assertGreaterEqual(suggestion.mutual_count, 1)
+        followed = set(UserFollows.objects.values_list("user_id", "followed_user_id"))
+        for user_id, suggested_user_id in FollowSuggestion.objects.values_list("user_id", "suggested_user_id"):
+            self.assertNotEqual(user_id, suggested_user_id)
+            self.assertNotIn((user_id, suggested_user_id), followed)
+        counts = FollowSuggestion.objects.values("user").annotate(count=Count("pk")).values_list("count", flat=True)
+        self.assertLessEqual(max(counts), settings.FOLLOW_SUGGESTIONS_COUNT)
+
+    @skipUnless(HAS_RECOMMENDATIONS, "numpy and scipy are not installed")
+    def test_recompute_replaces(self):
+        call_command("compute_follow_suggestions", stdout=StringIO())
+        stale = FollowSuggestion.objects.create(user=self.viewer, suggested_user=self.viewer, score=100)
+
+        call_command("compute_follow_suggestions", stdout=StringIO())
+
+        self.assertFalse(FollowSuggestion.objects.filter(pk=stale.pk).exists())
+
+    def test_follows_page(self):
+        FollowSuggestion.objects.create(user=self.viewer, suggested_user=self.other_user, score=1, mutual_count=2)
+
+        response = self.client.get(reverse("feed:follows"))
+
+        self.assertContains(response, "Suivi par 2 de vos abonnements")
+        self.client.post(reverse("feed:follows"), {"username": self.other_user.username})
+        self.assertFalse(FollowSuggestion.objects.filter(user=self.viewer).exists())
+
+
+class FragmentCacheTests(FeedTestCase):
+    """
+    The snippet of each post is rendered once, then read from the fragment cache until the post changes.
+    """
+
+    def test_changed_post(self):
+        self.assertContains(self.client.get(reverse("feed:posts")), "Own ticket")
+
+        # a change without a new `time_updated` is not seen by the cached fragment
+        Ticket.objects.filter(pk=self.own_ticket.pk).update(title="Renamed ticket")
+        self.assertNotContains(self.client.get(reverse("feed:posts")), "Renamed ticket")
+
+        self.own_ticket.refresh_from_db()
+        self.own_ticket.save()
+        self.assertContains(self.client.get(reverse("feed:posts")), "Renamed ticket")
+
+    def test_rating_rollup(self):
+        self.client.get(reverse("feed:feed"))
+        Review.objects.create(ticket=self.followed_ticket, rating=5, headline="Rated", user=self.other_user)
+        self.assertContains(self.client.get(reverse("feed:feed")), "✮ 5,0/5 • 1 critique")
+
+    def test_viewer_flags(self):
+        UserFollows.objects.get_or_create(user=self.followed_user, followed_user=self.viewer)
+        self.assertContains(self.client.get(reverse("feed:feed")), "Vous avez publié une critique")
+
+        self.client.force_login(self.followed_user)
+        self.assertContains(self.client.get(reverse("feed:feed")),
+                            f"{self.viewer.username.capitalize()} a publié une critique")
+
+
+class JinjaTemplateTests(FeedTestCase):
+    """
+    The Jinja2 ports of the feed and posts pages render the same HTML as their Django templates.
+    """
+
+    def render(self, url: str, engine: str) -> str:
+        caches["template_fragments"].clear()
+        with override_settings(FEED_TEMPLATE_ENGINE=engine):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def assertSamePage(self, url: str) -> None:
+        self.assertHTMLEqual(self.render(url=url, engine="jinja2"), self.render(url=url, engine="django"))
+
+    def test_feed(self):
+        self.assertSamePage(reverse("feed:feed"))
+        next_cursor = self.client.get(reverse("feed:feed")).context["page_obj"].next_cursor
+        self.assertSamePage(f"{reverse('feed:feed')}?cursor={next_cursor}")
+
+    @override_settings(FEED_PAGINATION="page")
+    def test_feed_numbered_page(self):
+        self.assertSamePage(f"{reverse('feed:feed')}?page=2")
+
+    def test_posts(self):
+        self.assertSamePage(reverse("feed:posts"))
+
+
+@override_settings(FEED_PAGE_CACHE=True)
+class PageCacheTests(FeedTestCase):
+    """
+    The feed and posts pages are cached per user, until a post or a follow relevant to the user changes.
+    """
+
+    def setUp(self):
+        super().setUp()
+        reset_cache_stats()
+
+    def test_hit(self):
+        for url in (reverse("feed:feed"), reverse("feed:posts")):
+            miss = self.client.get(url)
+            self.assertEqual(miss["X-Feed-Cache"], "miss")
+
+            with CaptureQueriesContext(connection) as queries:
+                hit = self.client.get(url)
+            self.assertEqual(hit["X-Feed-Cache"], "hit")
+            self.assertEqual(hit.content, miss.content)
+            # the session and the user only
+            self.assertLessEqual(len(queries), 2)
+
+        self.assertEqual(get_cache_stats(), {"hits": 2, "misses": 2})
+
+    def test_pages_of_each_url_and_user(self):
+        self.client.get(reverse("feed:feed"))
+
+        self.assertEqual(self.client.get(reverse("feed:feed"), {"page": 2})["X-Feed-Cache"], "miss")
+        self.client.force_login(self.followed_user)
+        self.assertEqual(self.client.get(reverse("feed:feed"))["X-Feed-Cache"], "miss")
+        self.assertEqual(get_cache_stats(), {"hits": 0, "misses": 3})
+
+    def test_new_post(self):
+        versions = {user.pk: get_feed_version(user_id=user.pk)
+                    for user in (self.viewer, self.followed_user, self.other_user)}
+        self.client.get(reverse("feed:feed"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(title="New ticket", user=self.followed_user)
+
+        # the author and the follower, not the unrelated user
+        self.assertNotEqual(get_feed_version(user_id=self.followed_user.pk), versions[self.followed_user.pk])
+        self.assertNotEqual(get_feed_version(user_id=self.viewer.pk), versions[self.viewer.pk])
+        self.assertEqual(get_feed_version(user_id=self.other_user.pk), versions[self.other_user.pk])
+
+        response = self.client.get(reverse("feed:feed"))
+        self.assertEqual(response["X-Feed-Cache"], "miss")
+        self.assertContains(response, "New ticket")
+
+    def test_updated_review(self):
+        self.client.get(reverse("feed:posts"))
+        other_version = get_feed_version(user_id=self.other_user.pk)
+
+        # the review of a followed user answering a ticket of the viewer, whose rating is on the posts page
+        review = Review.objects.select_related("ticket").get(ticket=self.own_ticket, user=self.followed_user)
+        review.rating = 4
+        with self.captureOnCommitCallbacks(execute=True):
+            review.save()
+
+        response = self.client.get(reverse("feed:posts"))
+        self.assertEqual(response["X-Feed-Cache"], "miss")
+        self.assertContains(response, "4,0/5")
+        self.assertEqual(get_feed_version(user_id=self.other_user.pk), other_version)
+
+    def test_follow(self):
+        self.client.get(reverse("feed:feed"))
+        followed_version = get_feed_version(user_id=self.other_user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserFollows.objects.create(user=self.viewer, followed_user=self.other_user)
+
+        self.assertEqual(self.client.get(reverse("feed:feed"))["X-Feed-Cache"], "miss")
+        self.assertEqual(get_feed_version(user_id=self.other_user.pk), followed_version)
+
+    def test_no_bump_before_commit(self):
+        version = get_feed_version(user_id=self.viewer.pk)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            Ticket.objects.create(title="New ticket", user=self.followed_user)
+
+        self.assertEqual(get_feed_version(user_id=self.viewer.pk), version)
+
+    @override_settings(FEED_PAGE_CACHE=False)
+    def test_disabled(self):
+        self.client.get(reverse("feed:feed"))
+
+        self.assertNotIn("X-Feed-Cache", self.client.get(reverse("feed:feed")))
+        self.assertEqual(get_cache_stats(), {"hits": 0, "misses": 0})
+
+
+class ConditionalGetTests(FeedTestCase):
+    """
+    The feed and posts pages carry validators, and a browser whose copy is current gets a 304 without feed queries.
+    """
+
+    def test_not_modified(self):
+        for url in (reverse("feed:feed"), reverse("feed:posts")):
+            response = self.client.get(url)
+            self.assertTrue(response["ETag"].startswith('W/"'))
+            self.assertIn("Last-Modified", response)
+            self.assertEqual(set(response["Cache-Control"].split(", ")), {"private", "no-cache"})
+
+            with CaptureQueriesContext(connection) as queries:
+                not_modified = self.client.get(url, headers={"If-None-Match": response["ETag"]})
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified["ETag"], response["ETag"])
+            # the session and the user only
+            self.assertLessEqual(len(queries), 2)
+
+            not_modified = self.client.get(url, headers={"If-Modified-Since": response["Last-Modified"]})
+            self.assertEqual(not_modified.status_code, 304)
+
+    def test_modified(self):
+        etag = self.client.get(reverse("feed:feed"))["ETag"]
+        self.assertNotEqual(self.client.get(reverse("feed:posts"))["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(title="New ticket", user=self.followed_user)
+        response = self.client.get(reverse("feed:feed"), headers={"If-None-Match": etag})
+        self.assertContains(response, "New ticket")
+        self.assertNotEqual(response["ETag"], etag)
+
+    @override_settings(FEED_CONDITIONAL_GET=False)
+    def test_disabled(self):
+        self.assertNotIn("ETag", self.client.get(reverse("feed:feed")))
+
+
+class AsyncViewTests(FeedTestCase):
+    """
+    The async views, served under ASGI, must render the same pages as the sync views with as many queries.
+    """
+
+    def render_view(self, view, url: str, data: dict | None = None) -> tuple:
+        factory = AsyncRequestFactory() if iscoroutinefunction(view) else RequestFactory()
+        request = factory.get(url, data)
+        # a new instance for each request, as the followed ids are kept on it
+        user = User.objects.get(pk=self.viewer.pk)
+        request.user = user
+
+        async def auser():
+            return user
+
+        request.auser = auser
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = async_to_sync(view)(request) if iscoroutinefunction(view) else view(request)
+        self.assertEqual(response.status_code, 200)
+        return CSRF_TOKEN.sub("", response.content.decode()), len(queries)
+
+    def assertSamePage(self, name: str, data: dict | None = None) -> None:
+        url = reverse(f"feed:{name}")
+        view_name = {"feed": "feed_index", "follows": "follow_user"}.get(name, name)
+        sync_page = self.render_view(getattr(views, view_name), url, data)
+        async_page = self.render_view(getattr(async_views, view_name), url, data)
+        self.assertEqual(async_page, sync_page)
+
+    def test_feed(self):
+        self.assertSamePage("feed")
+
+    def test_feed_next_page(self):
+        next_cursor = self.client.get(reverse("feed:feed")).context["page_obj"].next_cursor
+        self.assertSamePage("feed", {"cursor": next_cursor})
+
+    @override_settings(FEED_PAGINATION="page")
+    def test_feed_numbered_page(self):
+        self.assertSamePage("feed", {"page": 2})
+
+    @override_settings(FEED_FANOUT="write")
+    def test_feed_timeline(self):
+        rebuild_timelines(owner_ids=[self.viewer.pk])
+        self.assertSamePage("feed")
+
+    def test_posts(self):
+        self.assertSamePage("posts")
+
+    def test_follows(self):
+        self.assertSamePage("follows")
+
+
+class OwnershipTests(FeedTestCase):
+    """
+    Only the author of a post may change or delete it, the other users, superusers included, get a 404.
+    """
+
+    def post_urls(self) -> list[str]:
+        return [
+            reverse("feed:update-ticket", args=[self.own_ticket.pk]),
+            reverse("feed:delete-ticket", args=[self.own_ticket.pk]),
+            reverse("feed:update-review", args=[self.own_review.pk]),
+            reverse("feed:delete-review", args=[self.own_review.pk]),
+        ]
+
+    def assertRefused(self, user) -> None:
+        self.client.force_login(user)
+        for url in self.post_urls():
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+                self.assertEqual(self.client.post(url).status_code, 404)
+        self.assertTrue(Ticket.objects.filter(pk=self.own_ticket.pk).exists())
+        self.assertTrue(Review.objects.filter(pk=self.own_review.pk).exists())
+
+    def test_author(self):
+        for url in self.post_urls():
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_other_user(self):
+        self.assertRefused(self.followed_user)
+
+    def test_superuser(self):
+        self.assertRefused(User.objects.create_superuser(username="admin", password="Litreview-2026"))
+
+    def test_missing_post(self):
+        response = self.client.get(reverse("feed:update-ticket", args=[0]))
+
+        self.assertEqual(response.status_code, 404)
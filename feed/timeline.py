@@ -0,0 +1,155 @@
+from django.db import connection, transaction
+
+from feed.follow_graph import get_follower_ids
+from feed.models import FeedEntry, Review, Ticket, UserFollows
+from feed.page_cache import bump_feed_versions
+from jobs.queue import enqueue, task
+
+POST_MODELS = {"Ticket": Ticket, "Review": Review}
+
+
+def fan_out_post(post: Ticket | Review) -> None:
+    """
+    Method to add a new post to the timeline of its author right away,
+    and to the timelines of the author's followers in a background job.
+    Args:
+        post (Ticket | Review): The created post.
+    """
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(owner_id=post.user_id, author_id=post.user_id, post_type=type(post).__name__,
+                   post_id=post.id, time_created=post.time_created)],
+        ignore_conflicts=True,
+    )
+    # the job is saved in the transaction of the post, so it only runs once the post is committed
+    enqueue(fan_out_to_followers, type(post).__name__, post.id)
+
+
+@task
+def fan_out_to_followers(post_type: str, post_id: int) -> None:
+    """
+    Method to add a post to the timelines of all the followers of its author.
+    Args:
+        post_type (str): The model name of the post, "Ticket" or "Review".
+        post_id (int): The ID of the post.
+    """
+    post = POST_MODELS[post_type].objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    follower_ids = get_follower_ids(user=post.user_id)
+
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(owner_id=owner_id, author_id=post.user_id, post_type=post_type,
+                   post_id=post.id, time_created=post.time_created) for owner_id in follower_ids],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    # the followers may have cached their feed before the job ran
+    bump_feed_versions(user_ids=follower_ids)
+
+
+def remove_post(post: Ticket | Review) -> None:
+    """
+    Method to remove a deleted post from every timeline.
+    Args:
+        post (Ticket | Review): The deleted post.
+    """
+    FeedEntry.objects.filter(post_type=type(post).__name__, post_id=post.id).delete()
+
+
+def backfill_follow(owner_id: int, author_id: int) -> None:
+    """
+    Method to add, in a background job, all the posts of a newly followed user to the timeline of the follower.
+    Args:
+        owner_id (int): The ID of the follower.
+        author_id (int): The ID of the followed user.
+    """
+    enqueue(copy_followed_posts, owner_id, author_id)
+
+
+@task
+def copy_followed_posts(owner_id: int, author_id: int) -> None:
+    """
+    Method to copy all the posts of a followed user to the timeline of the follower.
+    Nothing is copied if the user was unfollowed in the meantime.
+    Args:
+        owner_id (int): The ID of the follower.
+        author_id (int): The ID of the followed user.
+    """
+    copy_posts(owner_ids=[owner_id], author_id=author_id, include_own=False)
+    bump_feed_versions(user_ids=[owner_id])
+
+
+def prune_follow(owner_id: int, author_id: int) -> None:
+    """
+    Method to remove all the posts of an unfollowed user from the timeline of the former follower.
+    Args:
+        owner_id (int): The ID of the former follower.
+        author_id (int): The ID of the unfollowed user.
+    """
+    FeedEntry.objects.filter(owner_id=owner_id, author_id=author_id).delete()
+
+
+@transaction.atomic
+def rebuild_timelines(owner_ids: list[int]) -> int:
+    """
+    Method to rebuild from scratch the timelines of some users.
+    Args:
+        owner_ids (list[int]): The IDs of the users whose timeline is rebuilt.
+
+    Returns:
+        The number of timeline entries created.
+    """
+    FeedEntry.objects.filter(owner_id__in=owner_ids).delete()
+    return copy_posts(owner_ids=owner_ids, include_own=True)
+
+
+def copy_posts(owner_ids: list[int], author_id: int | None = None, include_own: bool = True) -> int:
+    """
+    Method to copy posts into timelines in bulk, with one INSERT ... SELECT query per post table.
+    Entries already present are left untouched.
+    Args:
+        owner_ids (list[int]): The IDs of the users whose timeline is filled.
+        author_id (int | None): Only copy the posts of this followed user.
+        include_own (bool): Also copy the own posts of each user into their timeline.
+
+    Returns:
+        The number of timeline entries created.
+    """
+    quote = connection.ops.quote_name
+    entry_table = quote(FeedEntry._meta.db_table)
+    follows_table = quote(UserFollows._meta.db_table)
+    owner_placeholders = ", ".join(["%s"] * len(owner_ids))
+
+    queries = []
+    for post_type, model in POST_MODELS.items():
+        post_table = quote(model._meta.db_table)
+
+        follows_where = f"follows.user_id IN ({owner_placeholders})"
+        follows_params = [post_type, *owner_ids]
+        if author_id is not None:
+            follows_where += " AND follows.followed_user_id = %s"
+            follows_params.append(author_id)
+        queries.append((
+            f"SELECT follows.user_id, post.user_id, %s, post.id, post.time_created "
+            f"FROM {post_table} post INNER JOIN {follows_table} follows ON follows.followed_user_id = post.user_id "
+            f"WHERE {follows_where}",
+            follows_params,
+        ))
+
+        if include_own:
+            queries.append((
+                f"SELECT post.user_id, post.user_id, %s, post.id, post.time_created "
+                f"FROM {post_table} post WHERE post.user_id IN ({owner_placeholders})",
+                [post_type, *owner_ids],
+            ))
+
+    inserted = 0
+    with connection.cursor() as cursor:
+        for select, params in queries:
+            cursor.execute(
+                f"INSERT INTO {entry_table} (owner_id, author_id, post_type, post_id, time_created) "
+                f"{select} ON CONFLICT DO NOTHING",
+                params,
+            )
+            inserted += max(cursor.rowcount, 0)
+    return inserted
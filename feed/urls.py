@@ -1,12 +1,18 @@
+from django.conf import settings
 from django.urls import path
 
-from feed import views
+from feed import async_views, views
+
+# the feed, posts and follows pages are async under ASGI, see litreview/asgi.py
+read_views = async_views if settings.FEED_ASYNC_VIEWS else views
 
 app_name = 'feed'
 
 urlpatterns = [
-    path('', views.feed_index, name='feed'),
-    path('posts/', views.posts, name='posts'),
+    path('', read_views.feed_index, name='feed'),
+    path('posts/', read_views.posts, name='posts'),
+    path('search/', views.search, name='search'),
+    path('top/', views.top_rated, name='top-rated'),
     path('tickets/add/', views.create_ticket, name='create-ticket'),
     path('tickets/<int:ticket_id>/update/', views.update_ticket, name='update-ticket'),
     path('tickets/<int:ticket_id>/answer/', views.create_review_by_answer, name='create-review-by-answer'),
@@ -14,7 +20,8 @@ urlpatterns = [
     path('reviews/add/', views.create_review, name='create-review'),
     path('reviews/<int:review_id>/update/', views.update_review, name='update-review'),
     path('reviews/<int:review_id>/delete/', views.delete_review, name='delete-review'),
-    path('followings/', views.follow_user, name='follows'),
+    path('followings/', read_views.follow_user, name='follows'),
     path('followings/<int:user_id>/delete/', views.delete_follow_user, name='delete-follow'),
     path('followings/compute/', views.follow_compute_user, name='follow-compute-user'),
+    path('followings/suggest/', views.follow_suggest_user, name='follow-suggest-user'),
 ]
@@ -1,22 +1,29 @@
-from itertools import chain
-
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required, permission_required
-from django.contrib.auth.models import Permission, AbstractUser
-from django.core.paginator import Paginator
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import AbstractUser
+from django.conf import settings
+from django.core.paginator import Page, Paginator
 
-from django.db import models
+from django.db import IntegrityError, transaction
 from django.db.models import QuerySet
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
 
 from django.shortcuts import render, redirect, get_object_or_404
 
 from accounts.models import User
+from accounts.username_index import username_index
+from feed.backends import OwnershipBackend
+from feed.engine import FeedPosts, TimelinePosts
+from feed.follow_graph import get_followed_ids
 from feed.forms import TicketForm, ReviewForm, FollowUsersForm
-from feed.models import Ticket, Review, UserFollows
+from feed.models import FollowSuggestion, Ticket, Review, UserFollows
+from feed.page_cache import cache_feed_page
+from feed.pagination import CursorPage, CursorPaginator
+from feed.search import search_posts
 
 
 @login_required
+@cache_feed_page
 def feed_index(request: HttpRequest) -> HttpResponse:
     """
     View function for displaying the feed page with tickets and reviews from all the followed users.
@@ -26,68 +33,86 @@ def feed_index(request: HttpRequest) -> HttpResponse:
     Returns:
         An HttpResponse with the feed page.
     """
-    tickets = list(get_users_viewable_tickets(user=request.user).annotate(
-        content_type=models.Value(value="Ticket", output_field=models.CharField())
-    ))
+    if settings.FEED_FANOUT == "write":
+        feed_posts = TimelinePosts(owner=request.user, viewer=request.user)
+    else:
+        feed_posts = FeedPosts(tickets=get_users_viewable_tickets(user=request.user),
+                               reviews=get_users_viewable_reviews(user=request.user),
+                               viewer=request.user)
 
-    reviews = list(get_users_viewable_reviews(user=request.user).annotate(
-        content_type=models.Value(value="Review", output_field=models.CharField())
-    ))
+    page_obj = paginate_posts(request=request, posts=feed_posts)
+    context = {'page_obj': page_obj}
 
-    feed_posts = sorted(
-        chain(tickets, reviews),
-        key=lambda post: post.time_created,
-        reverse=True
-    )
+    return render(request=request, template_name='feed/index.html', context=context,
+                  using=settings.FEED_TEMPLATE_ENGINE)
 
-    for post in feed_posts:
-        if hasattr(post, "ticket"):
-            ticket = post.ticket
-        else:
-            ticket = post
 
-        ticket.user_has_reviewed = ticket.has_user_review(user=request.user)
+@login_required
+@cache_feed_page
+def posts(request: HttpRequest) -> HttpResponse:
+    """
+    View function for displaying the posts page of the current user with tickets and reviews.
+    Args:
+        request (HttpRequest): The incoming HTTP request.
 
-    paginator = Paginator(object_list=feed_posts, per_page=5)
+    Returns:
+        An HttpResponse with the posts page.
+    """
+    postspage_posts = FeedPosts(tickets=Ticket.objects.filter(user=request.user),
+                                reviews=Review.objects.filter(user=request.user))
 
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(number=page_number)
+    page_obj = paginate_posts(request=request, posts=postspage_posts)
     context = {'page_obj': page_obj}
 
-    return render(request=request, template_name='feed/index.html', context=context)
+    return render(request=request, template_name='feed/posts.html', context=context,
+                  using=settings.FEED_TEMPLATE_ENGINE)
 
 
 @login_required
-def posts(request: HttpRequest) -> HttpResponse:
+def search(request: HttpRequest) -> HttpResponse:
     """
-    View function for displaying the posts page of the current user with tickets and reviews.
+    View function for searching the tickets and reviews viewable by the user, from the most to the least relevant one.
     Args:
-        request (HttpRequest): The incoming HTTP request.
+        request (HttpRequest): The incoming HTTP request, with the searched text in `q` and the page number in `page`.
 
     Returns:
-        An HttpResponse with the posts page.
+        An HttpResponse with the search page and the posts of the requested page.
     """
-    tickets = list(Ticket.objects.filter(user=request.user).annotate(
-        content_type=models.Value(value="Ticket", output_field=models.CharField())
-    ))
+    query = request.GET.get('q', '').strip()
+    page_number = request.GET.get('page', '')
+    page_number = int(page_number) if page_number.isdigit() and int(page_number) > 0 else 1
+    page_number = min(page_number, settings.FEED_SEARCH_MAX_PAGES)
 
-    reviews = list(Review.objects.filter(user=request.user).annotate(
-        content_type=models.Value(value="Review", output_field=models.CharField())
-    ))
+    per_page = 5
+    results, has_next = search_posts(user=request.user, text=query, limit=per_page,
+                                     offset=(page_number - 1) * per_page)
+    has_next = has_next and page_number < settings.FEED_SEARCH_MAX_PAGES
+    context = {'query': query, 'results': results, 'page_number': page_number, 'has_next': has_next}
 
-    postspage_posts = sorted(
-        chain(tickets, reviews),
-        key=lambda post: post.time_created,
-        reverse=True
-    )
+    return render(request=request, template_name='feed/search.html', context=context)
 
-    paginator = Paginator(object_list=postspage_posts, per_page=5)
 
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(number=page_number)
-    context = {'page_obj': page_obj}
+@login_required
+def top_rated(request: HttpRequest) -> HttpResponse:
+    """
+    View function for displaying the viewable tickets with the best average rating,
+    read from the rating rollup of the tickets in the order of their index.
+    Args:
+        request (HttpRequest): The incoming HTTP request.
 
-    return render(request=request, template_name='feed/posts.html', context=context)
+    Returns:
+        An HttpResponse with the top rated books page.
+    """
+    tickets = (get_users_viewable_tickets(user=request.user)
+               .filter(review_count__gte=settings.FEED_TOP_RATED_MIN_REVIEWS)
+               .order_by('-rating_average', '-review_count')
+               .select_related('user')
+               .with_user_has_reviewed(user=request.user))
+
+    paginator = Paginator(object_list=tickets, per_page=10)
+    page_obj = paginator.get_page(number=request.GET.get('page'))
+
+    return render(request=request, template_name='feed/top_rated.html', context={'page_obj': page_obj})
 
 
 @login_required
@@ -109,9 +134,6 @@ def create_ticket(request: HttpRequest) -> HttpResponse:
             image = ticket_form.cleaned_data.get("image")
             user = request.user
 
-            user.user_permissions.add(Permission.objects.get(codename='change_ticket'))
-            user.user_permissions.add(Permission.objects.get(codename='delete_ticket'))
-
             Ticket.objects.create(
                 title=title,
                 description=description,
@@ -130,7 +152,6 @@ def create_ticket(request: HttpRequest) -> HttpResponse:
 
 
 @login_required
-@permission_required(perm='feed.change_ticket', raise_exception=True)
 def update_ticket(request: HttpRequest, ticket_id: int) -> HttpResponse:
     """
     View function for updating an existing ticket.
@@ -142,7 +163,8 @@ def update_ticket(request: HttpRequest, ticket_id: int) -> HttpResponse:
         An HttpResponseRedirect to the feed page afet ticket update or
         an HttpResponse with the update ticket form and its content to update.
     """
-    ticket = get_object_or_404(Ticket, id=ticket_id, user=request.user)
+    ticket = get_owned_post_or_404(user=request.user, perm='feed.change_ticket', queryset=Ticket.objects.all(),
+                                   id=ticket_id)
 
     if request.method == 'POST':
         ticket_form = TicketForm(request.POST, request.FILES, instance=ticket)
@@ -160,7 +182,6 @@ def update_ticket(request: HttpRequest, ticket_id: int) -> HttpResponse:
                   context={'ticket_form': ticket_form, "ticket": ticket})
 
 
-@permission_required(perm='feed.delete_ticket', raise_exception=True)
 @login_required
 def delete_ticket(request: HttpRequest, ticket_id: int) -> HttpResponse:
     """
@@ -173,7 +194,8 @@ def delete_ticket(request: HttpRequest, ticket_id: int) -> HttpResponse:
         An HttpResponseRedirect to the feed page afet ticket delete or
         An HttpResponse of the delete page with the ticket to delete.
     """
-    ticket = get_object_or_404(Ticket, id=ticket_id, user=request.user)
+    ticket = get_owned_post_or_404(user=request.user, perm='feed.delete_ticket',
+                                   queryset=Ticket.objects.select_related("user"), id=ticket_id)
 
     if request.method == 'POST':
         ticket.delete()
@@ -200,11 +222,6 @@ def create_review(request: HttpRequest) -> HttpResponse:
         if all([ticket_form.is_valid(), review_form.is_valid()]):
             user = request.user
 
-            user.user_permissions.add(Permission.objects.get(codename='change_review'))
-            user.user_permissions.add(Permission.objects.get(codename='delete_review'))
-            user.user_permissions.add(Permission.objects.get(codename='change_ticket'))
-            user.user_permissions.add(Permission.objects.get(codename='delete_ticket'))
-
             ticket = Ticket.objects.create(
                 title=ticket_form.cleaned_data["title"],
                 description=ticket_form.cleaned_data["description"],
@@ -244,13 +261,14 @@ def create_review_by_answer(request: HttpRequest, ticket_id: int) -> HttpRespons
         An HttpResponseRedirect to the feed page after review creation or
         An HttpResponse to the creation by answer page with the forms of the new review and its ticket.
     """
-    ticket = Ticket.objects.get(id=ticket_id)
+    ticket = get_object_or_404(Ticket.objects.select_related("user").with_user_has_reviewed(user=request.user),
+                               id=ticket_id)
 
-    if not UserFollows.objects.filter(user=request.user, followed_user=ticket.user).exists():
+    if ticket.user_id not in get_followed_ids(user=request.user):
         messages.error(request=request, message="❌ Vous ne pouvez pas poster de critique sur ce ticket.")
         return redirect(to='feed:feed')
 
-    elif Review.objects.filter(ticket=ticket, user=request.user).exists():
+    elif request.method != 'POST' and ticket.user_has_reviewed:
         messages.error(request=request, message="❌ Vous avez déjà publié une critique sur ce ticket.")
         return redirect(to='feed:feed')
     else:
@@ -259,16 +277,20 @@ def create_review_by_answer(request: HttpRequest, ticket_id: int) -> HttpRespons
             if review_form.is_valid():
                 user = request.user
 
-                user.user_permissions.add(Permission.objects.get(codename='change_review'))
-                user.user_permissions.add(Permission.objects.get(codename='delete_review'))
+                try:
+                    # the unique (ticket, user) constraint rejects a second review of the same ticket
+                    with transaction.atomic():
+                        Review.objects.create(
+                            ticket=ticket,
+                            headline=review_form.cleaned_data["headline"],
+                            rating=review_form.cleaned_data["rating"],
+                            body=review_form.cleaned_data["body"],
+                            user=user,
+                        )
+                except IntegrityError:
+                    messages.error(request=request, message="❌ Vous avez déjà publié une critique sur ce ticket.")
+                    return redirect(to='feed:feed')
 
-                Review.objects.create(
-                    ticket=ticket,
-                    headline=review_form.cleaned_data["headline"],
-                    rating=review_form.cleaned_data["rating"],
-                    body=review_form.cleaned_data["body"],
-                    user=user,
-                )
                 messages.success(request=request, message="✅ Critique correctement publiée.")
                 return redirect(to='feed:feed')
             else:
@@ -282,7 +304,6 @@ def create_review_by_answer(request: HttpRequest, ticket_id: int) -> HttpRespons
 
 
 @login_required
-@permission_required(perm='feed.change_review', raise_exception=True)
 def update_review(request, review_id):
     """
     View function for updating an existing review.
@@ -294,7 +315,8 @@ def update_review(request, review_id):
         An HttpResponseRedirect to the feed page after review update or
         An HttpResponse to the review update page with the form of the review to update and its content.
     """
-    review = get_object_or_404(Review, id=review_id, user=request.user)
+    review = get_owned_post_or_404(user=request.user, perm='feed.change_review',
+                                   queryset=Review.objects.select_related("ticket__user"), id=review_id)
 
     ticket = review.ticket
 
@@ -315,7 +337,6 @@ def update_review(request, review_id):
 
 
 @login_required
-@permission_required(perm='feed.delete_review', raise_exception=True)
 def delete_review(request: HttpRequest, review_id: int) -> HttpResponse:
     """
     View function for deleting an existing review.
@@ -327,11 +348,15 @@ def delete_review(request: HttpRequest, review_id: int) -> HttpResponse:
         An HttpResponseRedirect to the feed page after review delete or
         An HttpResponse to the delete confirmation page with the review to delete.
     """
-    review = get_object_or_404(Review, id=review_id, user=request.user)
+    review = get_owned_post_or_404(
+        user=request.user, perm='feed.delete_review',
+        queryset=Review.objects.select_related("user", "ticket__user").with_user_has_reviewed(user=request.user),
+        id=review_id
+    )
 
     ticket = review.ticket
 
-    ticket.user_has_reviewed = ticket.has_user_review(user=request.user)
+    ticket.user_has_reviewed = review.ticket_user_has_reviewed
 
     if request.method == 'POST':
         review.delete()
@@ -371,9 +396,12 @@ def follow_user(request: HttpRequest) -> HttpResponse:
 
     followed_by = (UserFollows.objects.filter(followed_user=request.user).select_related("user"))
 
+    suggestions = get_follow_suggestions(user=request.user)
+
     return render(request=request,
                   template_name="feed/followers.html",
-                  context={"follow_form": follow_form, "following": following, "followed_by": followed_by})
+                  context={"follow_form": follow_form, "following": following, "followed_by": followed_by,
+                           "suggestions": suggestions})
 
 
 def delete_follow_user(request: HttpRequest, user_id: int) -> HttpResponse:
@@ -400,6 +428,47 @@ def delete_follow_user(request: HttpRequest, user_id: int) -> HttpResponse:
                   context={'username': followed_user.username})
 
 
+def paginate_posts(request: HttpRequest, posts: FeedPosts) -> Page | CursorPage:
+    """
+    Method for getting the requested page of posts, with the pagination mode set in the settings.
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+        posts (FeedPosts): The posts to paginate.
+
+    Returns:
+        A CursorPage when FEED_PAGINATION is "cursor", else a Page.
+    """
+    if settings.FEED_PAGINATION == "cursor":
+        paginator = CursorPaginator(object_list=posts, per_page=5, count_pages=settings.FEED_PAGINATION_COUNT)
+        return paginator.get_page(cursor=request.GET.get('cursor'))
+
+    paginator = Paginator(object_list=posts, per_page=5)
+    return paginator.get_page(number=request.GET.get('page'))
+
+
+def get_owned_post_or_404(user: AbstractUser, perm: str, queryset: QuerySet, **lookup) -> Ticket | Review:
+    """
+    Method for getting a post its author may change or delete.
+    The ownership is checked by OwnershipBackend itself rather than user.has_perm, which grants every
+    permission to the superusers: only the author edits a post from the front-end forms.
+    Args:
+        user (AbstractUser): The logged-in user.
+        perm (str): The owner permission, e.g. "feed.change_ticket".
+        queryset (QuerySet): The tickets or reviews to get the post from.
+        **lookup: The lookup of the post, e.g. id=ticket_id.
+
+    Returns:
+        The post.
+
+    Raises:
+        Http404: If the post does not exist or the user is not its author, who cannot tell the two apart.
+    """
+    post = get_object_or_404(queryset, **lookup)
+    if not OwnershipBackend().has_perm(user_obj=user, perm=perm, obj=post):
+        raise Http404
+    return post
+
+
 def get_users_viewable_tickets(user: AbstractUser) -> QuerySet[Ticket]:
     """
     Method for getting user viewable tickets.
@@ -409,14 +478,7 @@ def get_users_viewable_tickets(user: AbstractUser) -> QuerySet[Ticket]:
     Returns:
         A QuerySet with the viewable tickets.
     """
-    followed_users = UserFollows.objects.filter(user=user).values_list(
-        "followed_user", flat=True
-    )
-
-    all_users = list(followed_users)
-    all_users.append(user)
-
-    return Ticket.objects.filter(user__in=all_users)
+    return Ticket.objects.filter(user__in=get_followed_ids(user=user) | {user.pk})
 
 
 def get_users_viewable_reviews(user: AbstractUser) -> QuerySet[Review]:
@@ -428,18 +490,47 @@ def get_users_viewable_reviews(user: AbstractUser) -> QuerySet[Review]:
     Returns:
         A QuerySet with the viewable reviews.
     """
-    followed_users = UserFollows.objects.filter(user=user).values_list(
-        "followed_user", flat=True
-    )
+    return Review.objects.filter(user__in=get_followed_ids(user=user) | {user.pk})
 
-    all_users = list(followed_users)
-    all_users.append(user)
 
-    return Review.objects.filter(user__in=all_users)
+def get_follow_suggestions(user: AbstractUser) -> QuerySet[FollowSuggestion]:
+    """
+    Method for getting the users suggested to a user, saved by the `compute_follow_suggestions` command.
+    Args:
+        user (AbstractUser): The user to get the suggestions for.
+
+    Returns:
+        A QuerySet with the suggestions, best first.
+    """
+    return FollowSuggestion.objects.filter(user=user).select_related("suggested_user").order_by("-score")
 
 
 def follow_compute_user(request: HttpRequest) -> JsonResponse:
     if request.method == "POST":
-        user_to_follow = User.objects.filter(username=request.POST.get('user'))
-        return JsonResponse({'response': user_to_follow.exists()})
+        user_id = username_index.get_id(username=request.POST.get('user', ''))
+        followable = user_id is not None
+        if followable and request.user.is_authenticated:
+            followable = user_id != request.user.pk and user_id not in get_followed_ids(user=request.user)
+        return JsonResponse({'response': followable})
     return JsonResponse({'response': False})
+
+
+@login_required
+def follow_suggest_user(request: HttpRequest) -> JsonResponse:
+    """
+    View function for suggesting the usernames starting with the text typed in the follow form.
+    The requester and the users already followed are left out.
+    Args:
+        request (HttpRequest): The incoming HTTP request.
+
+    Returns:
+        A JsonResponse with the list of the suggested usernames.
+    """
+    prefix = request.GET.get('q', '')
+    if not prefix:
+        return JsonResponse({'usernames': []})
+
+    usernames = username_index.search(prefix=prefix,
+                                      limit=settings.USERNAME_SUGGESTIONS_LIMIT,
+                                      exclude_ids=get_followed_ids(user=request.user) | {request.user.pk})
+    return JsonResponse({'usernames': usernames})
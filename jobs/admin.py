@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'run_at', 'time_created', 'time_finished')
+    list_filter = ('status', 'task')
+
+
+admin.site.register(Job, JobAdmin)
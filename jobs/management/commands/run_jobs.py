@@ -0,0 +1,99 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from jobs.queue import claim_jobs, purge_jobs, run_job
+
+logger = logging.getLogger(__name__)
+
+# seconds between two purges of the jobs done, made when the worker is idle
+PURGE_INTERVAL = 60 * 60
+
+
+def setup_worker():
+    """
+    Initializes Django in a worker process, which has no database connection of its own yet.
+    """
+    django.setup()
+    connections.close_all()
+
+
+def execute_job(job_id: int) -> bool:
+    """
+    Runs a job in a worker thread or process, then releases the database connection of the worker.
+    """
+    try:
+        return run_job(job_id=job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Runs the queued background jobs on a pool of threads or processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Number of jobs run at the same time.")
+        parser.add_argument("--pool", choices=["thread", "process"], default="thread",
+                            help="Run the jobs in threads (default) or in processes.")
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds to wait before looking for new jobs when the queue is empty.")
+        parser.add_argument("--burst", action="store_true",
+                            help="Exit once the queue is empty instead of waiting for new jobs.")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be a positive number.")
+
+        if options["pool"] == "process":
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=setup_worker)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+
+        self.stdout.write(f"Running jobs on {workers} {options['pool']} workers.")
+        # job ID of each running future
+        running = {}
+        succeeded = failed = 0
+        purged_at = None
+        try:
+            while True:
+                done = {future for future in running if future.done()}
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception:
+                        # the job could not be run or recorded, it runs again after its visibility timeout
+                        logger.exception("Job %s could not be run.", job_id)
+                        result = False
+                    if result:
+                        succeeded += 1
+                    else:
+                        failed += 1
+
+                jobs = claim_jobs(limit=workers - len(running)) if len(running) < workers else []
+                for job in jobs:
+                    running[executor.submit(execute_job, job.pk)] = job.pk
+
+                if jobs:
+                    continue
+                if not running and (purged_at is None or time.monotonic() - purged_at > PURGE_INTERVAL):
+                    purged_at = time.monotonic()
+                    purge_jobs()
+                if running:
+                    wait(running, timeout=options["poll_interval"], return_when=FIRST_COMPLETED)
+                elif options["burst"]:
+                    break
+                else:
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping, waiting for the running jobs to finish.")
+        finally:
+            executor.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(f"{succeeded} jobs succeeded, {failed} jobs failed."))
@@ -0,0 +1,35 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Background job: a call of a task function, run by the `run_jobs` worker command.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [(QUEUED, "En attente"), (RUNNING, "En cours"), (DONE, "Terminé"), (FAILED, "Échoué")]
+
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=7, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    # a running job whose lock has expired is considered lost and run again
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    time_created = models.DateTimeField(auto_now_add=True)
+    time_finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # jobs due to run, oldest first
+            models.Index(fields=['status', 'run_at'], name='job_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk}"
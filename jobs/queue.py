@@ -0,0 +1,112 @@
+import traceback
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from jobs.models import Job
+
+# dotted paths of the functions allowed to run as jobs
+TASKS: set[str] = set()
+
+
+def task(func: Callable) -> Callable:
+    """
+    Decorator registering a function as a task that can be enqueued as a background job.
+    The arguments of the function must be JSON serializable.
+    """
+    TASKS.add(f"{func.__module__}.{func.__qualname__}")
+    return func
+
+
+def enqueue(func: Callable, *args, **kwargs) -> Job | None:
+    """
+    Method to run a task in the background.
+    When JOBS_IMMEDIATE is set, the task runs right away instead, which is handy without a worker.
+    Args:
+        func (Callable): The task, decorated with @task.
+        *args: The positional arguments of the task.
+        **kwargs: The keyword arguments of the task.
+
+    Returns:
+        The queued Job, or None if the task ran right away.
+    """
+    path = f"{func.__module__}.{func.__qualname__}"
+    if path not in TASKS:
+        raise ValueError(f"{path} is not a registered task.")
+
+    if settings.JOBS_IMMEDIATE:
+        func(*args, **kwargs)
+        return None
+
+    return Job.objects.create(task=path, args=list(args), kwargs=kwargs, max_attempts=settings.JOBS_MAX_ATTEMPTS)
+
+
+def claim_jobs(limit: int) -> list[Job]:
+    """
+    Method to lock jobs that are due, so that no other worker runs them until their visibility timeout.
+    Args:
+        limit (int): The maximum number of jobs to claim.
+
+    Returns:
+        A list with the claimed jobs.
+    """
+    now = timezone.now()
+    due = (Q(status=Job.QUEUED) | Q(status=Job.RUNNING, locked_until__lt=now)) & Q(run_at__lte=now)
+
+    claimed = []
+    for job_id in Job.objects.filter(due).order_by("run_at", "id").values_list("id", flat=True)[:limit]:
+        # the conditional update only succeeds for one worker
+        locked = Job.objects.filter(due, pk=job_id).update(
+            status=Job.RUNNING,
+            locked_until=now + timedelta(seconds=settings.JOBS_VISIBILITY_TIMEOUT),
+            attempts=F("attempts") + 1,
+        )
+        if locked:
+            claimed.append(Job.objects.get(pk=job_id))
+    return claimed
+
+
+def run_job(job_id: int) -> bool:
+    """
+    Method to run a claimed job, then record its success or schedule a retry with an exponential backoff.
+    Args:
+        job_id (int): The ID of the job.
+
+    Returns:
+        A boolean indicating if the job succeeded.
+    """
+    job = Job.objects.get(pk=job_id)
+    try:
+        # importing the task registers it
+        func = import_string(job.task)
+        if job.task not in TASKS:
+            raise ValueError(f"{job.task} is not a registered task.")
+        func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            Job.objects.filter(pk=job.pk).update(status=Job.QUEUED, locked_until=None, last_error=error,
+                                                 run_at=timezone.now() + timedelta(seconds=delay))
+        else:
+            Job.objects.filter(pk=job.pk).update(status=Job.FAILED, locked_until=None, last_error=error,
+                                                 time_finished=timezone.now())
+        return False
+
+    Job.objects.filter(pk=job.pk).update(status=Job.DONE, locked_until=None, time_finished=timezone.now())
+    return True
+
+
+def purge_jobs() -> int:
+    """
+    Method to delete the jobs done for more than JOBS_DONE_RETENTION seconds. The failed jobs are kept.
+    Returns:
+        The number of deleted jobs.
+    """
+    finished_before = timezone.now() - timedelta(seconds=settings.JOBS_DONE_RETENTION)
+    deleted, _ = Job.objects.filter(status=Job.DONE, time_finished__lt=finished_before).delete()
+    return deleted
@@ -0,0 +1,202 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim_jobs, enqueue, purge_jobs, run_job, task
+
+# calls of the test tasks, checked by the tests
+calls = []
+
+
+@task
+def record(value: int, double: bool = False) -> None:
+    calls.append(value * 2 if double else value)
+
+
+@task
+def fail() -> None:
+    raise RuntimeError("Task failure")
+
+
+def unregistered() -> None:
+    pass
+
+
+@override_settings(JOBS_IMMEDIATE=False, JOBS_MAX_ATTEMPTS=3, JOBS_RETRY_DELAY=10, JOBS_VISIBILITY_TIMEOUT=60)
+class QueueTests(TestCase):
+    """
+    The queue used when JOBS_IMMEDIATE is False: the views enqueue jobs, run later by a worker.
+    """
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue(self):
+        job = enqueue(record, 1, double=True)
+
+        job.refresh_from_db()
+        self.assertEqual((job.task, job.args, job.kwargs), (f"{__name__}.record", [1], {"double": True}))
+        self.assertEqual((job.status, job.attempts, job.max_attempts), (Job.QUEUED, 0, 3))
+        self.assertEqual(calls, [])
+
+    @override_settings(JOBS_IMMEDIATE=True)
+    def test_enqueue_immediate(self):
+        self.assertIsNone(enqueue(record, 1, double=True))
+
+        self.assertEqual(calls, [2])
+        self.assertFalse(Job.objects.exists())
+
+    def test_enqueue_unregistered(self):
+        with self.assertRaisesMessage(ValueError, f"{__name__}.unregistered is not a registered task."):
+            enqueue(unregistered)
+
+    def test_claim(self):
+        first = enqueue(record, 1)
+        second = enqueue(record, 2)
+        later = enqueue(record, 3)
+        Job.objects.filter(pk=later.pk).update(run_at=timezone.now() + timedelta(minutes=1))
+
+        claimed = claim_jobs(limit=10)
+
+        self.assertEqual([job.pk for job in claimed], [first.pk, second.pk])
+        for job in claimed:
+            self.assertEqual((job.status, job.attempts), (Job.RUNNING, 1))
+            self.assertAlmostEqual(job.locked_until, timezone.now() + timedelta(seconds=60),
+                                   delta=timedelta(seconds=5))
+
+    def test_claim_limit(self):
+        jobs = [enqueue(record, value) for value in range(3)]
+
+        self.assertEqual([job.pk for job in claim_jobs(limit=2)], [job.pk for job in jobs[:2]])
+        self.assertEqual([job.pk for job in claim_jobs(limit=2)], [jobs[2].pk])
+
+    def test_visibility_timeout(self):
+        job = enqueue(record, 1)
+        claim_jobs(limit=1)
+
+        # the worker running the job still holds it
+        self.assertEqual(claim_jobs(limit=1), [])
+
+        # the worker is lost, the lock expires
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = claim_jobs(limit=1)
+
+        self.assertEqual([job.pk for job in reclaimed], [job.pk])
+        self.assertEqual((reclaimed[0].status, reclaimed[0].attempts), (Job.RUNNING, 2))
+
+    def test_run(self):
+        job = enqueue(record, 1, double=True)
+        claim_jobs(limit=1)
+
+        self.assertTrue(run_job(job_id=job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual(calls, [2])
+        self.assertEqual((job.status, job.locked_until), (Job.DONE, None))
+        self.assertIsNotNone(job.time_finished)
+        self.assertEqual(claim_jobs(limit=1), [])
+
+    def test_retry_then_fail(self):
+        job = enqueue(fail)
+
+        # the delay doubles after each failed attempt, until the last one
+        for delay in (10, 20):
+            claim_jobs(limit=1)
+            self.assertFalse(run_job(job_id=job.pk))
+
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.locked_until), (Job.QUEUED, None))
+            self.assertIn("RuntimeError: Task failure", job.last_error)
+            self.assertAlmostEqual(job.run_at, timezone.now() + timedelta(seconds=delay), delta=timedelta(seconds=5))
+            # not due yet
+            self.assertEqual(claim_jobs(limit=1), [])
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+
+        claim_jobs(limit=1)
+        self.assertFalse(run_job(job_id=job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_until), (Job.FAILED, 3, None))
+        self.assertIsNotNone(job.time_finished)
+        self.assertEqual(claim_jobs(limit=1), [])
+
+    def test_run_unregistered(self):
+        job = Job.objects.create(task=f"{__name__}.unregistered", max_attempts=1)
+        claim_jobs(limit=1)
+
+        self.assertFalse(run_job(job_id=job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn(f"{__name__}.unregistered is not a registered task.", job.last_error)
+
+    @override_settings(JOBS_DONE_RETENTION=60)
+    def test_purge(self):
+        old, recent, failed, queued = (Job.objects.create(task=f"{__name__}.record") for _ in range(4))
+        finished = timezone.now() - timedelta(seconds=61)
+        Job.objects.filter(pk=old.pk).update(status=Job.DONE, time_finished=finished)
+        Job.objects.filter(pk=recent.pk).update(status=Job.DONE, time_finished=timezone.now())
+        Job.objects.filter(pk=failed.pk).update(status=Job.FAILED, time_finished=finished)
+
+        self.assertEqual(purge_jobs(), 1)
+        self.assertEqual(set(Job.objects.values_list("pk", flat=True)), {recent.pk, failed.pk, queued.pk})
+
+
+@override_settings(JOBS_IMMEDIATE=False, JOBS_MAX_ATTEMPTS=1)
+class RunJobsCommandTests(TransactionTestCase):
+    """
+    A pass of the worker command, whose threads use their own database connections: the jobs are committed.
+    """
+
+    def setUp(self):
+        calls.clear()
+
+    def test_burst(self):
+        for value in range(5):
+            enqueue(record, value)
+        failed = enqueue(fail)
+        later = enqueue(record, 10)
+        Job.objects.filter(pk=later.pk).update(run_at=timezone.now() + timedelta(minutes=1))
+        stdout = StringIO()
+
+        call_command("run_jobs", workers=2, burst=True, poll_interval=0.01, stdout=stdout)
+
+        self.assertEqual(sorted(calls), [0, 1, 2, 3, 4])
+        self.assertIn("5 jobs succeeded, 1 jobs failed.", stdout.getvalue())
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 5)
+        self.assertEqual(Job.objects.get(pk=failed.pk).status, Job.FAILED)
+        self.assertEqual(Job.objects.get(pk=later.pk).status, Job.QUEUED)
+
+    def test_burst_run_error(self):
+        jobs = [enqueue(record, value) for value in range(3)]
+
+        def execute_job(job_id):
+            if job_id == jobs[1].pk:
+                raise DatabaseError("database is locked")
+            return run_job(job_id=job_id)
+
+        with mock.patch("jobs.management.commands.run_jobs.execute_job", side_effect=execute_job), \
+                self.assertLogs("jobs", level="ERROR") as logs:
+            stdout = StringIO()
+            call_command("run_jobs", workers=2, burst=True, poll_interval=0.01, stdout=stdout)
+
+        self.assertEqual(sorted(calls), [0, 2])
+        self.assertIn("2 jobs succeeded, 1 jobs failed.", stdout.getvalue())
+        self.assertIn(f"Job {jobs[1].pk} could not be run.", logs.output[0])
+        # run again after its visibility timeout
+        self.assertEqual(Job.objects.get(pk=jobs[1].pk).status, Job.RUNNING)
+
+    @override_settings(JOBS_DONE_RETENTION=60)
+    def test_burst_purge(self):
+        job = enqueue(record, 1)
+        Job.objects.filter(pk=job.pk).update(status=Job.DONE, time_finished=timezone.now() - timedelta(seconds=61))
+
+        call_command("run_jobs", burst=True, poll_interval=0.01, stdout=StringIO())
+
+        self.assertFalse(Job.objects.exists())
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'litreview.settings')
+# serve the async versions of the feed views, see feed.async_views
+os.environ.setdefault('LITREVIEW_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
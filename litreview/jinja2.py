@@ -0,0 +1,82 @@
+"""
+Jinja2 environment of the Jinja2 template backend, with the Django helpers used by the templates of the
+`jinja2` directories: ports of the feed and posts pages, rendered instead of the Django templates when
+FEED_TEMPLATE_ENGINE is "jinja2".
+"""
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template.defaultfilters import floatformat, pluralize
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.timezone import template_localtime
+from jinja2 import Environment, pass_context
+from markupsafe import Markup
+
+from feed.templatetags import feed_extras
+
+
+def environment(**options) -> Environment:
+    """
+    Method to create the Jinja2 environment, called by the Jinja2 template backend with its options.
+    Args:
+        **options: The options of the Environment, set by the backend and by the OPTIONS of the TEMPLATES setting.
+
+    Returns:
+        The environment, with the globals and filters of the templates.
+    """
+    env = Environment(**options)
+    env.globals.update({
+        "cache": cache,
+        "static": static,
+        "url": url,
+        "get_poster_display": pass_context(feed_extras.get_poster_display),
+        "get_poster_display_subject": pass_context(feed_extras.get_poster_display_subject),
+        "get_image_srcset": feed_extras.get_image_srcset,
+        "get_fragment_cache_timeout": feed_extras.get_fragment_cache_timeout,
+    })
+    env.filters.update({
+        "floatformat": floatformat,
+        "is_viewer": feed_extras.is_viewer,
+        "localize": localize_value,
+        "pluralize": pluralize,
+    })
+    return env
+
+
+def url(viewname: str, **kwargs) -> str:
+    return reverse(viewname, kwargs=kwargs)
+
+
+def localize_value(value) -> str:
+    # what {{ value }} displays in a Django template: a date in the current time zone, in the current locale
+    return localize(template_localtime(value))
+
+
+def get_fragment_cache() -> BaseCache:
+    # the cache of the {% cache %} tag of the Django templates
+    return caches["template_fragments" if "template_fragments" in settings.CACHES else "default"]
+
+
+def cache(timeout: int | None, fragment_name: str, *vary_on, caller) -> Markup:
+    """
+    Method to cache a fragment of a template, the port of the {% cache %} tag, used with a call block:
+    `{% call cache(timeout, "name", var, ...) %}...{% endcall %}`.
+    The keys are apart from the ones of the Django templates, whose fragments have another whitespace.
+    Args:
+        timeout (int | None): The lifetime of the fragment in seconds, None to keep it until it is evicted.
+        fragment_name (str): The name of the fragment.
+        *vary_on: The values the fragment depends on.
+        caller (Callable): The call block, rendering the fragment.
+
+    Returns:
+        The rendered fragment.
+    """
+    fragment_cache = get_fragment_cache()
+    key = make_template_fragment_key(f"jinja2.{fragment_name}", vary_on)
+    value = fragment_cache.get(key)
+    if value is None:
+        value = caller()
+        fragment_cache.set(key, value, timeout)
+    return Markup(value)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,9 +41,11 @@ INSTALLED_APPS = [
     'accounts',
     'core',
     'feed',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,18 +53,27 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'litreview.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates measuring the render time for core.middleware.PerformanceMiddleware
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [
             BASE_DIR / 'templates',
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # templates are parsed once per process; the development server resets them when a template changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -69,6 +81,20 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        # Jinja2 ports of the feed and posts pages, in the `jinja2` directory of the apps, see FEED_TEMPLATE_ENGINE
+        'BACKEND': 'core.timing.TimedJinja2',
+        'NAME': 'jinja2',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'environment': 'litreview.jinja2.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
 ]
 
 WSGI_APPLICATION = 'litreview.wsgi.application'
@@ -77,14 +103,74 @@ WSGI_APPLICATION = 'litreview.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# PRAGMAs run on each new connection: the write-ahead log lets the readers and the writer work at the same time,
+# and is synced at checkpoints only; the database file is read through a memory map and a larger page cache.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {pragma} = {value}' for pragma, value in SQLITE_PRAGMAS.items()),
+            # the transactions take the write lock when they begin, so that a transaction reading then writing
+            # waits for the other writers instead of failing with "database is locked" when it writes
+            'transaction_mode': 'IMMEDIATE',
+            # seconds a connection waits for the write lock
+            'timeout': 20,
+        },
+        # connections, and their PRAGMAs, are kept by each worker thread between requests. Not under ASGI
+        # (LITREVIEW_ASYNC_VIEWS is set by litreview/asgi.py, see FEED_ASYNC_VIEWS): the ORM calls of a request run
+        # in a thread of its own, whose persistent connection would never be reused nor closed.
+        'CONN_MAX_AGE': 0 if os.environ.get('LITREVIEW_ASYNC_VIEWS', '0') == '1' else 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # shared by all the worker processes of the host
+    'feed': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'feed',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # sessions and users of the sessions, shared by all the worker processes of the host
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'sessions',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+    # rendered post snippets, used by the {% cache %} tags of the feed templates: read many times by each page,
+    # they are kept in the memory of each process
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -105,8 +191,25 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'accounts.User'
 
+AUTHENTICATION_BACKENDS = [
+    # ModelBackend reading the user of each session from the cache, see accounts.backends
+    'accounts.backends.CachedModelBackend',
+    'feed.backends.OwnershipBackend',
+]
+
 LOGIN_URL = 'core:index'
 
+# Cache of the users of the sessions.
+ACCOUNTS_USER_CACHE_ALIAS = 'sessions'
+ACCOUNTS_USER_CACHE_TIMEOUT = 60 * 60
+
+# Sessions read from the cache, and from the database when the cache lost them.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Messages kept in a signed cookie, so that adding and displaying them does not write the session.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -127,3 +230,82 @@ STATIC_ROOT = BASE_DIR / 'static'
 
 MEDIA_ROOT = BASE_DIR / 'media/'
 MEDIA_URL = '/media/'
+
+# Feed
+# "cursor" pages the feed and posts pages with keyset cursors, "page" with page numbers.
+FEED_PAGINATION = 'cursor'
+# Count the posts to display the total number of pages in cursor mode.
+FEED_PAGINATION_COUNT = False
+# "read" merges the posts of the followed users on every feed request, "write" fans every post out
+# to the FeedEntry timelines of the followers. Run `manage.py rebuild_timelines` after switching to "write".
+FEED_FANOUT = 'read'
+# Serve the async feed, posts and follows views (feed.async_views), set by litreview/asgi.py.
+FEED_ASYNC_VIEWS = os.environ.get('LITREVIEW_ASYNC_VIEWS', '0') == '1'
+# Cache the rendered feed and posts pages of each user until a relevant post or follow changes.
+FEED_PAGE_CACHE = True
+FEED_PAGE_CACHE_TIMEOUT = 60 * 60
+FEED_CACHE_ALIAS = 'feed'
+# Send ETag and Last-Modified validators with the feed and posts pages, built from the version of the cached pages
+# of the user, and answer the requests of browsers whose copy is still current with a 304 Not Modified.
+FEED_CONDITIONAL_GET = True
+# Template engine rendering the feed and posts pages: "django", or "jinja2" for their ports in feed/jinja2,
+# compared by `manage.py benchmark_templates`.
+FEED_TEMPLATE_ENGINE = 'django'
+# Lifetime of the cached snippet of each post, keyed on its last change and on the viewer-relative flags.
+FEED_FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+# Maximum number of authors viewable by a user whose posts are matched by the search index before being ranked.
+# Beyond, the posts of every author matching the searched words are ranked, then filtered, see feed.search.
+FEED_SEARCH_MAX_INDEXED_AUTHORS = 200
+# Deepest page of search results: each page ranks every matching post again and skips the former pages.
+FEED_SEARCH_MAX_PAGES = 20
+# Minimum number of reviews of a ticket to be listed in the top rated books.
+FEED_TOP_RATED_MIN_REVIEWS = 2
+# Cache of the followed and follower ID sets of each user.
+FOLLOW_GRAPH_CACHE_ALIAS = 'feed'
+FOLLOW_GRAPH_CACHE_TIMEOUT = 60 * 60
+# Number of follow suggestions kept for each user, see `manage.py compute_follow_suggestions`.
+FOLLOW_SUGGESTIONS_COUNT = 10
+# Widths of the resized renditions of the ticket images, see feed.images.
+TICKET_IMAGE_WIDTHS = [300, 500, 600, 1000]
+TICKET_IMAGE_QUALITY = 80
+
+# Accounts
+# Seconds after which the in-process username index is reloaded, to catch the users created by other processes.
+USERNAME_INDEX_MAX_AGE = 5 * 60
+# Maximum number of usernames suggested by the follow form.
+USERNAME_SUGGESTIONS_LIMIT = 10
+
+# Jobs
+# Run the background jobs right away in the request instead of queuing them for `manage.py run_jobs`.
+JOBS_IMMEDIATE = False
+JOBS_MAX_ATTEMPTS = 3
+# Seconds after which a job claimed by a worker that died is run again.
+JOBS_VISIBILITY_TIMEOUT = 5 * 60
+# Seconds before the first retry of a failed job, doubled on each attempt.
+JOBS_RETRY_DELAY = 10
+# Seconds after which the jobs done are deleted by the `run_jobs` workers. The failed jobs are kept.
+JOBS_DONE_RETENTION = 7 * 24 * 60 * 60
+
+# Performance
+# Measure the database, template and view time of each request and send it in a Server-Timing header.
+PERFORMANCE_TIMING = True
+# Requests slower than this are logged by the core.middleware logger.
+PERFORMANCE_SLOW_REQUEST_MS = 500
+# Collect per-view request counts and latency histograms, exported by the staff-only /metrics/ endpoint.
+PERFORMANCE_METRICS = True
+# Let the staff profile a request with ?profile=1 or the X-Profile: 1 header, see core.middleware.
+PROFILING_ENABLED = True
+PROFILING_DIR = BASE_DIR / '.profiles'
+PROFILING_SAMPLE_INTERVAL = 0.001
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.middleware': {'handlers': ['console'], 'level': 'WARNING'},
+        'jobs': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
@@ -26,6 +26,7 @@ from core import views as core_views
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', core_views.index, name='index'),
+    path('metrics/', core_views.metrics, name='metrics'),
     path('accounts/', include('accounts.urls')),
     path('feed/', include('feed.urls')),
 ]